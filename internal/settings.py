@@ -1,3 +1,145 @@
+import os
+
 INSTALLED_APPS = [
     "crm",
-]
\ No newline at end of file
+]
+
+# Shared cache reachable by every worker, e.g. redis://localhost:6379/0.
+# Leave unset to keep caches process-local.
+CACHE_URL = os.getenv("CACHE_URL")
+
+# Serve rows read from the database without re-validating them through
+# DiscountOutputDTO on the way out.
+TRUSTED_OUTPUT = os.getenv("TRUSTED_OUTPUT", "true").lower() == "true"
+
+# Connection pool of each installed app, read by its repository registry.
+# Timeouts are in seconds. Only PostgreSQL pools connections, the values are
+# ignored on SQLite, the other database the crm module runs on.
+DATABASE_POOLS = {
+    "crm": {
+        "min_size": int(os.getenv("CRM_DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.getenv("CRM_DB_POOL_MAX_SIZE", "10")),
+        "acquire_timeout": float(os.getenv("CRM_DB_POOL_ACQUIRE_TIMEOUT", "10")),
+        "max_queries": int(os.getenv("CRM_DB_POOL_MAX_QUERIES", "50000")),
+        "statement_timeout": float(os.getenv("CRM_DB_STATEMENT_TIMEOUT", "30")),
+    },
+}
+
+# Read replicas of each installed app, comma separated database URLs. Reads
+# go to the primary while there are none.
+DATABASE_REPLICAS = {
+    "crm": [url for url in os.getenv("CRM_DB_REPLICA_URLS", "").split(",") if url],
+}
+
+# Engine the discounts are served from: "sql" queries the database, "memory"
+# holds every discount in memory and answers reads from there. With
+# `write_through` the memory engine loads the table at startup, writes to it
+# and follows the writes of other workers every `follow_interval` seconds;
+# without it the discounts only live in the process.
+DISCOUNT_STORE = {
+    "engine": os.getenv("CRM_DISCOUNT_ENGINE", "sql"),
+    "write_through": os.getenv("CRM_DISCOUNT_WRITE_THROUGH", "true").lower() == "true",
+    "follow_interval": float(os.getenv("CRM_DISCOUNT_FOLLOW_INTERVAL", "1")),
+}
+
+# Concurrent lookups of single discounts by id are answered by one
+# `WHERE id IN (...)` query. A batch holds the ids asked for in the same event
+# loop iteration, or over `window` seconds when set, up to `max_batch` ids.
+READ_BATCHING = {
+    "enabled": os.getenv("CRM_READ_BATCHING", "true").lower() == "true",
+    "window": float(os.getenv("CRM_READ_BATCH_WINDOW", "0")),
+    "max_batch": int(os.getenv("CRM_READ_BATCH_MAX", "500")),
+}
+
+# Opt-in warm-up of the discount cache at startup with the visible catalog,
+# up to the cache size. With `snapshot` set the catalog is also kept in that
+# file and read back at the next start when not older than `max_age`
+# seconds, so reads are answered before the database is. Without one
+# startup waits up to `timeout` seconds for the database.
+WARMUP = {
+    "enabled": os.getenv("CRM_WARMUP", "false").lower() == "true",
+    "snapshot": os.getenv("CRM_WARMUP_SNAPSHOT", ""),
+    "max_age": float(os.getenv("CRM_WARMUP_SNAPSHOT_MAX_AGE", "86400")),
+    "timeout": float(os.getenv("CRM_WARMUP_TIMEOUT", "10")),
+}
+
+# Seconds a client keeps reading from the primary after one of its writes, so
+# it does not read a replica that has not caught up with it yet.
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "2"))
+
+# What POST /crm/discounts does with a name that is taken, unless the request
+# picks with ?on_conflict=: fail (409), ignore (answer the existing discount)
+# or update (overwrite it).
+CREATE_ON_CONFLICT = os.getenv("CRM_CREATE_ON_CONFLICT", "fail")
+
+# Seconds a create sent with an Idempotency-Key header is replayed to retries
+# with the same key instead of running again.
+IDEMPOTENCY_KEY_TTL = float(os.getenv("CRM_IDEMPOTENCY_KEY_TTL", "86400"))
+
+# Serve Prometheus metrics of the crm module on /metrics.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Opt-in timing of the crm routes, answered in a Server-Timing header. A
+# `sample_rate` share of the requests also runs under a profiler, and the
+# profile of those slower than `slow_ms` is written to `directory`.
+PROFILING = {
+    "enabled": os.getenv("PROFILE_REQUESTS", "false").lower() == "true",
+    "sample_rate": float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    "slow_ms": float(os.getenv("PROFILE_SLOW_MS", "500")),
+    "directory": os.getenv("PROFILE_DIR", "profiles"),
+}
+
+# Records of the crm loggers are written to `file` as JSON lines by a writer
+# thread. Up to `queue_size` records wait for it, later ones are dropped and
+# counted instead of blocking requests. The `adopted` loggers, onbbu's
+# app_logger by default, go to the same file instead of their own handlers
+# while the app runs.
+# The file rolls over past `max_bytes` or every `rotate_interval` seconds, 0
+# disables the latter, and `backup_count` compressed segments are kept, all
+# of them with 0. zstd compression falls back to gzip when zstandard is not
+# installed.
+LOGGING = {
+    "file": os.getenv("CRM_LOG_FILE", "crm.log"),
+    "level": os.getenv("CRM_LOG_LEVEL", "INFO"),
+    "adopted": tuple(
+        name for name in os.getenv("CRM_LOG_ADOPT", "app_logger").split(",") if name
+    ),
+    "queue_size": int(os.getenv("CRM_LOG_QUEUE_SIZE", "10000")),
+    "batch_size": int(os.getenv("CRM_LOG_BATCH_SIZE", "256")),
+    "flush_interval": float(os.getenv("CRM_LOG_FLUSH_INTERVAL", "0.5")),
+    "max_bytes": int(os.getenv("CRM_LOG_MAX_BYTES", str(50 * 1024 * 1024))),
+    "rotate_interval": float(os.getenv("CRM_LOG_ROTATE_INTERVAL", "86400")),
+    "backup_count": int(os.getenv("CRM_LOG_BACKUP_COUNT", "14")),
+    "compression": os.getenv("CRM_LOG_COMPRESSION", "zstd"),
+}
+
+# Changes to the discounts are written to an outbox table in their own
+# transaction, and a background task of each worker publishes them to
+# `sinks`: log, file (JSON lines appended to `file`) or memory. Delivery is
+# at-least-once. Dispatched events are deleted after `retention` seconds. An
+# event that failed `max_attempts` times is left in the outbox undispatched,
+# 0 retries it forever.
+OUTBOX = {
+    "sinks": [sink for sink in os.getenv("CRM_OUTBOX_SINKS", "log").split(",") if sink],
+    "file": os.getenv("CRM_OUTBOX_FILE", "crm-events.jsonl"),
+    "dispatcher": {
+        "enabled": os.getenv("CRM_OUTBOX_DISPATCH", "true").lower() == "true",
+        "batch_size": int(os.getenv("CRM_OUTBOX_BATCH_SIZE", "100")),
+        "poll_interval": float(os.getenv("CRM_OUTBOX_POLL_INTERVAL", "1")),
+        "max_backoff": float(os.getenv("CRM_OUTBOX_MAX_BACKOFF", "60")),
+        "max_attempts": int(os.getenv("CRM_OUTBOX_MAX_ATTEMPTS", "10")),
+        "retention": float(os.getenv("CRM_OUTBOX_RETENTION", str(7 * 86400))),
+    },
+}
+
+# GET /crm/discounts/changes holds an empty answer for up to `max_wait`
+# seconds when asked to wait, and looks for the writes of other workers every
+# `poll_interval`. It stops before a gap in the sequence younger than
+# `settle` seconds, which may be a transaction still committing, and skips
+# older ones for good: keep it above the longest write transaction. SQLite
+# commits in sequence order and never waits.
+CHANGE_FEED = {
+    "max_wait": float(os.getenv("CRM_CHANGES_MAX_WAIT", "30")),
+    "poll_interval": float(os.getenv("CRM_CHANGES_POLL_INTERVAL", "1")),
+    "settle": float(os.getenv("CRM_CHANGES_SETTLE", "60")),
+}
@@ -1,43 +1,21 @@
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
-from onbbu import ServerHttp
+if TYPE_CHECKING:
+    from pkg.crm.module import ConfigInit, Module
 
-from pkg.crm.domain.services.main import ServiceRegistry, NewService, ServicesContext
+__all__ = ["ConfigInit", "Module"]
 
-from pkg.crm.infrastructure.adapters.main import (
-    ConfigHttpAdapter,
-    NewHttpAdapter,
-)
 
-from pkg.crm.infrastructure.persistence.repositories.main import (
-    NewRepository,
-    Repository,
-)
+def __getattr__(name: str) -> Any:
+    """Import the wiring of the module on first use.
 
+    Commands, models and workers import parts of the package, and running
+    this first must not pull in every use case, adapter and DTO.
+    """
 
-@dataclass(frozen=True, slots=True)
-class ConfigInit:
-    http: ServerHttp
+    if name in __all__:
+        from pkg.crm import module
 
+        return getattr(module, name)
 
-class Module:
-    config: ConfigInit
-
-    def __init__(self, config: ConfigInit):
-
-        self.config = config
-
-    def init(self) -> ServiceRegistry:
-
-        repo: Repository = NewRepository().init()
-
-        service: ServiceRegistry = NewService(ctx=ServicesContext(Repo=repo)).init()
-
-        NewHttpAdapter(
-            ConfigHttpAdapter(
-                Http=self.config.http,
-                discountService=service.discountService,
-            )
-        )
-
-        return service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
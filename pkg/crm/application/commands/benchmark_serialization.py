@@ -0,0 +1,65 @@
+import timeit
+from decimal import Decimal
+
+from onbbu import BaseCommand, Response, register_command
+from onbbu.paginate import Paginate
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.infrastructure.adapters.responses import FastResponse
+from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
+
+
+@register_command
+class Command(BaseCommand):
+    """Command to compare the validated and trusted response encoders."""
+
+    name: str = "benchmark_serialization"
+    help: str = "Benchmark discount page serialization"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Discounts per page")
+        parser.add_argument(
+            "--repeat", type=int, default=1000, help="Pages encoded per path"
+        )
+
+    def handle(self, args):
+
+        discounts: list[DiscountEntity] = [
+            DiscountEntity(
+                id=id,
+                name=f"discount-{id}",
+                percentage=Decimal("12.50000"),
+                is_visible=id % 2 == 0,
+            )
+            for id in range(1, args.rows + 1)
+        ]
+
+        def encode(transformer: DiscountTransformer, response: type) -> bytes:
+            return response(
+                Paginate(
+                    page=1,
+                    limit=args.rows,
+                    total=args.rows,
+                    total_page=1,
+                    data=transformer.transform_many(discounts),
+                )
+            ).body
+
+        paths = {
+            "validated + Response": lambda: encode(DiscountTransformer(), Response),
+            "trusted + FastResponse": lambda: encode(
+                DiscountTransformer(trusted=True), FastResponse
+            ),
+        }
+
+        print(f"📊 {args.rows} rows per page, {args.repeat} pages per path")
+
+        baseline: float = 0.0
+
+        for label, path in paths.items():
+            seconds: float = min(timeit.repeat(path, number=args.repeat, repeat=3))
+            per_page: float = seconds / args.repeat * 1_000_000
+
+            baseline = baseline or per_page
+
+            print(f"  {label:<24} {per_page:10.1f} µs/page  x{baseline / per_page:.1f}")
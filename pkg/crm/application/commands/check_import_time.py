@@ -0,0 +1,118 @@
+import os
+import pkgutil
+import subprocess
+import sys
+import tempfile
+
+from onbbu import BaseCommand, register_command
+
+from pkg.crm.application import commands
+
+
+SERVER: str = "internal.main"
+
+# Milliseconds the server and each command module may add to the import.
+SERVER_BUDGET: float = 150.0
+COMMAND_BUDGET: float = 25.0
+
+
+def budgets(server: float, command: float) -> dict[str, float]:
+    """The budget of the server and of every command module, by module."""
+
+    found: dict[str, float] = {SERVER: server}
+
+    for module in pkgutil.iter_modules(commands.__path__):
+        found[f"{commands.__name__}.{module.name}"] = command
+
+    return found
+
+
+@register_command
+class Command(BaseCommand):
+    """Command to keep the import time of the server and the commands in budget."""
+
+    name: str = "check_import_time"
+    help: str = "Fail when importing the server or a command exceeds its budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server-budget",
+            type=float,
+            default=SERVER_BUDGET,
+            help=f"Milliseconds {SERVER} may take",
+        )
+        parser.add_argument(
+            "--command-budget",
+            type=float,
+            default=COMMAND_BUDGET,
+            help="Milliseconds each command module may take",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Runs per module, the fastest counts"
+        )
+
+    def handle(self, args):
+
+        limits: dict[str, float] = budgets(args.server_budget, args.command_budget)
+
+        width: int = max(map(len, limits))
+        failures: int = 0
+
+        for module, budget in limits.items():
+            try:
+                took: float = min(self.measure(module) for _ in range(args.repeat))
+            except RuntimeError as e:
+                failures += 1
+                print(f"  ❌ {module}: {e}")
+                continue
+
+            if took > budget:
+                failures += 1
+                print(f"  ❌ {module:<{width}} {took:8.1f} ms (budget {budget:.0f} ms)")
+            else:
+                print(f"  ✅ {module:<{width}} {took:8.1f} ms")
+
+        if failures:
+            print(f"❌ {failures} module(s) over their import time budget.")
+            sys.exit(1)
+
+        print("🎉 Every module imports within its budget.")
+
+    @staticmethod
+    def measure(module: str) -> float:
+        """Milliseconds `module` adds to a fresh interpreter that imported onbbu.
+
+        The interpreter runs from an empty directory: onbbu imports the
+        `internal/main.py` of the working directory when it is imported.
+        """
+
+        path: str = os.pathsep.join(
+            filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-X",
+                    "importtime",
+                    "-c",
+                    f"import onbbu; import {module}",
+                ],
+                cwd=directory,
+                env={**os.environ, "PYTHONPATH": path},
+                capture_output=True,
+                text=True,
+            )
+
+        if result.returncode:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+        # "import time: self [us] | cumulative | name", nested imports first.
+        for line in reversed(result.stderr.splitlines()):
+            fields: list[str] = line.split("|")
+
+            if len(fields) == 3 and fields[2].strip() == module:
+                return int(fields[1]) / 1000
+
+        raise RuntimeError("missing from the -X importtime report")
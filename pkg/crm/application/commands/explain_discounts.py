@@ -0,0 +1,171 @@
+import asyncio
+import sys
+from decimal import Decimal
+from typing import Any
+
+from onbbu import BaseCommand, register_command, database
+from tortoise.transactions import in_transaction
+
+from pkg.crm.infrastructure.persistence.models.discount_model import DiscountModel
+from pkg.crm.infrastructure.persistence.query_plan import sequential_scans
+
+
+# Filters of the checked queries, see `DiscountFilterDTO`.
+SCENARIOS: dict[str, dict] = {
+    "all by id": {},
+    "visible by percentage": {"visible": True, "sort": "percentage"},
+    "visible in range by -percentage": {
+        "visible": True,
+        "min_pct": Decimal(10),
+        "max_pct": Decimal(30),
+        "sort": "-percentage",
+    },
+    "search": {"q": "summer"},
+    "visible in range with search": {
+        "visible": True,
+        "min_pct": Decimal(10),
+        "max_pct": Decimal(30),
+        "q": "summer",
+        "sort": "-percentage",
+    },
+}
+
+# Where the second page starts, by sort field, deep enough in the seeded rows.
+CURSOR_KEYS: dict[str, Any] = {
+    "id": 1000,
+    "name": "plan-check-500",
+    "percentage": Decimal(50),
+}
+
+# Scans that are the best a dialect can do, reported without failing.
+EXPECTED_SCANS: dict[str, dict[str, str]] = {
+    "sqlite": {
+        "all by id": "rowid order, stops at the limit",
+        "search": "no trigram index on sqlite",
+    },
+    "mysql": {"search": "no trigram index on mysql"},
+}
+
+
+@register_command
+class Command(BaseCommand):
+    """Command to check the discount list queries against their indexes."""
+
+    name: str = "explain_discounts"
+    help: str = "Fail when a discount list query plans a sequential scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=0,
+            help="Synthetic rows added for the check and rolled back after it",
+        )
+        parser.add_argument("--limit", type=int, default=100, help="Page size")
+
+    def handle(self, args):
+
+        failures: int = asyncio.run(self.explain(args))
+
+        if failures:
+            print(f"❌ {failures} query plan(s) scan the whole table.")
+            sys.exit(1)
+
+        print("🎉 Every discount list query uses an index.")
+
+    async def explain(self, args) -> int:
+
+        # Imported here, every command module is imported to build the CLI.
+        from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+        from pkg.crm.domain.repositories.discount_repository_port import (
+            DiscountRepositoryPort,
+        )
+        from pkg.crm.infrastructure.persistence.repositories.main import NewRepository
+
+        await database.init()
+
+        repository: DiscountRepositoryPort = NewRepository().init().discountRepo
+        table: str = DiscountModel._meta.db_table
+
+        failures: int = 0
+
+        try:
+            async with in_transaction(repository.router.primary) as db:
+
+                dialect: str = db.capabilities.dialect
+
+                if args.rows:
+                    if dialect == "mysql":
+                        # ANALYZE TABLE commits implicitly, the rows would stay.
+                        raise ValueError("--rows is not supported on MySQL")
+
+                    await self.seed(db, args.rows)
+                    await db.execute_query(f"ANALYZE {table}")
+
+                for label, filters in SCENARIOS.items():
+                    dto: DiscountFilterDTO = DiscountFilterDTO(**filters)
+                    expected: str = EXPECTED_SCANS.get(dialect, {}).get(label, "")
+
+                    for page, plan in (
+                        (
+                            "first page",
+                            await repository.explain_all(dto, args.limit, db),
+                        ),
+                        (
+                            "next page",
+                            await repository.explain_all_after(
+                                self.next_page(dto, args.limit), dto, db
+                            ),
+                        ),
+                    ):
+                        scans: list[str] = sequential_scans(plan, dialect, table)
+
+                        if not scans:
+                            print(f"  ✅ {label}, {page}")
+                        elif expected:
+                            print(f"  ⚠️ {label}, {page} ({expected})")
+                        else:
+                            failures += 1
+                            print(f"  ❌ {label}, {page}")
+
+                            for scan in scans:
+                                print(f"      {scan}")
+
+                await db.rollback()
+
+        finally:
+            await database.close()
+
+        return failures
+
+    @staticmethod
+    def next_page(filters, limit: int):
+        """A cursor page of `filters` starting at `CURSOR_KEYS`."""
+
+        from pkg.crm.application.dtos.cursor_paginate_dto import (
+            CursorPaginateDTO,
+            DiscountCursor,
+        )
+
+        field: str = filters.sort.lstrip("-")
+        after: str = DiscountCursor(
+            sort=filters.sort, key=CURSOR_KEYS[field], id=CURSOR_KEYS["id"]
+        ).encode()
+
+        return CursorPaginateDTO(limit=limit, after=after, sort=filters.sort)
+
+    @staticmethod
+    async def seed(db, rows: int) -> None:
+
+        await DiscountModel.bulk_create(
+            [
+                DiscountModel(
+                    name=f"plan-check-{index}",
+                    percentage=Decimal(index * 37 % 10000) / 100,
+                    is_visible=index % 3 != 0,
+                )
+                for index in range(rows)
+            ],
+            batch_size=1000,
+            using_db=db,
+        )
@@ -1,7 +1,10 @@
 import asyncio
-from onbbu import BaseCommand, register_command, DatabaseManager
+from onbbu import BaseCommand, register_command, database
 
-from internal.settings import INSTALLED_APPS
+from pkg.crm.infrastructure.persistence.migrations.runner import (
+    migrate as run_migrations,
+)
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
 
 
 @register_command
@@ -14,11 +17,25 @@ class Command(BaseCommand):
     def handle(self, args):
         print("🔄 Running database migrations...")
 
-        db_manager = DatabaseManager(INSTALLED_APPS)
-
         try:
-            asyncio.run(db_manager.run())
+            asyncio.run(self.migrate())
         except KeyboardInterrupt:
             print("🚨 Interrupción detectada. Finalizando...")
         except Exception as e:
             print(f"❌ Error inesperado: {e}")
+
+    async def migrate(self):
+
+        # Creates missing tables, the migrations then alter existing ones.
+        await database.init()
+
+        try:
+            applied: list[str] = await run_migrations(DatabaseRouter().writer())
+
+        finally:
+            await database.close()
+
+        for name in applied:
+            print(f"  ✅ {name}")
+
+        print(f"🎉 {len(applied)} migration(s) applied.")
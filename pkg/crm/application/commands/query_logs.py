@@ -0,0 +1,99 @@
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from onbbu import BaseCommand, register_command
+
+from internal.settings import LOGGING
+
+from pkg.crm.infrastructure.logger.segments import parse_timestamp, read_segments
+
+
+@register_command
+class Command(BaseCommand):
+    """Command to search the crm log across its rotated segments."""
+
+    name: str = "query_logs"
+    help: str = "Print the crm log lines matching a level, time range or text"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file", default=LOGGING["file"], help="Active log file of the segments"
+        )
+        parser.add_argument(
+            "--level", default=None, help="Lowest level to print, e.g. WARNING"
+        )
+        parser.add_argument(
+            "--since", default=None, help="ISO 8601 time, UTC unless it has an offset"
+        )
+        parser.add_argument(
+            "--until", default=None, help="ISO 8601 time, UTC unless it has an offset"
+        )
+        parser.add_argument(
+            "--contains", default=None, help="Text the message must contain"
+        )
+        parser.add_argument(
+            "--limit", type=int, default=0, help="Stop after this many lines"
+        )
+
+    def handle(self, args):
+
+        try:
+            since: Optional[datetime] = (
+                parse_timestamp(args.since) if args.since else None
+            )
+            until: Optional[datetime] = (
+                parse_timestamp(args.until) if args.until else None
+            )
+        except ValueError as e:
+            print(f"❌ Invalid time: {e}")
+            sys.exit(1)
+
+        level: int = logging.getLevelName(args.level.upper()) if args.level else 0
+
+        if not isinstance(level, int):
+            print(f"❌ Unknown level: {args.level}")
+            sys.exit(1)
+
+        printed: int = 0
+
+        for line in read_segments(Path(args.file), since):
+
+            # Cheap substring test before paying for the JSON parse.
+            if args.contains and args.contains not in line:
+                continue
+
+            try:
+                entry: dict = json.loads(line)
+                stamp: datetime = parse_timestamp(entry["timestamp"])
+            except (ValueError, KeyError, TypeError):
+                continue
+
+            if until and stamp > until:
+                break
+
+            if since and stamp < since:
+                continue
+
+            if level and self.rank(entry.get("level")) < level:
+                continue
+
+            if args.contains and args.contains not in str(entry.get("message", "")):
+                continue
+
+            sys.stdout.write(line if line.endswith("\n") else line + "\n")
+
+            printed += 1
+
+            if printed == args.limit:
+                break
+
+    @staticmethod
+    def rank(name: Optional[str]) -> int:
+
+        level = logging.getLevelName(str(name).upper())
+
+        return level if isinstance(level, int) else 0
@@ -0,0 +1,25 @@
+from enum import Enum
+from typing import Optional
+
+from pydantic.dataclasses import dataclass
+
+from pkg.crm.application.dtos.discount_output_dto import DiscountOutputDTO
+
+
+class MalformedBatchError(ValueError):
+    """The batch body stopped being valid JSON partway through."""
+
+
+class BatchOperation(Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+@dataclass(frozen=True, slots=True)
+class BatchItemResultDTO:
+    index: int
+    op: Optional[str]
+    status: str
+    data: Optional[DiscountOutputDTO] = None
+    error: Optional[str] = None
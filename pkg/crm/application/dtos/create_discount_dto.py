@@ -1,9 +1,30 @@
 from decimal import Decimal
+from enum import Enum
 
 from pydantic import Field
 from pydantic.dataclasses import dataclass
 
 
+class ConflictMode(Enum):
+    """What creating a discount whose name is taken does."""
+
+    FAIL = "fail"
+    IGNORE = "ignore"
+    UPDATE = "update"
+
+
+class DuplicateDiscountError(ValueError):
+    """A discount with that name already exists."""
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """The Idempotency-Key was already used for a different request."""
+
+
+class IdempotencyKeyTakenError(ValueError):
+    """A concurrent request committed under the same Idempotency-Key first."""
+
+
 @dataclass(frozen=True, slots=True)
 class CreateDiscountDTO:
     name: str = Field(alias="name", min_length=3)
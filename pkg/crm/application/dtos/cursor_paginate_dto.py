@@ -0,0 +1,70 @@
+import base64
+import json
+from decimal import Decimal
+from typing import Any, Generic, Optional
+
+from pydantic import field_validator
+from pydantic.dataclasses import dataclass
+
+from onbbu.types import T
+
+
+SORT_KEYS: tuple[str, ...] = ("id", "name", "percentage")
+
+
+@dataclass(frozen=True, slots=True)
+class DiscountCursor:
+    """Position of the last row returned, encoded as an opaque token."""
+
+    sort: str
+    key: Any
+    id: int
+
+    def encode(self) -> str:
+        key = str(self.key) if isinstance(self.key, Decimal) else self.key
+
+        raw: bytes = json.dumps([self.sort, key, self.id]).encode()
+
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @staticmethod
+    def decode(token: str) -> "DiscountCursor":
+        try:
+            padded: str = token + "=" * (-len(token) % 4)
+
+            sort, key, id = json.loads(base64.urlsafe_b64decode(padded))
+
+            if sort.lstrip("-") == "percentage":
+                key = Decimal(key)
+
+            return DiscountCursor(sort=sort, key=key, id=id)
+
+        except (ArithmeticError, AttributeError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+
+
+@dataclass(frozen=True, slots=True)
+class CursorPaginateDTO:
+    limit: int
+    after: Optional[str] = None
+    sort: str = "id"
+
+    @field_validator("limit")
+    def validate_limit(cls, v: int):
+        if v <= 0:
+            raise ValueError("Limit must be a positive integer")
+        return v
+
+    @field_validator("sort")
+    def validate_sort(cls, v: str):
+        if v.lstrip("-") not in SORT_KEYS:
+            raise ValueError(f"Sort must be one of {', '.join(SORT_KEYS)}")
+        return v
+
+
+@dataclass(frozen=True, slots=True)
+class CursorPaginate(Generic[T]):
+    limit: int
+    total: int
+    next_cursor: Optional[str]
+    data: T
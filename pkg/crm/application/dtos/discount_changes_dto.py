@@ -0,0 +1,60 @@
+from typing import List, Optional
+
+from pydantic import field_validator
+from pydantic.dataclasses import dataclass
+
+from pkg.crm.application.dtos.discount_output_dto import DiscountOutputDTO
+
+
+MAX_CHANGES: int = 5000
+
+
+class ChangesExpiredError(ValueError):
+    """The changes after the requested sequence were pruned from the feed."""
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeFeedSettings:
+    max_wait: float = 30.0
+    poll_interval: float = 1.0
+    settle: float = 60.0
+
+
+@dataclass(frozen=True, slots=True)
+class DiscountChangesDTO:
+    since: Optional[int] = None
+    limit: int = 500
+    wait: float = 0.0
+
+    @field_validator("since")
+    def validate_since(cls, v: Optional[int]):
+        if v is not None and v < 0:
+            raise ValueError("Since must be a sequence number, 0 or more")
+        return v
+
+    @field_validator("limit")
+    def validate_limit(cls, v: int):
+        if not 0 < v <= MAX_CHANGES:
+            raise ValueError(f"Limit must be between 1 and {MAX_CHANGES}")
+        return v
+
+    @field_validator("wait")
+    def validate_wait(cls, v: float):
+        if v < 0:
+            raise ValueError("Wait must be a number of seconds, 0 or more")
+        return v
+
+
+@dataclass(frozen=True, slots=True)
+class DiscountChangeDTO:
+    seq: int
+    type: str
+    id: int
+    data: Optional[DiscountOutputDTO | dict] = None
+
+
+@dataclass(frozen=True, slots=True)
+class DiscountChangesPage:
+    changes: List[DiscountChangeDTO]
+    next: int
+    more: bool = False
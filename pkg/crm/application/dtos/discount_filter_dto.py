@@ -0,0 +1,36 @@
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import Field, field_validator, model_validator
+from pydantic.dataclasses import dataclass
+
+from pkg.crm.application.dtos.cursor_paginate_dto import SORT_KEYS
+
+
+@dataclass(frozen=True, slots=True)
+class DiscountFilterDTO:
+    visible: Optional[bool] = None
+    min_pct: Optional[Decimal] = Field(default=None, ge=0, le=100)
+    max_pct: Optional[Decimal] = Field(default=None, ge=0, le=100)
+    q: Optional[str] = Field(default=None, min_length=1, max_length=45)
+    sort: str = "id"
+
+    @field_validator("sort")
+    def validate_sort(cls, v: str):
+        if v.lstrip("-") not in SORT_KEYS:
+            raise ValueError(f"Sort must be one of {', '.join(SORT_KEYS)}")
+        return v
+
+    @model_validator(mode="after")
+    def validate_range(self):
+        if (
+            self.min_pct is not None
+            and self.max_pct is not None
+            and self.min_pct > self.max_pct
+        ):
+            raise ValueError("min_pct must not be greater than max_pct")
+        return self
+
+    def key(self) -> tuple:
+        """Identifies the filtered set, sort excluded."""
+        return (self.visible, self.min_pct, self.max_pct, self.q)
@@ -1,5 +1,3 @@
-from decimal import Decimal
-
 from pydantic.dataclasses import dataclass
 from pydantic import Field
 
@@ -8,5 +6,5 @@ from pydantic import Field
 class DiscountOutputDTO:
     id: int = Field(alias="id", gt=0)
     name: str = Field(alias="name", min_length=3)
-    percentage: Decimal = Field(alias="percentage", ge=0, le=100)
+    percentage: float = Field(alias="percentage", ge=0, le=100)
     is_visible: bool = Field(alias="is_visible", default=True)
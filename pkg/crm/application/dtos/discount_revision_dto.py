@@ -0,0 +1,11 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic.dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class DiscountRevisionDTO:
+    id: int
+    version: int
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+UNKNOWN_TOTAL: int = -1
+
+
+class CountStrategy(Enum):
+    """How the total of a paginated listing is computed, `NONE` reports `UNKNOWN_TOTAL`."""
+
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATE = "estimate"
+    NONE = "none"
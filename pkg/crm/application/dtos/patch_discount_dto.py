@@ -0,0 +1,35 @@
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import Field, model_validator
+from pydantic.dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class PatchDiscountDTO:
+    id: int = Field(alias="id", gt=0)
+    name: Optional[str] = Field(alias="name", default=None, min_length=3)
+    percentage: Optional[Decimal] = Field(
+        alias="percentage", default=None, ge=0, le=100
+    )
+    is_visible: Optional[bool] = Field(alias="is_visible", default=None)
+    version: Optional[int] = Field(alias="version", default=None, gt=0)
+
+    @model_validator(mode="after")
+    def validate_changes(self):
+        if not self.changes():
+            raise ValueError("Give at least one of name, percentage or is_visible")
+        return self
+
+    def changes(self) -> dict:
+        """The fields the request sets, the only columns to write."""
+
+        return {
+            field: value
+            for field, value in (
+                ("name", self.name),
+                ("percentage", self.percentage),
+                ("is_visible", self.is_visible),
+            )
+            if value is not None
+        }
@@ -1,12 +1,29 @@
 from decimal import Decimal
+from typing import Optional
 
 from pydantic import Field
 from pydantic.dataclasses import dataclass
 
 
+class VersionConflictError(ValueError):
+    """The discount changed since the version a write was based on."""
+
+
+class DiscountNotFoundError(ValueError):
+    """No discount has the id a write names."""
+
+
 @dataclass(frozen=True, slots=True)
 class UpdateDiscountDTO:
     id: int = Field(alias="id", gt=0)
     name: str = Field(alias="name", min_length=3)
     percentage: Decimal = Field(alias="percentage", ge=0, le=100)
     is_visible: bool = Field(alias="is_visible", default=True)
+    version: Optional[int] = Field(alias="version", default=None, gt=0)
+
+    def changes(self) -> dict:
+        return {
+            "name": self.name,
+            "percentage": self.percentage,
+            "is_visible": self.is_visible,
+        }
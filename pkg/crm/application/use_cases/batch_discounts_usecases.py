@@ -0,0 +1,172 @@
+from typing import Any, AsyncIterator, List, Optional
+
+from tortoise.exceptions import IntegrityError
+
+from pkg.crm.application.dtos.batch_discount_dto import (
+    BatchItemResultDTO,
+    BatchOperation,
+    MalformedBatchError,
+)
+from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.application.dtos.delete_discount_dto import DeleteDiscountDTO
+from pkg.crm.application.dtos.update_discount_dto import UpdateDiscountDTO
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
+from pkg.crm.infrastructure.profiling.timings import phase
+from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
+
+
+STATUS: dict[BatchOperation, str] = {
+    BatchOperation.CREATE: "created",
+    BatchOperation.UPDATE: "updated",
+    BatchOperation.DELETE: "deleted",
+}
+
+
+class BatchDiscounts:
+    transformer: DiscountTransformer
+    repository: DiscountRepositoryPort
+    cache: DiscountCache
+    chunk_size: int
+
+    def __init__(
+        self,
+        repository: DiscountRepositoryPort,
+        cache: DiscountCache,
+        chunk_size: int = 500,
+    ):
+        self.transformer = DiscountTransformer()
+        self.repository = repository
+        self.cache = cache
+        self.chunk_size = chunk_size
+
+    async def execute(self, items: AsyncIterator[Any]) -> List[BatchItemResultDTO]:
+
+        results: List[BatchItemResultDTO] = []
+        chunk: list[tuple[int, BatchOperation, Any]] = []
+        index: int = 0
+
+        try:
+            async for item in items:
+                try:
+                    with phase("validate"):
+                        op, value = self._parse(item)
+
+                    chunk.append((index, op, value))
+
+                except (TypeError, ValueError) as e:
+                    op_name = item.get("op") if isinstance(item, dict) else None
+
+                    results.append(
+                        BatchItemResultDTO(
+                            index=index,
+                            op=op_name if isinstance(op_name, str) else None,
+                            status="error",
+                            error=str(e),
+                        )
+                    )
+
+                index += 1
+
+                if len(chunk) >= self.chunk_size:
+                    with phase("service"):
+                        results.extend(await self._write(chunk))
+
+                    chunk = []
+
+        # Earlier chunks are committed by now, so the items before the bad
+        # spot are written as if the body ended there and the rest is reported
+        # as one failed item.
+        except MalformedBatchError as e:
+            results.append(
+                BatchItemResultDTO(index=index, op=None, status="error", error=str(e))
+            )
+
+        if chunk:
+            with phase("service"):
+                results.extend(await self._write(chunk))
+
+        return sorted(results, key=lambda result: result.index)
+
+    @staticmethod
+    def _parse(item: Any) -> tuple[BatchOperation, Any]:
+
+        if not isinstance(item, dict):
+            raise ValueError("Each item must be a JSON object.")
+
+        data: dict = dict(item)
+
+        op: BatchOperation = BatchOperation(
+            data.pop("op", "update" if "id" in data else "create")
+        )
+
+        if op is BatchOperation.CREATE:
+            return op, CreateDiscountDTO(**data)
+
+        if op is BatchOperation.UPDATE:
+            return op, UpdateDiscountDTO(**data)
+
+        return op, DeleteDiscountDTO(**data).id
+
+    async def _write(
+        self, chunk: list[tuple[int, BatchOperation, Any]]
+    ) -> List[BatchItemResultDTO]:
+
+        try:
+            discounts: list[Optional[DiscountEntity]] = (
+                await self.repository.write_batch(
+                    [(op, value) for _, op, value in chunk]
+                )
+            )
+
+        except IntegrityError as e:
+            if len(chunk) == 1:
+                index, op, _ = chunk[0]
+                return [
+                    BatchItemResultDTO(
+                        index=index, op=op.value, status="error", error=str(e)
+                    )
+                ]
+
+            # One conflicting row aborts the whole chunk, retry item by item
+            # so only that row is reported as failed.
+            results: List[BatchItemResultDTO] = []
+
+            for entry in chunk:
+                results.extend(await self._write([entry]))
+
+            return results
+
+        results = []
+
+        for (index, op, value), discount in zip(chunk, discounts):
+
+            if discount is None:
+                results.append(
+                    BatchItemResultDTO(
+                        index=index,
+                        op=op.value,
+                        status="error",
+                        error=(
+                            "The discount does not exist or is past that version."
+                            if getattr(value, "version", None) is not None
+                            else "The discount does not exist."
+                        ),
+                    )
+                )
+                continue
+
+            await self.cache.invalidate(discount, deleted=op is BatchOperation.DELETE)
+
+            results.append(
+                BatchItemResultDTO(
+                    index=index,
+                    op=op.value,
+                    status=STATUS[op],
+                    data=self.transformer.transform_discount_to_output(discount),
+                )
+            )
+
+        return results
@@ -1,27 +1,113 @@
-from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+import hashlib
+from typing import Optional
+
+from pydantic_core import to_json
+from tortoise.exceptions import IntegrityError
+
+from pkg.crm.application.dtos.create_discount_dto import (
+    ConflictMode,
+    CreateDiscountDTO,
+    DuplicateDiscountError,
+    IdempotencyKeyReusedError,
+    IdempotencyKeyTakenError,
+)
 from pkg.crm.application.dtos.discount_output_dto import DiscountOutputDTO
 
 from pkg.crm.domain.entities.discount_entity import DiscountEntity
-from pkg.crm.infrastructure.logger.discount_logger import DiscountLogger
-from pkg.crm.infrastructure.persistence.repositories.discount_repository import DiscountRepository
+from pkg.crm.domain.entities.idempotency_key_entity import IdempotencyKeyEntity
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
+from pkg.crm.infrastructure.persistence.repositories.idempotency_key_repository import (
+    IdempotencyKeyRepository,
+)
 from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
 
 
 class CreateDiscount:
     transformer: DiscountTransformer
-    repository: DiscountRepository
+    repository: DiscountRepositoryPort
+    keys: IdempotencyKeyRepository
+    cache: DiscountCache
+    on_conflict: ConflictMode
 
-    def __init__(self, repository: DiscountRepository):
+    def __init__(
+        self,
+        repository: DiscountRepositoryPort,
+        keys: IdempotencyKeyRepository,
+        cache: DiscountCache,
+        on_conflict: ConflictMode = ConflictMode.FAIL,
+    ):
         self.transformer = DiscountTransformer()
         self.repository = repository
+        self.keys = keys
+        self.cache = cache
+        self.on_conflict = on_conflict
+
+    async def execute(
+        self,
+        dto: CreateDiscountDTO,
+        on_conflict: Optional[ConflictMode] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> DiscountOutputDTO:
+        """Create a discount, the unique name settling races with other creates.
+
+        A request with an `idempotency_key` already answered is replayed with
+        the discount it got then, without writing again.
+        """
+
+        on_conflict = on_conflict or self.on_conflict
+        fingerprint: str = ""
+
+        if idempotency_key is not None:
+            fingerprint = self.fingerprint(dto, on_conflict)
+
+            replayed: Optional[DiscountEntity] = await self._replay(
+                idempotency_key, fingerprint
+            )
+
+            if replayed:
+                return self.transformer.transform_discount_to_output(replayed)
+
+        try:
+            discount: DiscountEntity = await self.repository.create(
+                dto, on_conflict, idempotency_key, fingerprint
+            )
 
-    async def execute(self, dto: CreateDiscountDTO) -> DiscountOutputDTO:
+        except IdempotencyKeyTakenError:
+            replayed = await self._replay(idempotency_key, fingerprint)
 
-        if self.repository.get_by_name(dto):
-            raise ValueError("There is already a discount with this name.")
+            if not replayed:
+                raise
 
-        discount: DiscountEntity = await self.repository.create(dto)
+            return self.transformer.transform_discount_to_output(replayed)
 
-        DiscountLogger.log_creation(discount)
+        except IntegrityError as e:
+            raise DuplicateDiscountError(
+                "There is already a discount with this name."
+            ) from e
+
+        await self.cache.invalidate(discount)
 
         return self.transformer.transform_discount_to_output(discount)
+
+    @staticmethod
+    def fingerprint(dto: CreateDiscountDTO, on_conflict: ConflictMode) -> str:
+        """Digest of what a request asks for, to tell a retry from a new request."""
+
+        return hashlib.blake2b(
+            to_json([dto, on_conflict.value]), digest_size=16
+        ).hexdigest()
+
+    async def _replay(self, key: str, fingerprint: str) -> Optional[DiscountEntity]:
+
+        stored: Optional[IdempotencyKeyEntity] = await self.keys.get(key)
+
+        if not stored:
+            return None
+
+        if stored.fingerprint != fingerprint:
+            raise IdempotencyKeyReusedError(
+                "The Idempotency-Key was already used for a different request."
+            )
+
+        return DiscountEntity(**stored.discount)
@@ -1,19 +1,19 @@
 from pkg.crm.application.dtos.delete_discount_dto import DeleteDiscountDTO
 from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
 from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
-from pkg.crm.infrastructure.logger.discount_logger import DiscountLogger
-from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
-    DiscountRepository,
-)
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
 
 
 class DeleteDiscount:
     transformer: DiscountTransformer
-    repository: DiscountRepository
+    repository: DiscountRepositoryPort
+    cache: DiscountCache
 
-    def __init__(self, repository: DiscountRepository):
+    def __init__(self, repository: DiscountRepositoryPort, cache: DiscountCache):
         self.transformer = DiscountTransformer()
         self.repository = repository
+        self.cache = cache
 
 
     async def execute(self, dto: DeleteDiscountDTO) -> None:
@@ -23,4 +23,4 @@ class DeleteDiscount:
         if not discount:
             raise ValueError("The discount does not exist.")
 
-        DiscountLogger.log_deletion(discount)
+        await self.cache.invalidate(discount, deleted=True)
@@ -0,0 +1,59 @@
+import csv
+import io
+from typing import AsyncIterator
+
+from pydantic_core import to_json
+
+from pkg.crm.application.dtos.export_discount_dto import ExportFormat
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
+
+from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
+
+
+class ExportDiscounts:
+    repository: DiscountRepositoryPort
+    chunk_size: int
+
+    def __init__(self, repository: DiscountRepositoryPort, chunk_size: int = 1000):
+        self.repository = repository
+        self.chunk_size = chunk_size
+
+    async def execute(self, format: ExportFormat) -> AsyncIterator[bytes]:
+        """Encode the whole catalog one keyset chunk at a time."""
+
+        if format is ExportFormat.CSV:
+            yield b"id,name,percentage,is_visible\r\n"
+
+        async for discounts in self.repository.iter_all(self.chunk_size):
+
+            if format is ExportFormat.CSV:
+                yield self._encode_csv(discounts)
+            else:
+                yield self._encode_ndjson(discounts)
+
+    @staticmethod
+    def _encode_ndjson(discounts: list[DiscountEntity]) -> bytes:
+        return b"".join(
+            to_json(DiscountTransformer.transform_discount_to_trusted_output(discount))
+            + b"\n"
+            for discount in discounts
+        )
+
+    @staticmethod
+    def _encode_csv(discounts: list[DiscountEntity]) -> bytes:
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerows(
+            (
+                discount.id,
+                discount.name,
+                float(discount.percentage),
+                "true" if discount.is_visible else "false",
+            )
+            for discount in discounts
+        )
+
+        return buffer.getvalue().encode()
@@ -1,31 +1,45 @@
-from typing import List
+from typing import List, Optional
 from onbbu.paginate import Paginate, PaginateDTO
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
 from pkg.crm.application.dtos.discount_output_dto import DiscountOutputDTO
+from pkg.crm.application.dtos.paginate_count_dto import CountStrategy, UNKNOWN_TOTAL
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
 from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
 
-from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
-    DiscountRepository,
-)
-
 
 class GetAllDiscounts:
     transformer: DiscountTransformer
-    repository: DiscountRepository
+    repository: DiscountRepositoryPort
 
-    def __init__(self, repository: DiscountRepository):
-        self.transformer = DiscountTransformer()
+    def __init__(self, repository: DiscountRepositoryPort, trusted: bool = False):
+        self.transformer = DiscountTransformer(trusted=trusted)
         self.repository = repository
 
-    async def execute(self, dto: PaginateDTO) -> Paginate[DiscountOutputDTO]:
+    async def execute(
+        self,
+        dto: PaginateDTO,
+        count: CountStrategy = CountStrategy.EXACT,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> Paginate[DiscountOutputDTO]:
+
+        discounts, total = await self.repository.get_all(
+            dto, count=count, filters=filters
+        )
 
-        discounts, total = await self.repository.get_all(dto)
+        data = self.transformer.transform_many(discounts)
 
-        data: List[DiscountOutputDTO] = self.transformer.transform_discounts_to_outputs(
-            discounts
+        total_page: int = (
+            UNKNOWN_TOTAL
+            if total == UNKNOWN_TOTAL
+            else Paginate.calculate_total_pages(total, dto.limit)
         )
 
         paginate: Paginate[List[DiscountOutputDTO]] = Paginate(
-            page=dto.page, limit=dto.limit, total=total, data=data, total_page=0
+            page=dto.page,
+            limit=dto.limit,
+            total=total,
+            data=data,
+            total_page=total_page,
         )
 
         return paginate
@@ -0,0 +1,99 @@
+import time
+
+from pkg.crm.application.dtos.discount_changes_dto import (
+    ChangeFeedSettings,
+    ChangesExpiredError,
+    DiscountChangeDTO,
+    DiscountChangesDTO,
+    DiscountChangesPage,
+)
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.entities.discount_event_entity import (
+    DiscountEventEntity,
+    DiscountEventType,
+)
+from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
+
+from pkg.crm.infrastructure.persistence.repositories.discount_event_repository import (
+    DiscountEventRepository,
+)
+
+
+class GetDiscountChanges:
+    """Discount changes after a sequence number, the latest per discount.
+
+    A client first calls without `since` to get the current sequence, then
+    downloads the list, then follows the feed from that sequence with the
+    `next` of every page. With `wait` an empty page is held back until a
+    change arrives or the wait is over.
+    """
+
+    transformer: DiscountTransformer
+    repository: DiscountEventRepository
+    settings: ChangeFeedSettings
+
+    def __init__(
+        self,
+        repository: DiscountEventRepository,
+        settings: ChangeFeedSettings = ChangeFeedSettings(),
+        trusted: bool = False,
+    ):
+        self.transformer = DiscountTransformer(trusted=trusted)
+        self.repository = repository
+        self.settings = settings
+
+    async def execute(self, dto: DiscountChangesDTO) -> DiscountChangesPage:
+
+        if dto.since is None:
+            return DiscountChangesPage(
+                changes=[], next=await self.repository.latest_id() or 0
+            )
+
+        if dto.since < await self.repository.pruned_through():
+            raise ChangesExpiredError(
+                "The changes after this sequence were pruned, sync from the list."
+            )
+
+        deadline: float = time.monotonic() + min(dto.wait, self.settings.max_wait)
+
+        while True:
+            events: list[DiscountEventEntity] = await self.repository.changes_after(
+                dto.since, dto.limit, self.settings.settle
+            )
+
+            remaining: float = deadline - time.monotonic()
+
+            if events or remaining <= 0:
+                break
+
+            # Writes of other workers only show up on the next read.
+            await self.repository.wait_for_commit(
+                min(remaining, self.settings.poll_interval)
+            )
+
+        latest: dict[int, DiscountEventEntity] = {}
+
+        for event in events:
+            latest.pop(event.discount_id, None)
+            latest[event.discount_id] = event
+
+        return DiscountChangesPage(
+            changes=[self._change(event) for event in latest.values()],
+            next=events[-1].id if events else dto.since,
+            more=len(events) == dto.limit,
+        )
+
+    def _change(self, event: DiscountEventEntity) -> DiscountChangeDTO:
+
+        if event.type is DiscountEventType.DELETED:
+            return DiscountChangeDTO(
+                seq=event.id, type=event.type.value, id=event.discount_id
+            )
+
+        return DiscountChangeDTO(
+            seq=event.id,
+            type=event.type.value,
+            id=event.discount_id,
+            data=self.transformer.transform(DiscountEntity(**event.payload)),
+        )
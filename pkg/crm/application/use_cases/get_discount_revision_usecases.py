@@ -0,0 +1,36 @@
+from typing import Optional
+
+from pkg.crm.application.dtos.discount_revision_dto import DiscountRevisionDTO
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
+
+
+class GetDiscountRevision:
+    """Version of a discount, from the cache unless `latest` is asked for.
+
+    A precondition checked against a cached or replica copy can fail on a
+    write the client already saw, `latest` reads the primary instead.
+    """
+
+    cache: DiscountCache
+    repository: DiscountRepositoryPort
+
+    def __init__(self, cache: DiscountCache, repository: DiscountRepositoryPort):
+        self.cache = cache
+        self.repository = repository
+
+    async def execute(self, id: int, latest: bool = False) -> DiscountRevisionDTO:
+
+        instance: Optional[DiscountEntity] = (
+            await self.repository.get_latest(id)
+            if latest
+            else await self.cache.get_by_id(id=id)
+        )
+
+        if not instance:
+            raise ValueError("The discount does not exist.")
+
+        return DiscountRevisionDTO(
+            id=instance.id, version=instance.version, updated_at=instance.updated_at
+        )
@@ -1,26 +1,23 @@
 from typing import Optional
 from pkg.crm.application.dtos.discount_output_dto import DiscountOutputDTO
 from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
 from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
 
-from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
-    DiscountRepository,
-)
-
 
 class GetDiscount:
     transformer: DiscountTransformer
-    repository: DiscountRepository
+    cache: DiscountCache
 
-    def __init__(self, repository: DiscountRepository):
-        self.transformer = DiscountTransformer()
-        self.repository = repository
+    def __init__(self, cache: DiscountCache, trusted: bool = False):
+        self.transformer = DiscountTransformer(trusted=trusted)
+        self.cache = cache
 
     async def execute(self, id: int) -> Optional[DiscountOutputDTO]:
 
-        instance: Optional[DiscountEntity] = await self.repository.get_by_id(id=id)
+        instance: Optional[DiscountEntity] = await self.cache.get_by_id(id=id)
 
         if not instance:
             raise ValueError("The discount does not exist.")
 
-        return self.transformer.transform_discount_to_output(instance)
+        return self.transformer.transform(instance)
@@ -0,0 +1,36 @@
+from typing import List, Optional
+from pkg.crm.application.dtos.cursor_paginate_dto import (
+    CursorPaginate,
+    CursorPaginateDTO,
+)
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+from pkg.crm.application.dtos.discount_output_dto import DiscountOutputDTO
+from pkg.crm.application.dtos.paginate_count_dto import CountStrategy
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
+from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
+
+
+class GetDiscountsAfter:
+    transformer: DiscountTransformer
+    repository: DiscountRepositoryPort
+
+    def __init__(self, repository: DiscountRepositoryPort, trusted: bool = False):
+        self.transformer = DiscountTransformer(trusted=trusted)
+        self.repository = repository
+
+    async def execute(
+        self,
+        dto: CursorPaginateDTO,
+        count: CountStrategy = CountStrategy.NONE,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> CursorPaginate[List[DiscountOutputDTO]]:
+
+        discounts, next_cursor = await self.repository.get_all_after(dto, filters)
+
+        total: int = await self.repository.get_total_count(count, filters)
+
+        data = self.transformer.transform_many(discounts)
+
+        return CursorPaginate(
+            limit=dto.limit, total=total, next_cursor=next_cursor, data=data
+        )
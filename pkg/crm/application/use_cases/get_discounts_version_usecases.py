@@ -0,0 +1,11 @@
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
+
+
+class GetDiscountsVersion:
+    cache: DiscountCache
+
+    def __init__(self, cache: DiscountCache):
+        self.cache = cache
+
+    async def execute(self) -> str:
+        return await self.cache.collection_version()
@@ -1,33 +1,65 @@
 from typing import Optional
 
+from tortoise.exceptions import IntegrityError
+
 from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
 
-from pkg.crm.application.dtos.update_discount_dto import UpdateDiscountDTO
+from pkg.crm.application.dtos.create_discount_dto import DuplicateDiscountError
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
+from pkg.crm.application.dtos.update_discount_dto import (
+    DiscountNotFoundError,
+    UpdateDiscountDTO,
+    VersionConflictError,
+)
 from pkg.crm.application.dtos.discount_output_dto import DiscountOutputDTO
+from pkg.crm.application.dtos.discount_revision_dto import DiscountRevisionDTO
 
-from pkg.crm.infrastructure.logger.discount_logger import DiscountLogger
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
 from pkg.crm.infrastructure.transformers.discount_transformer import DiscountTransformer
 
-from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
-    DiscountRepository,
-)
-
 
 class UpdateDiscount:
+    """Write a discount, at `dto.version` when it names one.
+
+    The row is only read again when the write matched none, to tell a
+    missing discount from one past that version. The revision returned is
+    the one the write produced.
+    """
+
     transformer: DiscountTransformer
-    repository: DiscountRepository
+    repository: DiscountRepositoryPort
+    cache: DiscountCache
 
-    def __init__(self, repository: DiscountRepository):
+    def __init__(self, repository: DiscountRepositoryPort, cache: DiscountCache):
         self.transformer = DiscountTransformer()
         self.repository = repository
+        self.cache = cache
+
+    async def execute(
+        self, dto: UpdateDiscountDTO | PatchDiscountDTO
+    ) -> tuple[DiscountOutputDTO, DiscountRevisionDTO]:
 
-    async def execute(self, dto: UpdateDiscountDTO) -> DiscountOutputDTO:
+        try:
+            discount: Optional[DiscountEntity] = await self.repository.update_by_id(dto)
 
-        discount: Optional[DiscountEntity] = await self.repository.update_by_id(dto)
+        except IntegrityError as e:
+            raise DuplicateDiscountError(
+                "There is already a discount with this name."
+            ) from e
 
         if not discount:
-            raise ValueError("The discount does not exist.")
+            if dto.version is not None and await self.repository.exist_by_id(dto.id):
+                raise VersionConflictError(
+                    f"The discount was changed since version {dto.version}."
+                )
+
+            raise DiscountNotFoundError("The discount does not exist.")
+
+        await self.cache.invalidate(discount)
 
-        DiscountLogger.log_update(discount)
+        revision: DiscountRevisionDTO = DiscountRevisionDTO(
+            id=discount.id, version=discount.version, updated_at=discount.updated_at
+        )
 
-        return self.transformer.transform_discount_to_output(discount)
+        return self.transformer.transform_discount_to_output(discount), revision
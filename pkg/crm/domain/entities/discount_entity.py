@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
 
 
 @dataclass(frozen=True, slots=True)
@@ -6,4 +8,6 @@ class DiscountEntity:
     id: int
     name: str
     percentage: float
-    is_visible: bool
\ No newline at end of file
+    is_visible: bool
+    version: int = 1
+    updated_at: Optional[datetime] = None
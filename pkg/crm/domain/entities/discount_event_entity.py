@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+
+class DiscountEventType(str, Enum):
+    CREATED = "discount.created"
+    UPDATED = "discount.updated"
+    DELETED = "discount.deleted"
+
+
+@dataclass(frozen=True, slots=True)
+class DiscountEventEntity:
+    id: int
+    type: DiscountEventType
+    discount_id: int
+    payload: dict
+    created_at: Optional[datetime] = None
+    attempts: int = 0
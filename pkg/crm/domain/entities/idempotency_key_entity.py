@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(frozen=True, slots=True)
+class IdempotencyKeyEntity:
+    key: str
+    fingerprint: str
+    discount: Optional[dict] = None
+    created_at: Optional[datetime] = None
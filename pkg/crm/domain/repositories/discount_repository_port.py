@@ -0,0 +1,91 @@
+from typing import Any, AsyncIterator, Optional, Protocol, runtime_checkable
+
+from onbbu.paginate import PaginateDTO
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.application.dtos.batch_discount_dto import BatchOperation
+from pkg.crm.application.dtos.create_discount_dto import (
+    ConflictMode,
+    CreateDiscountDTO,
+)
+from pkg.crm.application.dtos.cursor_paginate_dto import CursorPaginateDTO
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+from pkg.crm.application.dtos.paginate_count_dto import CountStrategy
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
+from pkg.crm.application.dtos.update_discount_dto import UpdateDiscountDTO
+
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
+
+
+@runtime_checkable
+class DiscountRepositoryPort(Protocol):
+    """The discount reads and writes the use cases and the cache rely on.
+
+    Served by `DiscountRepository` from the database and by
+    `InMemoryDiscountRepository` from memory.
+    """
+
+    router: DatabaseRouter
+
+    async def get_all(
+        self,
+        dto: PaginateDTO,
+        count: CountStrategy = CountStrategy.EXACT,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> tuple[list[DiscountEntity], int]: ...
+
+    async def get_all_after(
+        self, dto: CursorPaginateDTO, filters: Optional[DiscountFilterDTO] = None
+    ) -> tuple[list[DiscountEntity], Optional[str]]: ...
+
+    def iter_all(
+        self, chunk_size: int = 1000
+    ) -> AsyncIterator[list[DiscountEntity]]: ...
+
+    async def get_total_count(
+        self,
+        count: CountStrategy = CountStrategy.EXACT,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> int: ...
+
+    def invalidate_total_count(self) -> None: ...
+
+    async def explain_all(
+        self, filters: DiscountFilterDTO, limit: int = 100, db: Any = None
+    ) -> Any: ...
+
+    async def explain_all_after(
+        self, dto: CursorPaginateDTO, filters: DiscountFilterDTO, db: Any = None
+    ) -> Any: ...
+
+    async def exist_by_id(self, id: int) -> bool: ...
+
+    async def exist_by_name(self, name: str) -> bool: ...
+
+    async def get_by_id(self, id: int) -> Optional[DiscountEntity]: ...
+
+    async def get_latest(self, id: int) -> Optional[DiscountEntity]: ...
+
+    async def get_visible(self, limit: int) -> list[DiscountEntity]: ...
+
+    async def warm_up(self) -> None: ...
+
+    async def get_by_name(self, name: str) -> Optional[DiscountEntity]: ...
+
+    async def create(
+        self,
+        dto: CreateDiscountDTO,
+        on_conflict: ConflictMode = ConflictMode.FAIL,
+        idempotency_key: Optional[str] = None,
+        fingerprint: str = "",
+    ) -> DiscountEntity: ...
+
+    async def update_by_id(
+        self, dto: UpdateDiscountDTO | PatchDiscountDTO
+    ) -> Optional[DiscountEntity]: ...
+
+    async def delete_by_id(self, id: int) -> Optional[DiscountEntity]: ...
+
+    async def write_batch(
+        self, operations: list[tuple[BatchOperation, Any]]
+    ) -> list[Optional[DiscountEntity]]: ...
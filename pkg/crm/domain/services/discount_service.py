@@ -1,41 +1,134 @@
+from typing import Any, AsyncIterator, List, Optional
+
 from onbbu.paginate import Paginate, PaginateDTO
 
-from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.application.dtos.batch_discount_dto import BatchItemResultDTO
+from pkg.crm.application.dtos.cursor_paginate_dto import (
+    CursorPaginate,
+    CursorPaginateDTO,
+)
+from pkg.crm.application.dtos.create_discount_dto import (
+    ConflictMode,
+    CreateDiscountDTO,
+)
 from pkg.crm.application.dtos.delete_discount_dto import DeleteDiscountDTO
+from pkg.crm.application.dtos.discount_changes_dto import (
+    ChangeFeedSettings,
+    DiscountChangesDTO,
+    DiscountChangesPage,
+)
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
 from pkg.crm.application.dtos.discount_output_dto import DiscountOutputDTO
+from pkg.crm.application.dtos.discount_revision_dto import DiscountRevisionDTO
+from pkg.crm.application.dtos.export_discount_dto import ExportFormat
+from pkg.crm.application.dtos.paginate_count_dto import CountStrategy
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
 from pkg.crm.application.dtos.update_discount_dto import UpdateDiscountDTO
 
+from pkg.crm.application.use_cases.batch_discounts_usecases import BatchDiscounts
 from pkg.crm.application.use_cases.create_discount_usecases import CreateDiscount
 from pkg.crm.application.use_cases.delete_discount_usecases import DeleteDiscount
+from pkg.crm.application.use_cases.export_discounts_usecases import ExportDiscounts
+from pkg.crm.application.use_cases.get_discount_changes_usecases import (
+    GetDiscountChanges,
+)
 from pkg.crm.application.use_cases.get_all_discounts_usecases import GetAllDiscounts
 from pkg.crm.application.use_cases.get_discount_usecases import GetDiscount
+from pkg.crm.application.use_cases.get_discount_revision_usecases import (
+    GetDiscountRevision,
+)
+from pkg.crm.application.use_cases.get_discounts_after_usecases import (
+    GetDiscountsAfter,
+)
+from pkg.crm.application.use_cases.get_discounts_version_usecases import (
+    GetDiscountsVersion,
+)
 from pkg.crm.application.use_cases.update_discount_usecases import UpdateDiscount
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
 
-from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
-    DiscountRepository,
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
+from pkg.crm.infrastructure.persistence.repositories.discount_event_repository import (
+    DiscountEventRepository,
+)
+from pkg.crm.infrastructure.persistence.repositories.idempotency_key_repository import (
+    IdempotencyKeyRepository,
 )
 
 
 class DiscountService:
 
-    def __init__(self, repository: DiscountRepository):
-        self.create_discount = CreateDiscount(repository)
-        self.get_discount = GetDiscount(repository)
-        self.update_discount = UpdateDiscount(repository)
-        self.delete_discount = DeleteDiscount(repository)
-        self.get_all_discounts = GetAllDiscounts(repository)
+    def __init__(
+        self,
+        repository: DiscountRepositoryPort,
+        cache: DiscountCache,
+        events: DiscountEventRepository,
+        keys: IdempotencyKeyRepository,
+        trusted_output: bool = False,
+        change_feed: ChangeFeedSettings = ChangeFeedSettings(),
+        create_on_conflict: ConflictMode = ConflictMode.FAIL,
+    ):
+        self.create_discount = CreateDiscount(
+            repository, keys, cache, on_conflict=create_on_conflict
+        )
+        self.get_discount = GetDiscount(cache, trusted=trusted_output)
+        self.get_discount_revision = GetDiscountRevision(cache, repository)
+        self.get_discounts_version = GetDiscountsVersion(cache)
+        self.update_discount = UpdateDiscount(repository, cache)
+        self.delete_discount = DeleteDiscount(repository, cache)
+        self.get_all_discounts = GetAllDiscounts(repository, trusted=trusted_output)
+        self.get_discounts_after = GetDiscountsAfter(repository, trusted=trusted_output)
+        self.batch_discounts = BatchDiscounts(repository, cache)
+        self.export_discounts = ExportDiscounts(repository)
+        self.get_discount_changes = GetDiscountChanges(
+            events, settings=change_feed, trusted=trusted_output
+        )
+
+    async def create(
+        self,
+        dto: CreateDiscountDTO,
+        on_conflict: Optional[ConflictMode] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> DiscountOutputDTO:
+        return await self.create_discount.execute(dto, on_conflict, idempotency_key)
 
-    async def create(self, dto: CreateDiscountDTO) -> DiscountOutputDTO:
-        return await self.create_discount.execute(dto)
+    async def get(self, id: int) -> DiscountOutputDTO:
+        return await self.get_discount.execute(id)
 
-    async def get(self, discount_id: str):
-        return await self.get_discount.execute(discount_id)
+    async def revision(self, id: int, latest: bool = False) -> DiscountRevisionDTO:
+        return await self.get_discount_revision.execute(id, latest)
 
-    async def update(self, dto: UpdateDiscountDTO) -> DiscountOutputDTO:
+    async def version(self) -> str:
+        return await self.get_discounts_version.execute()
+
+    async def update(
+        self, dto: UpdateDiscountDTO | PatchDiscountDTO
+    ) -> tuple[DiscountOutputDTO, DiscountRevisionDTO]:
         return await self.update_discount.execute(dto)
 
     async def delete(self, dto: DeleteDiscountDTO) -> None:
         return await self.delete_discount.execute(dto)
 
-    async def get_all(self, dto: PaginateDTO) -> Paginate[DiscountOutputDTO]:
-        return await self.get_all_discounts.execute(dto)
+    async def get_all(
+        self,
+        dto: PaginateDTO,
+        count: CountStrategy = CountStrategy.EXACT,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> Paginate[DiscountOutputDTO]:
+        return await self.get_all_discounts.execute(dto, count=count, filters=filters)
+
+    async def get_all_after(
+        self,
+        dto: CursorPaginateDTO,
+        count: CountStrategy = CountStrategy.NONE,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> CursorPaginate[DiscountOutputDTO]:
+        return await self.get_discounts_after.execute(dto, count=count, filters=filters)
+
+    async def batch(self, items: AsyncIterator[Any]) -> List[BatchItemResultDTO]:
+        return await self.batch_discounts.execute(items)
+
+    def export(self, format: ExportFormat) -> AsyncIterator[bytes]:
+        return self.export_discounts.execute(format)
+
+    async def changes(self, dto: DiscountChangesDTO) -> DiscountChangesPage:
+        return await self.get_discount_changes.execute(dto)
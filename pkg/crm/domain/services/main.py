@@ -1,5 +1,8 @@
 from dataclasses import dataclass
+from pkg.crm.application.dtos.create_discount_dto import ConflictMode
+from pkg.crm.application.dtos.discount_changes_dto import ChangeFeedSettings
 from pkg.crm.domain.services.discount_service import DiscountService
+from pkg.crm.infrastructure.cache.main import Cache
 from pkg.crm.infrastructure.persistence.repositories.main import Repository
 
 
@@ -11,6 +14,10 @@ class ServiceRegistry:
 @dataclass(frozen=True, slots=True)
 class ServicesContext:
     Repo: Repository
+    Cache: Cache
+    TrustedOutput: bool = False
+    ChangeFeed: ChangeFeedSettings = ChangeFeedSettings()
+    CreateOnConflict: ConflictMode = ConflictMode.FAIL
 
 
 class NewService:
@@ -20,6 +27,14 @@ class NewService:
 
     def init(self) -> ServiceRegistry:
 
-        discountService = DiscountService(repository=self.ctx.Repo.discountRepo)
+        discountService = DiscountService(
+            repository=self.ctx.Repo.discountRepo,
+            cache=self.ctx.Cache.discountCache,
+            events=self.ctx.Repo.discountEventRepo,
+            keys=self.ctx.Repo.idempotencyKeyRepo,
+            trusted_output=self.ctx.TrustedOutput,
+            change_feed=self.ctx.ChangeFeed,
+            create_on_conflict=self.ctx.CreateOnConflict,
+        )
 
         return ServiceRegistry(discountService=discountService)
@@ -1,63 +1,211 @@
+import codecs
+import json
 from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
 from pydantic import ValidationError
+from pydantic_core import to_json
+from starlette.responses import Response, StreamingResponse
 
 from onbbu.paginate import PaginateDTO
 from onbbu import (
-    Response,
     ResponseNotFoundError,
     ResponseValidationError,
     ResponseValueError,
     JSONResponse,
-    Request
+    Request,
 )
 
-from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.application.dtos.batch_discount_dto import MalformedBatchError
+from pkg.crm.application.dtos.cursor_paginate_dto import CursorPaginateDTO
+from pkg.crm.application.dtos.paginate_count_dto import CountStrategy
+from pkg.crm.application.dtos.export_discount_dto import ExportFormat
+from pkg.crm.application.dtos.create_discount_dto import (
+    ConflictMode,
+    CreateDiscountDTO,
+    DuplicateDiscountError,
+    IdempotencyKeyReusedError,
+    IdempotencyKeyTakenError,
+)
 from pkg.crm.application.dtos.delete_discount_dto import DeleteDiscountDTO
-from pkg.crm.application.dtos.update_discount_dto import UpdateDiscountDTO
+from pkg.crm.application.dtos.discount_changes_dto import (
+    ChangesExpiredError,
+    DiscountChangesDTO,
+)
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+from pkg.crm.application.dtos.discount_revision_dto import DiscountRevisionDTO
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
+from pkg.crm.application.dtos.update_discount_dto import (
+    DiscountNotFoundError,
+    UpdateDiscountDTO,
+    VersionConflictError,
+)
+
+from pkg.crm.infrastructure.adapters.conditional import (
+    not_modified,
+    not_modified_response,
+    etag_version,
+    versioned_etag,
+    validators,
+    weak_etag,
+)
+from pkg.crm.infrastructure.adapters.response_cache import (
+    EncodedResponse,
+    ResponseCache,
+)
+from pkg.crm.infrastructure.adapters.responses import FastResponse
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
+from pkg.crm.infrastructure.profiling.timings import phase, timed_items
 
 from pkg.crm.domain.services.discount_service import (
     DiscountService,
 )
 
 
+async def stream_json_items(request: Request) -> AsyncIterator[Any]:
+    """Yield the items of a JSON array or NDJSON body as they arrive.
+
+    Raises `MalformedBatchError` where the body stops being valid, after
+    every item before that point was yielded.
+    """
+
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+
+    ndjson: bool = "ndjson" in request.headers.get("content-type", "")
+    opened: bool = ndjson
+    buffer: str = ""
+
+    try:
+        async for chunk in request.stream():
+            buffer += text.decode(chunk)
+
+            if ndjson:
+                *lines, buffer = buffer.split("\n")
+
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+
+                continue
+
+            if not opened:
+                buffer = buffer.lstrip()
+
+                if not buffer:
+                    continue
+
+                if buffer[0] != "[":
+                    raise MalformedBatchError(
+                        "Expected a JSON array or an NDJSON body."
+                    )
+
+                buffer, opened = buffer[1:], True
+
+            while True:
+                buffer = buffer.lstrip(" \t\r\n,")
+
+                if not buffer or buffer[0] == "]":
+                    break
+
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    break
+
+                yield item
+
+                buffer = buffer[end:]
+
+        buffer += text.decode(b"", final=True)
+
+        if ndjson:
+            if buffer.strip():
+                yield json.loads(buffer)
+
+        elif not opened or buffer.strip() != "]":
+            raise MalformedBatchError("Malformed or truncated JSON array body.")
+
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise MalformedBatchError(f"Malformed body: {e}") from e
+
+
 @dataclass(frozen=True, slots=True)
 class DiscountAdapter:
     discountService: DiscountService
+    responseCache: Optional[ResponseCache] = None
+    router: Optional[DatabaseRouter] = None
 
 
 class HttpDiscountAdapter:
 
     def __init__(self, ctx: DiscountAdapter):
         self.discountService: DiscountService = ctx.discountService
+        self.responseCache: ResponseCache = ctx.responseCache or ResponseCache()
+        self.router: DatabaseRouter = ctx.router or DatabaseRouter()
 
     async def create(self, request: Request) -> JSONResponse:
         try:
 
-            data = await request.json()
+            with phase("parse"):
+                data = await request.json()
+
+            with phase("validate"):
+                dto: CreateDiscountDTO = CreateDiscountDTO(**data)
+                on_conflict: Optional[ConflictMode] = (
+                    ConflictMode(request.query_params["on_conflict"])
+                    if "on_conflict" in request.query_params
+                    else None
+                )
+                idempotency_key: Optional[str] = request.headers.get("idempotency-key")
 
-            dto: CreateDiscountDTO = CreateDiscountDTO.parse_obj(**data)
+                if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+                    raise ValueError("Idempotency-Key must be 1 to 255 characters")
 
-            instance = await self.discountService.create(dto=dto)
+            with phase("service"):
+                instance = await self.discountService.create(
+                    dto=dto, on_conflict=on_conflict, idempotency_key=idempotency_key
+                )
 
-            return Response(instance)
+            with phase("encode"):
+                return FastResponse(instance)
+
+        except IdempotencyKeyReusedError as e:
+            return JSONResponse(status_code=422, content={"error": str(e)})
+
+        except (DuplicateDiscountError, IdempotencyKeyTakenError) as e:
+            return JSONResponse(status_code=409, content={"error": str(e)})
 
         except ValidationError as e:
             return ResponseValidationError(content=e)
 
         except ValueError as e:
-            return ResponseValueError(content=e)
+            return JSONResponse(status_code=400, content={"error": str(e)})
 
-    async def get(self, request: Request) -> JSONResponse:
+    async def get(self, request: Request) -> Response | JSONResponse:
         try:
 
             id: int = int(request.path_params["id"])
 
-            instance = await self.discountService.get(id=id)
+            with phase("service"):
+                revision: DiscountRevisionDTO = await self.discountService.revision(
+                    id=id
+                )
+
+                etag: str = versioned_etag(revision.version, "discount", revision.id)
+
+                if not_modified(request, etag, revision.updated_at):
+                    return not_modified_response(etag, revision.updated_at)
+
+                instance = await self.discountService.get(id=id)
 
             if not instance:
                 return ResponseNotFoundError({"error": "Discount not found"})
 
-            return Response(instance)
+            with phase("encode"):
+                return FastResponse(
+                    instance, headers=validators(etag, revision.updated_at)
+                )
 
         except ValidationError as e:
             return ResponseValidationError(content=e)
@@ -65,56 +213,256 @@ class HttpDiscountAdapter:
         except ValueError as e:
             return ResponseValueError(content=e)
 
-    async def get_all(self, request: Request) -> JSONResponse:
+    async def get_all(self, request: Request) -> Response | JSONResponse:
 
         try:
 
-            dto: PaginateDTO = PaginateDTO(
-                limit=int(request.query_params.get("limit") or 100),
-                page=int(request.query_params.get("page") or 1),
-            )
+            # Read the version before the rows, a write in between then only
+            # costs the client a full response instead of a stale 304.
+            with phase("service"):
+                version: str = await self.discountService.version()
 
-            instance = await self.discountService.get_all(dto)
+            # Weak, the gzip and identity codings of a page share the tag.
+            etag: str = weak_etag(
+                "discounts", version, *sorted(request.query_params.multi_items())
+            )
 
-            return Response(instance)
+            if not_modified(request, etag):
+                return not_modified_response(etag)
+
+            accept_encoding: Optional[str] = request.headers.get("accept-encoding")
+
+            cached: Optional[EncodedResponse] = self.responseCache.get(version, etag)
+
+            if cached:
+                with phase("encode"):
+                    return self.responseCache.respond(cached, accept_encoding)
+
+            with phase("validate"):
+                filters: DiscountFilterDTO = DiscountFilterDTO(
+                    visible=request.query_params.get("visible") or None,
+                    min_pct=request.query_params.get("min_pct") or None,
+                    max_pct=request.query_params.get("max_pct") or None,
+                    q=request.query_params.get("q") or None,
+                    sort=request.query_params.get("sort") or "id",
+                )
+
+            if "after" in request.query_params:
+
+                with phase("validate"):
+                    cursor_dto: CursorPaginateDTO = CursorPaginateDTO(
+                        limit=int(request.query_params.get("limit") or 100),
+                        after=request.query_params.get("after") or None,
+                        sort=filters.sort,
+                    )
+                    count: CountStrategy = CountStrategy(
+                        request.query_params.get("count") or "none"
+                    )
+
+                with phase("service"):
+                    instance = await self.discountService.get_all_after(
+                        cursor_dto, count=count, filters=filters
+                    )
+
+            else:
+                with phase("validate"):
+                    dto: PaginateDTO = PaginateDTO(
+                        limit=int(request.query_params.get("limit") or 100),
+                        page=int(request.query_params.get("page") or 1),
+                    )
+                    count: CountStrategy = CountStrategy(
+                        request.query_params.get("count") or "exact"
+                    )
+
+                with phase("service"):
+                    instance = await self.discountService.get_all(
+                        dto, count=count, filters=filters
+                    )
+
+            with phase("encode"):
+                entry: EncodedResponse = EncodedResponse(
+                    body=to_json(instance), headers=validators(etag)
+                )
+
+                # A replica can lag behind the write that produced `version`,
+                # only a page read from the primary is cached under it.
+                if self.router.reads_primary():
+                    self.responseCache.put(version, etag, entry)
+
+                return self.responseCache.respond(entry, accept_encoding)
 
         except ValidationError as e:
             return ResponseValidationError(content=e)
 
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+
+    async def batch(self, request: Request) -> JSONResponse:
+        try:
+
+            # The body streams into validation and the writes, item by item,
+            # the use case times those two and this the reading.
+            results = await self.discountService.batch(
+                timed_items(stream_json_items(request), "parse")
+            )
+
+            with phase("encode"):
+                return FastResponse(results)
+
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+
+    async def export(self, request: Request) -> StreamingResponse | JSONResponse:
+        try:
+
+            format: ExportFormat = ExportFormat(
+                request.query_params.get("format") or "ndjson"
+            )
+
+            return StreamingResponse(
+                self.discountService.export(format), media_type=format.media_type
+            )
+
         except ValueError as e:
             return ResponseValueError(content=e)
 
+    async def changes(self, request: Request) -> JSONResponse:
+        try:
+
+            with phase("validate"):
+                dto: DiscountChangesDTO = DiscountChangesDTO(
+                    since=request.query_params.get("since") or None,
+                    limit=int(request.query_params.get("limit") or 500),
+                    wait=float(request.query_params.get("wait") or 0),
+                )
+
+            with phase("service"):
+                page = await self.discountService.changes(dto)
+
+            with phase("encode"):
+                return FastResponse(page)
+
+        except ChangesExpiredError as e:
+            return JSONResponse(status_code=410, content={"error": str(e)})
+
+        except ValidationError as e:
+            return ResponseValidationError(content=e)
+
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+
     async def update(self, request: Request) -> JSONResponse:
+        return await self._update(request, UpdateDiscountDTO)
+
+    async def patch(self, request: Request) -> JSONResponse:
+        return await self._update(request, PatchDiscountDTO)
+
+    async def _update(
+        self, request: Request, dto_type: type[UpdateDiscountDTO | PatchDiscountDTO]
+    ) -> JSONResponse:
+        """Replace (PUT) or change (PATCH) a discount.
+
+        The write is pinned to the version the If-Match ETag or a `version`
+        field names, and answers 412 if the discount moved on since.
+        """
+
         try:
 
             id: int = int(request.path_params["id"])
 
-            data = await request.json()
+            with phase("parse"):
+                data = await request.json()
 
             data["id"] = id
 
-            dto: UpdateDiscountDTO = UpdateDiscountDTO.parse_obj(data)
-
-            instance = await self.discountService.update(dto=dto)
+            if "if-match" in request.headers:
+                with phase("service"):
+                    data["version"] = await self._matched_version(request, id)
+
+            with phase("validate"):
+                dto: UpdateDiscountDTO | PatchDiscountDTO = dto_type(**data)
+
+            with phase("service"):
+                instance, revision = await self.discountService.update(dto=dto)
+
+            with phase("encode"):
+                return FastResponse(
+                    instance,
+                    headers=validators(
+                        versioned_etag(revision.version, "discount", revision.id),
+                        revision.updated_at,
+                    ),
+                )
+
+        except VersionConflictError as e:
+            return JSONResponse(status_code=412, content={"error": str(e)})
+
+        except DiscountNotFoundError as e:
+            # If-Match, even `*`, only matches a discount that exists.
+            return JSONResponse(
+                status_code=412 if "if-match" in request.headers else 404,
+                content={"error": str(e)},
+            )
 
-            return Response(instance)
+        except DuplicateDiscountError as e:
+            return JSONResponse(status_code=409, content={"error": str(e)})
 
         except ValidationError as e:
             return ResponseValidationError(content=e)
 
         except ValueError as e:
-            return ResponseValueError(content=e)
+            return JSONResponse(status_code=400, content={"error": str(e)})
+
+    async def _matched_version(self, request: Request, id: int) -> Optional[int]:
+        """Version the If-Match header pins a write to, None for `*`.
+
+        The ETag names its version, so the write itself checks it. Only a
+        list naming several versions is compared to the primary first. Weak
+        tags never match, a write needs the exact representation.
+        """
+
+        tags: list[str] = [
+            tag.strip() for tag in request.headers["if-match"].split(",")
+        ]
+
+        if "*" in tags:
+            return None
+
+        versions: set[int] = {
+            version
+            for version in (etag_version(tag, "discount", id) for tag in tags)
+            if version is not None
+        }
+
+        if len(versions) == 1:
+            return versions.pop()
+
+        if versions:
+            try:
+                revision: DiscountRevisionDTO = await self.discountService.revision(
+                    id=id, latest=True
+                )
+            except ValueError as e:
+                raise VersionConflictError(str(e)) from e
+
+            if revision.version in versions:
+                return revision.version
+
+        raise VersionConflictError("The discount was changed since that ETag.")
 
     async def delete(self, request: Request) -> JSONResponse:
         try:
 
             id: int = int(request.path_params["id"])
 
-            dto: DeleteDiscountDTO = DeleteDiscountDTO.parse_obj({"id": id})
+            with phase("validate"):
+                dto: DeleteDiscountDTO = DeleteDiscountDTO(id=id)
 
-            await self.discountService.delete(dto=dto)
+            with phase("service"):
+                await self.discountService.delete(dto=dto)
 
-            return JSONResponse(status_code=204, content=None)
+            with phase("encode"):
+                return JSONResponse(status_code=204, content=None)
 
         except ValueError as e:
             return ResponseValueError(content=e)
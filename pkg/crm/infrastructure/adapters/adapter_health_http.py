@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+from onbbu import JSONResponse, Request
+
+from pkg.crm.infrastructure.adapters.responses import FastResponse
+from pkg.crm.infrastructure.persistence.pool import PoolMonitor
+
+
+@dataclass(frozen=True, slots=True)
+class HealthAdapter:
+    pool: PoolMonitor
+
+
+class HttpHealthAdapter:
+
+    def __init__(self, ctx: HealthAdapter):
+        self.pool: PoolMonitor = ctx.pool
+
+    async def pool_stats(self, request: Request) -> JSONResponse:
+        return FastResponse(self.pool.stats())
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+from starlette.responses import Response
+
+from onbbu import Request
+
+from pkg.crm.infrastructure.metrics.registry import MetricsRegistry
+
+
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsAdapter:
+    registry: MetricsRegistry
+
+
+class HttpMetricsAdapter:
+
+    def __init__(self, ctx: MetricsAdapter):
+        self.registry: MetricsRegistry = ctx.registry
+
+    async def metrics(self, request: Request) -> Response:
+        return Response(self.registry.render(), headers={"Content-Type": CONTENT_TYPE})
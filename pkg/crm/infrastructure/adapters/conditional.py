@@ -0,0 +1,95 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from starlette.responses import Response
+
+from onbbu import Request
+
+
+def strong_etag(*parts: object) -> str:
+    digest: str = hashlib.blake2b(
+        "\x1f".join(map(str, parts)).encode(), digest_size=12
+    ).hexdigest()
+
+    return f'"{digest}"'
+
+
+def weak_etag(*parts: object) -> str:
+    return f"W/{strong_etag(*parts)}"
+
+
+def versioned_etag(version: int, *parts: object) -> str:
+    """A strong ETag of `parts` at `version` that names the version in clear.
+
+    A write conditioned on one is pinned to its version without a read.
+    """
+
+    return f'"{version}.{strong_etag(*parts, version)[1:-1]}"'
+
+
+def etag_version(etag: str, *parts: object) -> Optional[int]:
+    """The version a `versioned_etag` of `parts` names, None for another tag."""
+
+    version: str = etag.strip('"').partition(".")[0]
+
+    if not version.isdigit() or etag != versioned_etag(int(version), *parts):
+        return None
+
+    return int(version)
+
+
+def http_date(value: datetime) -> str:
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """Whether the client's cached copy is current, If-None-Match wins."""
+
+    if_none_match: Optional[str] = request.headers.get("if-none-match")
+
+    if if_none_match is not None:
+        tags: list[str] = [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]
+
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since: Optional[str] = request.headers.get("if-modified-since")
+
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since: datetime = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    # Last-Modified only carries whole seconds, compare at that precision.
+    return parsedate_to_datetime(http_date(last_modified)) <= since
+
+
+def validators(etag: str, last_modified: Optional[datetime] = None) -> dict:
+
+    headers: dict = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    return headers
+
+
+def not_modified_response(
+    etag: str, last_modified: Optional[datetime] = None
+) -> Response:
+    return Response(status_code=304, headers=validators(etag, last_modified))
@@ -0,0 +1,34 @@
+from enum import Enum
+from typing import Any, Callable, Sequence
+
+from onbbu import HTTPMethod, RouterHttp
+
+
+class ExtraHTTPMethod(Enum):
+    """Methods `HTTPMethod` lacks, routes only read their `value`."""
+
+    PATCH = "PATCH"
+
+
+EndpointWrapper = Callable[[Any, str, HTTPMethod | ExtraHTTPMethod], Any]
+
+
+class InstrumentedRouterHttp(RouterHttp):
+    """`RouterHttp` that runs every endpoint through `wrappers`.
+
+    Each wrapper gets the endpoint, its full route path and method, and
+    returns the endpoint to register. Later wrappers wrap the earlier ones.
+    """
+
+    def __init__(self, prefix: str = "", wrappers: Sequence[EndpointWrapper] = ()):
+        super().__init__(prefix=prefix)
+
+        self.prefix = prefix.rstrip("/")
+        self.wrappers = tuple(wrappers)
+
+    def add_route(self, path: str, endpoint: Any, method: HTTPMethod | ExtraHTTPMethod):
+
+        for wrap in self.wrappers:
+            endpoint = wrap(endpoint, f"{self.prefix}{path}", method)
+
+        super().add_route(path=path, endpoint=endpoint, method=method)
@@ -0,0 +1,34 @@
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+
+from onbbu import ServerHttp
+from starlette.applications import Starlette
+
+Hook = Callable[[], Awaitable[None]]
+
+
+def add_lifespan_hooks(
+    http: ServerHttp,
+    startup: Optional[Hook] = None,
+    shutdown: Optional[Hook] = None,
+) -> None:
+    """Run `startup` once the database is up and `shutdown` before it closes."""
+
+    lifespan = http.server.router.lifespan_context
+
+    @asynccontextmanager
+    async def extended_lifespan(app: Starlette):
+
+        async with lifespan(app) as state:
+
+            if startup:
+                await startup()
+
+            try:
+                yield state
+
+            finally:
+                if shutdown:
+                    await shutdown()
+
+    http.server.router.lifespan_context = extended_lifespan
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 from onbbu import ServerHttp, HTTPMethod, RouterHttp
 
@@ -8,15 +9,51 @@ from pkg.crm.infrastructure.adapters.adapter_discounts_http import (
     DiscountAdapter,
 )
 
+from pkg.crm.infrastructure.adapters.adapter_health_http import (
+    HttpHealthAdapter,
+    HealthAdapter,
+)
+
+from pkg.crm.infrastructure.adapters.adapter_metrics_http import (
+    HttpMetricsAdapter,
+    MetricsAdapter,
+)
+
+from pkg.crm.infrastructure.adapters.instrumented_router import (
+    EndpointWrapper,
+    ExtraHTTPMethod,
+    InstrumentedRouterHttp,
+)
+from pkg.crm.infrastructure.adapters.response_cache import ResponseCache
+
 from pkg.crm.domain.services.discount_service import (
     DiscountService,
 )
 
+from pkg.crm.infrastructure.metrics.instrumentation import HttpMetrics
+from pkg.crm.infrastructure.metrics.registry import MetricsRegistry
+
+from pkg.crm.infrastructure.persistence.pool import PoolMonitor
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
+
+from pkg.crm.infrastructure.profiling.profiler import Profiler
+
 
 @dataclass(frozen=True, slots=True)
 class ConfigHttpAdapter:
     Http: ServerHttp
     discountService: DiscountService
+    pool: PoolMonitor
+    responseCache: Optional[ResponseCache] = None
+    router: Optional[DatabaseRouter] = None
+    profiler: Optional[Profiler] = None
+    metrics: Optional[HttpMetrics] = None
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigMetricsHttpAdapter:
+    Http: ServerHttp
+    registry: MetricsRegistry
 
 
 class NewHttpAdapter:
@@ -24,10 +61,38 @@ class NewHttpAdapter:
     def __init__(self, config: ConfigHttpAdapter):
 
         discountAdapter: HttpDiscountAdapter = HttpDiscountAdapter(
-            DiscountAdapter(discountService=config.discountService)
+            DiscountAdapter(
+                discountService=config.discountService,
+                responseCache=config.responseCache,
+                router=config.router,
+            )
         )
 
-        router: RouterHttp = RouterHttp(prefix="/crm")
+        healthAdapter: HttpHealthAdapter = HttpHealthAdapter(
+            HealthAdapter(pool=config.pool)
+        )
+
+        wrappers: list[EndpointWrapper] = []
+
+        if config.profiler:
+            wrappers.append(config.profiler.wrap)
+
+        if config.metrics:
+            wrappers.append(config.metrics.wrap)
+
+        router: RouterHttp = InstrumentedRouterHttp(prefix="/crm", wrappers=wrappers)
+
+        router.add_route(
+            path="/discounts/export",
+            method=HTTPMethod.GET,
+            endpoint=discountAdapter.export,
+        )
+
+        router.add_route(
+            path="/discounts/changes",
+            method=HTTPMethod.GET,
+            endpoint=discountAdapter.changes,
+        )
 
         router.add_route(
             path="/discounts/{id}",
@@ -47,16 +112,53 @@ class NewHttpAdapter:
             endpoint=discountAdapter.create,
         )
 
+        router.add_route(
+            path="/discounts:batch",
+            method=HTTPMethod.POST,
+            endpoint=discountAdapter.batch,
+        )
+
         router.add_route(
             path="/discounts/{id}",
             method=HTTPMethod.PUT,
             endpoint=discountAdapter.update,
         )
 
+        router.add_route(
+            path="/discounts/{id}",
+            method=ExtraHTTPMethod.PATCH,
+            endpoint=discountAdapter.patch,
+        )
+
         router.add_route(
             path="/discounts/{id}",
             method=HTTPMethod.DELETE,
             endpoint=discountAdapter.delete,
         )
 
+        router.add_route(
+            path="/health/pool",
+            method=HTTPMethod.GET,
+            endpoint=healthAdapter.pool_stats,
+        )
+
+        config.Http.include_router(router)
+
+
+class NewMetricsHttpAdapter:
+
+    def __init__(self, config: ConfigMetricsHttpAdapter):
+
+        metricsAdapter: HttpMetricsAdapter = HttpMetricsAdapter(
+            MetricsAdapter(registry=config.registry)
+        )
+
+        router: RouterHttp = RouterHttp()
+
+        router.add_route(
+            path="/metrics",
+            method=HTTPMethod.GET,
+            endpoint=metricsAdapter.metrics,
+        )
+
         config.Http.include_router(router)
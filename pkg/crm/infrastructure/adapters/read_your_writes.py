@@ -0,0 +1,79 @@
+import math
+import time
+from http.cookies import SimpleCookie
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter, ReadSession
+
+
+COOKIE: str = "crm_primary_until"
+
+
+class ReadYourWritesMiddleware:
+    """Carries the read-your-writes window between requests in a cookie.
+
+    The cookie holds the deadline rather than living in process memory, so
+    the client stays pinned to the primary whichever worker serves it next.
+    It is the client's to edit, so a deadline past `sticky_window` from now
+    is cut back to it.
+    """
+
+    def __init__(self, app: ASGIApp, router: DatabaseRouter, prefix: str = "/crm"):
+        self.app = app
+        self.router = router
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        session: ReadSession = ReadSession(primary_until=self._deadline(scope))
+
+        async def send_with_cookie(message: Message) -> None:
+
+            if message["type"] == "http.response.start" and session.wrote:
+                cookie: SimpleCookie = SimpleCookie()
+                cookie[COOKIE] = f"{session.primary_until:.3f}"
+                cookie[COOKIE]["max-age"] = str(int(self.router.sticky_window) + 1)
+                cookie[COOKIE]["path"] = self.prefix
+                cookie[COOKIE]["httponly"] = True
+
+                MutableHeaders(scope=message).append(
+                    "set-cookie", cookie.output(header="").strip()
+                )
+
+            await send(message)
+
+        token = self.router.begin(session)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+
+        finally:
+            self.router.end(token)
+
+    def _deadline(self, scope: Scope) -> float:
+
+        for name, value in scope["headers"]:
+            if name != b"cookie":
+                continue
+
+            cookie: SimpleCookie = SimpleCookie()
+            cookie.load(value.decode("latin-1"))
+
+            if COOKIE in cookie:
+                try:
+                    deadline: float = float(cookie[COOKIE].value)
+                except ValueError:
+                    return 0.0
+
+                if math.isnan(deadline):
+                    return 0.0
+
+                return min(deadline, time.time() + self.router.sticky_window)
+
+        return 0.0
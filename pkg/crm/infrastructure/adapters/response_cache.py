@@ -0,0 +1,139 @@
+import gzip
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+ENCODINGS: tuple[str, ...] = ("br", "gzip") if brotli else ("gzip",)
+
+
+@dataclass(slots=True)
+class EncodedResponse:
+    """A JSON body encoded once, with compressed variants filled on demand."""
+
+    body: bytes
+    headers: dict
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """LRU of encoded responses for one collection version.
+
+    Keys must already identify the representation, e.g. its ETag. Seeing a
+    new collection version drops every entry, so a write from any worker
+    empties the cache on its next lookup.
+    """
+
+    max_entries: int
+    min_compress_size: int
+
+    def __init__(self, max_entries: int = 256, min_compress_size: int = 512):
+        self.max_entries = max_entries
+        self.min_compress_size = min_compress_size
+
+        self._version: Optional[str] = None
+        self._entries: OrderedDict[str, EncodedResponse] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def get(self, version: str, key: str) -> Optional[EncodedResponse]:
+
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+        entry: Optional[EncodedResponse] = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return entry
+
+    def put(self, version: str, key: str, entry: EncodedResponse) -> None:
+
+        if version == self._version:
+            self._entries[key] = entry
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def respond(
+        self, entry: EncodedResponse, accept_encoding: Optional[str]
+    ) -> Response:
+        """Build the response, compressed with the client's preferred encoding."""
+
+        headers: dict = {**entry.headers, "Vary": "Accept-Encoding"}
+
+        encoding: Optional[str] = (
+            self.negotiate(accept_encoding)
+            if len(entry.body) >= self.min_compress_size
+            else None
+        )
+
+        if encoding is None:
+            return Response(entry.body, media_type="application/json", headers=headers)
+
+        body: Optional[bytes] = entry.variants.get(encoding)
+
+        if body is None:
+            body = entry.variants[encoding] = self.compress(entry.body, encoding)
+
+        headers["Content-Encoding"] = encoding
+
+        return Response(body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+
+        if not accept_encoding:
+            return None
+
+        weights: dict[str, float] = {}
+
+        for item in accept_encoding.split(","):
+            name, _, params = item.strip().partition(";")
+
+            try:
+                quality: float = (
+                    float(params.strip().removeprefix("q=")) if params else 1.0
+                )
+            except ValueError:
+                quality = 0.0
+
+            weights[name.strip().lower()] = quality
+
+        candidates: list[tuple[float, str]] = [
+            (weights.get(encoding, weights.get("*", 0.0)), encoding)
+            for encoding in ENCODINGS
+        ]
+
+        quality, encoding = max(candidates, key=lambda candidate: candidate[0])
+
+        return encoding if quality > 0 else None
+
+    @staticmethod
+    def compress(body: bytes, encoding: str) -> bytes:
+
+        if encoding == "br":
+            return brotli.compress(body, quality=5)
+
+        return gzip.compress(body, compresslevel=6, mtime=0)
@@ -0,0 +1,15 @@
+from typing import Any
+
+from pydantic_core import to_json
+from starlette.responses import JSONResponse
+
+
+class FastResponse(JSONResponse):
+    """`Response` encoded straight to bytes by pydantic-core.
+
+    Dataclasses, pydantic dataclasses and plain dicts serialize without the
+    `asdict` copy and `json.dumps` pass `onbbu.Response` performs.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -0,0 +1,27 @@
+from typing import Awaitable, Callable, Optional
+
+
+MessageHandler = Callable[[bytes], Awaitable[None]]
+
+
+class CacheBackend:
+    """Port for a cache shared by every worker process."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError("Subclasses must implement get()")
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError("Subclasses must implement set()")
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError("Subclasses must implement delete()")
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        raise NotImplementedError("Subclasses must implement publish()")
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        """Deliver every message on `channel` to `handler`, runs until cancelled."""
+        raise NotImplementedError("Subclasses must implement subscribe()")
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,399 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Awaitable, Callable, Optional, Union
+from uuid import uuid4
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
+from pkg.crm.infrastructure.cache.cache_backend import CacheBackend
+
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Union[int, str]
+
+INVALIDATION_CHANNEL: str = "crm:discounts:invalidate"
+
+COLLECTION_VERSION_KEY: str = "crm:discounts:version"
+
+
+@dataclass(frozen=True, slots=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+
+class DiscountCache:
+    """Read-through LRU+TTL cache over `DiscountRepositoryPort` lookups.
+
+    Entries are keyed by id, names resolve to ids through a side index so a
+    renamed discount never answers for its old name. Concurrent misses on the
+    same key share one repository call.
+
+    With a shared `backend` the local entries act as a first level in front of
+    it: writes go through to the backend and are announced on
+    `INVALIDATION_CHANNEL` so every other worker drops its local copy.
+
+    Every write also replaces the collection version, an opaque token that
+    changes whenever any discount does. It lives in the backend when there is
+    one; a process-local token only sees this worker's writes, so it is
+    renewed every `ttl` seconds like any other local entry.
+    """
+
+    repository: DiscountRepositoryPort
+    backend: Optional[CacheBackend]
+    max_size: int
+    ttl: float
+
+    VERSION_TTL: float = 86400.0
+
+    def __init__(
+        self,
+        repository: DiscountRepositoryPort,
+        max_size: int = 1024,
+        ttl: float = 60.0,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.repository = repository
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._origin: str = uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+        self._entries: OrderedDict[int, tuple[DiscountEntity, float]] = OrderedDict()
+        self._ids: dict[str, int] = {}
+        self._inflight: dict[CacheKey, asyncio.Future] = {}
+        self._generation: int = 0
+        self._version: Optional[tuple[str, float]] = None
+        self._preloads: list[set[int]] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get_by_id(self, id: int) -> Optional[DiscountEntity]:
+
+        self._listen()
+
+        discount: Optional[DiscountEntity] = self._lookup(id)
+
+        if discount:
+            return discount
+
+        return await self._load(id, lambda: self.repository.get_by_id(id))
+
+    async def get_by_name(self, name: str) -> Optional[DiscountEntity]:
+
+        self._listen()
+
+        id: Optional[int] = self._ids.get(name)
+
+        discount: Optional[DiscountEntity] = self._lookup(id) if id else None
+
+        if discount and discount.name == name:
+            return discount
+
+        return await self._load(name, lambda: self.repository.get_by_name(name))
+
+    async def invalidate(self, discount: DiscountEntity, deleted: bool = False) -> None:
+        """Replace `discount` locally and drop it from every other worker.
+
+        The written row is kept rather than reloaded, a reload could come from
+        a replica that has not seen the write yet.
+        """
+
+        self._forget(discount.id)
+
+        if self._ids.get(discount.name) == discount.id:
+            del self._ids[discount.name]
+
+        if not deleted:
+            self._store(discount)
+
+        self._version = None
+
+        if self.backend is None:
+            return
+
+        self._listen()
+
+        try:
+            if deleted:
+                await self.backend.delete(
+                    self._id_key(discount.id), self._name_key(discount.name)
+                )
+            else:
+                await self._share(discount)
+
+            await self.backend.set(
+                COLLECTION_VERSION_KEY, uuid4().hex.encode(), self.VERSION_TTL
+            )
+
+            await self.backend.publish(
+                INVALIDATION_CHANNEL, f"{self._origin}:{discount.id}".encode()
+            )
+
+        except Exception as e:
+            logger.warning("Shared cache invalidation failed: %s", e)
+
+    async def collection_version(self) -> str:
+        """Token that changes whenever any discount is written."""
+
+        if self.backend is not None:
+            try:
+                version: Optional[bytes] = await self.backend.get(
+                    COLLECTION_VERSION_KEY
+                )
+
+                if version is None:
+                    version = uuid4().hex.encode()
+
+                    await self.backend.set(
+                        COLLECTION_VERSION_KEY, version, self.VERSION_TTL
+                    )
+
+                return version.decode()
+
+            except Exception as e:
+                logger.warning("Shared cache read failed: %s", e)
+
+        if self._version is None or self._version[1] <= time.monotonic():
+            self._version = (uuid4().hex, time.monotonic() + self.ttl)
+
+        return self._version[0]
+
+    async def preload(self, discounts: Awaitable[list[DiscountEntity]]) -> int:
+        """Store what `discounts` resolves to, up to `max_size`, returns how many.
+
+        A discount written or dropped while they load keeps its newer entry.
+        """
+
+        written: set[int] = set()
+        self._preloads.append(written)
+
+        try:
+            loaded: list[DiscountEntity] = await discounts
+        finally:
+            self._preloads.remove(written)
+
+        stored: int = 0
+
+        for discount in loaded[: self.max_size]:
+            if discount.id not in written:
+                self._store(discount)
+                stored += 1
+
+        return stored
+
+    def forget(self, id: int) -> None:
+        """Drop `id` from this worker only, its writer already told the others."""
+
+        self._forget(id)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._inflight.clear()
+        self._entries.clear()
+        self._ids.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            size=len(self._entries),
+        )
+
+    def _forget(self, id: int) -> None:
+        self._generation += 1
+        self._version = None
+        self._inflight.clear()
+        self._drop(id)
+
+        for written in self._preloads:
+            written.add(id)
+
+    def _listen(self) -> None:
+
+        if self.backend is None:
+            return
+
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(
+                self.backend.subscribe(INVALIDATION_CHANNEL, self._on_invalidation)
+            )
+
+    async def _on_invalidation(self, message: bytes) -> None:
+
+        origin, _, id = message.decode().partition(":")
+
+        if origin != self._origin:
+            self._forget(int(id))
+
+    def _lookup(self, id: int) -> Optional[DiscountEntity]:
+
+        entry = self._entries.get(id)
+
+        if entry is None:
+            return None
+
+        discount, expires_at = entry
+
+        if expires_at <= time.monotonic():
+            self._drop(id)
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(id)
+        self.hits += 1
+
+        return discount
+
+    async def _load(
+        self, key: CacheKey, loader: Callable[[], Awaitable[Optional[DiscountEntity]]]
+    ) -> Optional[DiscountEntity]:
+
+        self.misses += 1
+
+        future: Optional[asyncio.Future] = self._inflight.get(key)
+
+        if future is None:
+            future = asyncio.ensure_future(self._fill(key, loader, self._generation))
+            self._inflight[key] = future
+
+        return await asyncio.shield(future)
+
+    async def _fill(
+        self,
+        key: CacheKey,
+        loader: Callable[[], Awaitable[Optional[DiscountEntity]]],
+        generation: int,
+    ) -> Optional[DiscountEntity]:
+
+        try:
+            discount: Optional[DiscountEntity] = await self._fetch_shared(key)
+
+            if discount is None:
+                discount = await loader()
+
+                if discount and self._generation == generation:
+                    await self._share(discount)
+
+        finally:
+            if self._generation == generation:
+                self._inflight.pop(key, None)
+
+        if discount and self._generation == generation:
+            self._store(discount)
+
+        return discount
+
+    def _store(self, discount: DiscountEntity) -> None:
+
+        self._drop(discount.id)
+
+        self._entries[discount.id] = (discount, time.monotonic() + self.ttl)
+        self._ids[discount.name] = discount.id
+
+        while len(self._entries) > self.max_size:
+            id, _ = next(iter(self._entries.items()))
+            self._drop(id)
+            self.evictions += 1
+
+    def _drop(self, id: int) -> None:
+
+        entry = self._entries.pop(id, None)
+
+        if entry and self._ids.get(entry[0].name) == id:
+            del self._ids[entry[0].name]
+
+    async def _fetch_shared(self, key: CacheKey) -> Optional[DiscountEntity]:
+
+        if self.backend is None:
+            return None
+
+        name: Optional[str] = key if isinstance(key, str) else None
+
+        try:
+            if name is not None:
+                id: Optional[bytes] = await self.backend.get(self._name_key(name))
+
+                if id is None:
+                    return None
+
+                key = int(id)
+
+            data: Optional[bytes] = await self.backend.get(self._id_key(key))
+
+        except Exception as e:
+            logger.warning("Shared cache read failed: %s", e)
+            return None
+
+        if data is None:
+            return None
+
+        fields: dict = json.loads(data)
+
+        if name is not None and fields["name"] != name:
+            return None
+
+        return DiscountEntity(
+            id=fields["id"],
+            name=fields["name"],
+            percentage=Decimal(fields["percentage"]),
+            is_visible=fields["is_visible"],
+            version=fields.get("version", 1),
+            updated_at=(
+                datetime.fromisoformat(fields["updated_at"])
+                if fields.get("updated_at")
+                else None
+            ),
+        )
+
+    async def _share(self, discount: DiscountEntity) -> None:
+
+        if self.backend is None:
+            return
+
+        data: bytes = json.dumps(
+            {
+                "id": discount.id,
+                "name": discount.name,
+                "percentage": str(discount.percentage),
+                "is_visible": discount.is_visible,
+                "version": discount.version,
+                "updated_at": (
+                    discount.updated_at.isoformat() if discount.updated_at else None
+                ),
+            }
+        ).encode()
+
+        try:
+            await self.backend.set(self._id_key(discount.id), data, self.ttl)
+            await self.backend.set(
+                self._name_key(discount.name), str(discount.id).encode(), self.ttl
+            )
+
+        except Exception as e:
+            logger.warning("Shared cache write failed: %s", e)
+
+    @staticmethod
+    def _id_key(id: int) -> str:
+        return f"crm:discount:{id}"
+
+    @staticmethod
+    def _name_key(name: str) -> str:
+        return f"crm:discount:name:{name}"
@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from internal.settings import CACHE_URL, WARMUP
+
+from pkg.crm.infrastructure.cache.cache_backend import CacheBackend
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
+from pkg.crm.infrastructure.cache.redis_cache_backend import RedisCacheBackend
+from pkg.crm.infrastructure.cache.warmup import CacheWarmer, WarmupSettings
+from pkg.crm.infrastructure.persistence.repositories.main import Repository
+
+
+@dataclass(frozen=True, slots=True)
+class Cache:
+    discountCache: DiscountCache
+    warmer: CacheWarmer
+    backend: Optional[CacheBackend] = None
+
+
+class NewCache:
+
+    def __init__(
+        self,
+        repo: Repository,
+        url: Optional[str] = CACHE_URL,
+        warmup: WarmupSettings = WarmupSettings(**WARMUP),
+    ):
+
+        backend: Optional[CacheBackend] = RedisCacheBackend(url) if url else None
+
+        discountCache: DiscountCache = DiscountCache(
+            repository=repo.discountRepo, backend=backend
+        )
+
+        self.caches = Cache(
+            discountCache=discountCache,
+            warmer=CacheWarmer(
+                cache=discountCache, repository=repo.discountRepo, settings=warmup
+            ),
+            backend=backend,
+        )
+
+    def init(self) -> Cache:
+        return self.caches
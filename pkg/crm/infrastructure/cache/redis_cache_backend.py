@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import Optional
+from urllib.parse import urlparse
+
+from pkg.crm.infrastructure.cache.cache_backend import CacheBackend, MessageHandler
+from pkg.crm.infrastructure.cache.resp import (
+    RespError,
+    RespValue,
+    encode_command,
+    read_reply,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Minimal asyncio client for anything speaking the Redis protocol (RESP2)."""
+
+    host: str
+    port: int
+    db: int
+    password: Optional[str]
+    reconnect_delay: float
+
+    def __init__(self, url: str, reconnect_delay: float = 0.5):
+        parsed = urlparse(url)
+
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.reconnect_delay = reconnect_delay
+
+        self._lock = asyncio.Lock()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._command("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._command("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._command("DEL", *keys)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self._command("PUBLISH", channel, message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+
+        while True:
+            writer: Optional[asyncio.StreamWriter] = None
+
+            try:
+                reader, writer = await self._connect()
+
+                writer.write(encode_command("SUBSCRIBE", channel))
+                await writer.drain()
+
+                while True:
+                    reply: RespValue = await read_reply(reader)
+
+                    if isinstance(reply, list) and reply[0] == b"message":
+                        await handler(reply[2])
+
+            except (OSError, asyncio.IncompleteReadError, RespError) as e:
+                logger.warning("Cache subscription to %s lost: %s", channel, e)
+
+                await asyncio.sleep(self.reconnect_delay)
+
+            finally:
+                if writer:
+                    writer.close()
+
+    async def close(self) -> None:
+
+        if self._writer:
+            self._writer.close()
+
+        self._reader = self._writer = None
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+
+        setup: list[tuple] = []
+
+        if self.password:
+            setup.append(("AUTH", self.password))
+
+        if self.db:
+            setup.append(("SELECT", self.db))
+
+        for args in setup:
+            writer.write(encode_command(*args))
+            await writer.drain()
+
+            reply: RespValue = await read_reply(reader)
+
+            if isinstance(reply, RespError):
+                writer.close()
+                raise reply
+
+        return reader, writer
+
+    async def _command(self, *args) -> RespValue:
+
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                self._reader, self._writer = await self._connect()
+
+            try:
+                self._writer.write(encode_command(*args))
+                await self._writer.drain()
+
+                reply: RespValue = await read_reply(self._reader)
+
+            except (OSError, asyncio.IncompleteReadError, asyncio.CancelledError):
+                await self.close()
+                raise
+
+        if isinstance(reply, RespError):
+            raise reply
+
+        return reply
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Union
+
+
+RespValue = Union[None, int, bytes, str, list, Exception]
+
+
+class RespError(Exception):
+    pass
+
+
+def encode_command(*args: Union[str, bytes, int]) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+
+    parts: list[bytes] = [b"*%d\r\n" % len(args)]
+
+    for arg in args:
+        data: bytes = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+
+    return b"".join(parts)
+
+
+def encode_reply(value: Any) -> bytes:
+
+    if value is None:
+        return b"$-1\r\n"
+
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(v) for v in value)
+
+    raise TypeError(f"Cannot encode {type(value).__name__} as RESP")
+
+
+async def read_reply(reader: asyncio.StreamReader) -> RespValue:
+
+    line: bytes = await reader.readuntil(b"\r\n")
+
+    kind, payload = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return payload.decode()
+
+    if kind == b"-":
+        return RespError(payload.decode())
+
+    if kind == b":":
+        return int(payload)
+
+    if kind == b"$":
+        size: int = int(payload)
+
+        if size < 0:
+            return None
+
+        return (await reader.readexactly(size + 2))[:-2]
+
+    if kind == b"*":
+        size = int(payload)
+
+        if size < 0:
+            return None
+
+        return [await read_reply(reader) for _ in range(size)]
+
+    raise RespError(f"Unexpected RESP type byte {kind!r}")
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Optional
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the layout of the file changes.
+SNAPSHOT_FORMAT: int = 2
+
+FIELDS: tuple[str, ...] = tuple(field.name for field in fields(DiscountEntity))
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    discounts: list[DiscountEntity]
+    age: float
+
+
+class CatalogSnapshot:
+    """Discounts kept in a local JSON file, to be read back at the next start.
+
+    A file of another format, or written for other discount fields, is
+    ignored, and so is one older than `max_age` seconds. Rows are stored as
+    lists in the order of `FIELDS`, percentages as decimal strings and times
+    in ISO 8601, so reading a file only ever builds discounts.
+    """
+
+    path: Path
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def load(self, max_age: float) -> Optional[Snapshot]:
+
+        try:
+            with self.path.open("rb") as file:
+                data: Any = json.load(file)
+
+        except FileNotFoundError:
+            return None
+
+        except Exception as e:
+            logger.warning("Unreadable discount snapshot %s: %s", self.path, e)
+            return None
+
+        if (
+            not isinstance(data, dict)
+            or data.get("format") != SNAPSHOT_FORMAT
+            or data.get("fields") != list(FIELDS)
+        ):
+            logger.info("Ignoring discount snapshot %s of another format", self.path)
+            return None
+
+        try:
+            age: float = max(time.time() - data["created_at"], 0.0)
+
+            if age > max_age:
+                return None
+
+            discounts: list[DiscountEntity] = [_decode(row) for row in data["rows"]]
+
+        except Exception as e:
+            logger.warning("Unreadable discount snapshot %s: %s", self.path, e)
+            return None
+
+        return Snapshot(discounts=discounts, age=age)
+
+    def save(self, discounts: list[DiscountEntity]) -> None:
+        """Replace the file in one step, a reader never sees half of it."""
+
+        data: dict = {
+            "format": SNAPSHOT_FORMAT,
+            "fields": FIELDS,
+            "created_at": time.time(),
+            "rows": [_encode(discount) for discount in discounts],
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        partial: Path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+
+        with partial.open("w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+        os.replace(partial, self.path)
+
+
+def _encode(discount: DiscountEntity) -> list:
+    return [
+        discount.id,
+        discount.name,
+        str(discount.percentage),
+        discount.is_visible,
+        discount.version,
+        discount.updated_at.isoformat() if discount.updated_at else None,
+    ]
+
+
+def _decode(row: list) -> DiscountEntity:
+    id, name, percentage, is_visible, version, updated_at = row
+
+    return DiscountEntity(
+        id=int(id),
+        name=str(name),
+        percentage=Decimal(percentage),
+        is_visible=bool(is_visible),
+        version=int(version),
+        updated_at=datetime.fromisoformat(updated_at) if updated_at else None,
+    )
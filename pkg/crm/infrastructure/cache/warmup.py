@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Optional
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
+from pkg.crm.infrastructure.cache.snapshot import CatalogSnapshot, Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class WarmupSettings:
+    enabled: bool = False
+    snapshot: str = ""
+    max_age: float = 86400.0
+    timeout: float = 10.0
+
+
+@dataclass(frozen=True, slots=True)
+class WarmupStats:
+    preloaded: dict[str, int]
+    phases: dict[str, float]
+    snapshot_age: Optional[float]
+
+
+class CacheWarmer:
+    """Fills the discount cache with the visible catalog at startup.
+
+    With a `snapshot` file no older than `max_age` seconds the catalog is
+    read from it first, so reads are answered from memory before the
+    database is. The database is then asked for the catalog in the
+    background, which also opens its connections and runs the hot lookups
+    once on each, and the snapshot is rewritten from the answer. Without a
+    usable snapshot startup waits for that, up to `timeout` seconds.
+
+    Preloaded entries expire after the cache ttl like any other, and only
+    as many as the cache holds are loaded.
+    """
+
+    cache: DiscountCache
+    repository: DiscountRepositoryPort
+    settings: WarmupSettings
+
+    def __init__(
+        self,
+        cache: DiscountCache,
+        repository: DiscountRepositoryPort,
+        settings: WarmupSettings,
+    ):
+        self.cache = cache
+        self.repository = repository
+        self.settings = settings
+
+        self.snapshot: Optional[CatalogSnapshot] = (
+            CatalogSnapshot(settings.snapshot) if settings.snapshot else None
+        )
+
+        # Built while the app is, so "startup" also covers the lifespan hooks
+        # that run before this one.
+        self._created_at: float = time.perf_counter()
+        self._task: Optional[asyncio.Task] = None
+
+        self.preloaded: dict[str, int] = {}
+        self.phases: dict[str, float] = {}
+        self.snapshot_age: Optional[float] = None
+
+    async def start(self) -> None:
+
+        if self._task is not None or not self.settings.enabled:
+            return
+
+        restored: int = await self._restore()
+
+        self._task = asyncio.create_task(self._warm(), name="crm-cache-warmer")
+
+        if not restored:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    asyncio.shield(self._task), self.settings.timeout
+                )
+
+        self.phases["startup"] = time.perf_counter() - self._created_at
+
+        logger.info(
+            "Discount cache warmed in %.3fs: %s",
+            self.phases["startup"],
+            self.preloaded or "nothing preloaded",
+        )
+
+    async def stop(self) -> None:
+
+        if self._task is None:
+            return
+
+        task, self._task = self._task, None
+
+        task.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await task
+
+    def stats(self) -> WarmupStats:
+        return WarmupStats(
+            preloaded=dict(self.preloaded),
+            phases=dict(self.phases),
+            snapshot_age=self.snapshot_age,
+        )
+
+    async def _restore(self) -> int:
+
+        if self.snapshot is None:
+            return 0
+
+        start: float = time.perf_counter()
+
+        self.preloaded["snapshot"] = await self.cache.preload(self._read_snapshot())
+
+        if self.snapshot_age is not None:
+            self.phases["snapshot"] = time.perf_counter() - start
+
+        return self.preloaded["snapshot"]
+
+    async def _read_snapshot(self) -> list[DiscountEntity]:
+
+        snapshot: Optional[Snapshot] = await asyncio.to_thread(
+            self.snapshot.load, self.settings.max_age
+        )
+
+        if snapshot is None:
+            return []
+
+        self.snapshot_age = snapshot.age
+
+        return snapshot.discounts
+
+    async def _warm(self) -> None:
+
+        try:
+            start: float = time.perf_counter()
+
+            await self.repository.warm_up()
+
+            self.phases["connect"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+
+            catalog: asyncio.Future[list[DiscountEntity]] = asyncio.ensure_future(
+                self.repository.get_visible(self.cache.max_size)
+            )
+
+            self.preloaded["database"] = await self.cache.preload(catalog)
+            self.phases["catalog"] = time.perf_counter() - start
+
+        except Exception as e:
+            logger.warning("Discount cache warm-up failed: %s", e)
+            return
+
+        if self.snapshot is not None:
+            try:
+                await asyncio.to_thread(self.snapshot.save, catalog.result())
+            except Exception as e:
+                logger.warning("Discount snapshot could not be written: %s", e)
@@ -6,14 +6,39 @@ logger = logging.getLogger(__name__)
 
 
 class DiscountLogger:
+    """Discount events as structured records, formatted off the request path."""
+
     @staticmethod
     def log_creation(discount: DiscountEntity):
-        logger.info(f"Discount created: {discount.name} ({discount.percentage}%)")
+        logger.info(
+            "Discount created: %s (%s%%)",
+            discount.name,
+            discount.percentage,
+            extra={"fields": DiscountLogger.fields("discount.created", discount)},
+        )
 
     @staticmethod
     def log_update(discount: DiscountEntity):
-        logger.info(f"Discount updated: {discount.name} ({discount.percentage}%)")
+        logger.info(
+            "Discount updated: %s (%s%%)",
+            discount.name,
+            discount.percentage,
+            extra={"fields": DiscountLogger.fields("discount.updated", discount)},
+        )
 
     @staticmethod
     def log_deletion(discount: DiscountEntity):
-        logger.info(f"Discount deleted: {discount.name}")
+        logger.info(
+            "Discount deleted: %s",
+            discount.name,
+            extra={"fields": DiscountLogger.fields("discount.deleted", discount)},
+        )
+
+    @staticmethod
+    def fields(event: str, discount: DiscountEntity) -> dict:
+        return {
+            "event": event,
+            "discount_id": discount.id,
+            "discount_name": discount.name,
+            "percentage": discount.percentage,
+        }
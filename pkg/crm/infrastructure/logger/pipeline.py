@@ -0,0 +1,277 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+from typing import Optional
+
+from pkg.crm.infrastructure.logger.segments import (
+    RotatingSegmentWriter,
+    RotationSettings,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class LogPipelineSettings:
+    file: str = "crm.log"
+    logger: str = "pkg.crm"
+    level: str = "INFO"
+    adopted: tuple[str, ...] = ("app_logger",)
+    queue_size: int = 10000
+    batch_size: int = 256
+    flush_interval: float = 0.5
+    max_bytes: int = 50 * 1024 * 1024
+    rotate_interval: float = 86400.0
+    backup_count: int = 14
+    compression: str = "zstd"
+
+
+@dataclass(frozen=True, slots=True)
+class LogPipelineStats:
+    queued: int
+    written: int
+    dropped: int
+    batches: int
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, its `extra={"fields": {...}}` inlined.
+
+    The `extra_data` onbbu's logger attaches is kept under `extra`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+
+        entry: dict = dict(getattr(record, "fields", None) or {})
+
+        if getattr(record, "extra_data", None):
+            entry["extra"] = record.extra_data
+
+        entry.update(
+            timestamp=datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            level=record.levelname,
+            logger=record.name,
+            message=record.getMessage(),
+        )
+
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records over without formatting them, and drops them when full.
+
+    Formatting is left to the writer thread, so the caller only pays for
+    building the record. Records whose `args` are mutated after the call
+    would log the new values: pass immutable values.
+    """
+
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Ships the crm log records to a file from a dedicated writer thread.
+
+    Records queue up in memory and the thread writes them in batches of up to
+    `batch_size` lines, with one flush per batch. The queue is bounded: once
+    `queue_size` records wait, new ones are dropped and counted rather than
+    blocking the event loop, and the writer reports the drops in the file.
+
+    The file rolls over past `max_bytes` or `rotate_interval` seconds, see
+    `RotatingSegmentWriter`.
+
+    The `adopted` loggers, onbbu's `app_logger` by default, are written to
+    the same file while the pipeline runs. Their own handlers are taken off
+    them until `stop`, so they no longer write a file on the caller's thread.
+    """
+
+    settings: LogPipelineSettings
+
+    def __init__(self, settings: LogPipelineSettings):
+        self.settings = settings
+
+        self.formatter: logging.Formatter = JsonLinesFormatter()
+
+        self.writer: RotatingSegmentWriter = RotatingSegmentWriter(
+            settings.file,
+            RotationSettings(
+                max_bytes=settings.max_bytes,
+                interval=settings.rotate_interval,
+                backup_count=settings.backup_count,
+                compression=settings.compression,
+            ),
+        )
+
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.queue_size)
+        self._handler: DroppingQueueHandler = DroppingQueueHandler(self._queue)
+        self._thread: Optional[threading.Thread] = None
+        self._propagate: bool = True
+        self._adopted: dict[str, tuple[list[logging.Handler], bool]] = {}
+
+        self._reported_drops: int = 0
+        self.written: int = 0
+        self.batches: int = 0
+
+    async def start(self) -> None:
+
+        if self._thread is not None:
+            return
+
+        target: logging.Logger = logging.getLogger(self.settings.logger)
+
+        self._thread = threading.Thread(
+            target=self._run, name="crm-log-writer", daemon=True
+        )
+        self._thread.start()
+
+        target.setLevel(self.settings.level)
+        target.addHandler(self._handler)
+
+        self._propagate, target.propagate = target.propagate, False
+
+        for name in self.settings.adopted:
+            adopted: logging.Logger = logging.getLogger(name)
+
+            self._adopted[name] = (list(adopted.handlers), adopted.propagate)
+
+            for handler in self._adopted[name][0]:
+                adopted.removeHandler(handler)
+
+            adopted.addHandler(self._handler)
+            adopted.propagate = False
+
+    async def stop(self) -> None:
+        """Detach from the logger and wait until the queued records are written."""
+
+        if self._thread is None:
+            return
+
+        target: logging.Logger = logging.getLogger(self.settings.logger)
+
+        target.removeHandler(self._handler)
+        target.propagate = self._propagate
+
+        for name, (handlers, propagate) in self._adopted.items():
+            adopted: logging.Logger = logging.getLogger(name)
+
+            adopted.removeHandler(self._handler)
+            adopted.propagate = propagate
+
+            for handler in handlers:
+                adopted.addHandler(handler)
+
+        self._adopted.clear()
+
+        thread, self._thread = self._thread, None
+
+        await asyncio.to_thread(self._queue.put, None)
+        await asyncio.to_thread(thread.join)
+
+    def stats(self) -> LogPipelineStats:
+        return LogPipelineStats(
+            queued=self._queue.qsize(),
+            written=self.written,
+            dropped=self._handler.dropped,
+            batches=self.batches,
+        )
+
+    def _run(self) -> None:
+
+        running: bool = True
+
+        try:
+            while running:
+                try:
+                    first = self._queue.get(timeout=self.settings.flush_interval)
+                except queue.Empty:
+                    self._report_drops()
+                    self.writer.maybe_rotate()
+                    continue
+
+                batch: list[logging.LogRecord] = []
+                running = self._collect(first, batch)
+
+                while running and len(batch) < self.settings.batch_size:
+                    try:
+                        running = self._collect(self._queue.get_nowait(), batch)
+                    except queue.Empty:
+                        break
+
+                self._write(batch)
+                self._report_drops()
+                self.writer.maybe_rotate()
+
+        finally:
+            self.writer.close()
+
+    @staticmethod
+    def _collect(
+        record: Optional[logging.LogRecord], batch: list[logging.LogRecord]
+    ) -> bool:
+        """Add `record` to the batch, False once the stop marker shows up."""
+
+        if record is None:
+            return False
+
+        batch.append(record)
+
+        return True
+
+    def _write(self, batch: list[logging.LogRecord]) -> None:
+
+        lines: list[str] = []
+
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record) + "\n")
+            except Exception:
+                self._handler.handleError(record)
+
+        if not lines:
+            return
+
+        self.writer.write("".join(lines))
+
+        self.written += len(lines)
+        self.batches += 1
+
+    def _report_drops(self) -> None:
+
+        dropped: int = self._handler.dropped - self._reported_drops
+
+        if not dropped:
+            return
+
+        self._reported_drops += dropped
+
+        record: logging.LogRecord = logging.LogRecord(
+            name=self.settings.logger,
+            level=logging.WARNING,
+            pathname=__file__,
+            lineno=0,
+            msg="Dropped %d log records, the log queue was full",
+            args=(dropped,),
+            exc_info=None,
+        )
+        record.fields = {"dropped": dropped}
+
+        self._write([record])
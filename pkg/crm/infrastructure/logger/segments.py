@@ -0,0 +1,355 @@
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, TextIO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+EXTENSIONS: dict[str, str] = {"gzip": ".gz", "zstd": ".zst"}
+
+INDEX_SUFFIX: str = ".idx"
+
+
+@dataclass(frozen=True, slots=True)
+class RotationSettings:
+    max_bytes: int = 50 * 1024 * 1024
+    interval: float = 86400.0
+    backup_count: int = 14
+    compression: str = "zstd"
+    block_size: int = 256 * 1024
+
+
+def codec(name: str) -> str:
+    """The compression to use, gzip when zstandard is not installed."""
+
+    if name == "zstd" and zstandard is None:
+        return "gzip"
+
+    if name not in EXTENSIONS:
+        raise ValueError(f"Unknown log compression '{name}'")
+
+    return name
+
+
+def parse_timestamp(value: str) -> datetime:
+
+    parsed: datetime = datetime.fromisoformat(value)
+
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def line_timestamp(line: str) -> Optional[datetime]:
+
+    try:
+        return parse_timestamp(json.loads(line)["timestamp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class RotatingSegmentWriter:
+    """Appends to the active log file and rolls it over by size or age.
+
+    A rolled segment is compressed in independent blocks of about
+    `block_size` bytes, gzip members or zstd frames, and gets a sparse index
+    of the first timestamp and offset of every block. A reader can then start
+    decompressing at the block holding the time it looks for.
+
+    Compression runs on a thread of its own so writes go on meanwhile.
+    Segments a previous process rolled but did not compress are picked up
+    when the file is first opened.
+    """
+
+    def __init__(self, path: str, settings: RotationSettings):
+        self.path = Path(path)
+        self.settings = settings
+        self.codec = codec(settings.compression)
+
+        self._stream: Optional[TextIO] = None
+        self._opened: float = 0.0
+        self._archiving: threading.Lock = threading.Lock()
+
+    def write(self, text: str) -> None:
+
+        if self._stream is None:
+            self._open()
+
+        self._stream.write(text)
+        self._stream.flush()
+
+    def maybe_rotate(self) -> None:
+
+        if self._stream is None or not self._stream.tell():
+            return
+
+        too_big: bool = self._stream.tell() >= self.settings.max_bytes
+        too_old: bool = bool(self.settings.interval) and (
+            time.time() - self._opened >= self.settings.interval
+        )
+
+        if too_big or too_old:
+            self.rotate()
+
+    def rotate(self) -> None:
+
+        self.close()
+
+        if not self.path.exists() or not self.path.stat().st_size:
+            return
+
+        name: str = f"{self.path.name}.{time.strftime('%Y%m%d-%H%M%S')}"
+        rolled: Path = self.path.with_name(name)
+        suffix: int = 0
+
+        while any(self.path.parent.glob(f"{rolled.name}*")):
+            suffix += 1
+            rolled = self.path.with_name(f"{name}_{suffix}")
+
+        os.replace(self.path, rolled)
+
+        self._archive()
+
+    def close(self) -> None:
+
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _open(self) -> None:
+
+        first: bool = not self._opened
+
+        self._stream = open(self.path, "a", encoding="utf-8")
+        self._opened = time.time()
+
+        if first and pending_segments(self.path):
+            self._archive()
+
+    def _archive(self) -> None:
+        threading.Thread(target=self._compress_pending, name="crm-log-archiver").start()
+
+    def _compress_pending(self) -> None:
+
+        with self._archiving:
+            for segment in pending_segments(self.path):
+                compress_segment(segment, self.codec, self.settings.block_size)
+
+            # 0 keeps every segment, as with the stdlib rotating handlers.
+            if not self.settings.backup_count:
+                return
+
+            for segment in rotated_segments(self.path)[: -self.settings.backup_count]:
+                segment.unlink(missing_ok=True)
+                index_path(segment).unlink(missing_ok=True)
+
+
+def compress_segment(path: Path, codec: str, block_size: int) -> Path:
+    """Replace `path` by its block-compressed copy and write its index."""
+
+    target: Path = path.with_name(path.name + EXTENSIONS[codec])
+    blocks: list[list] = []
+    last: Optional[str] = None
+
+    with open(path, "rb") as source, open(target, "wb") as output:
+
+        block: list[bytes] = []
+        size: int = 0
+
+        for line in source:
+            if not block:
+                first: Optional[datetime] = line_timestamp(line.decode())
+                blocks.append([first.isoformat() if first else None, output.tell()])
+
+            block.append(line)
+            size += len(line)
+
+            if size >= block_size:
+                output.write(_compress(b"".join(block), codec))
+                last, block, size = line.decode(), [], 0
+
+        if block:
+            output.write(_compress(b"".join(block), codec))
+            last = block[-1].decode()
+
+    end: Optional[datetime] = line_timestamp(last) if last else None
+
+    index_path(target).write_text(
+        json.dumps(
+            {
+                "codec": codec,
+                "last": end.isoformat() if end else None,
+                "blocks": blocks,
+            }
+        )
+    )
+
+    path.unlink()
+
+    return target
+
+
+def index_path(segment: Path) -> Path:
+    return segment.with_name(segment.name + INDEX_SUFFIX)
+
+
+def pending_segments(path: Path) -> list[Path]:
+    """Rolled segments of `path` still waiting to be compressed."""
+
+    return sorted(
+        segment
+        for segment in path.parent.glob(f"{path.name}.*")
+        if segment.suffix not in (*EXTENSIONS.values(), INDEX_SUFFIX)
+    )
+
+
+def rotated_segments(path: Path) -> list[Path]:
+    """Compressed segments of `path`, oldest first."""
+
+    return sorted(
+        segment
+        for segment in path.parent.glob(f"{path.name}.*")
+        if segment.suffix in EXTENSIONS.values()
+    )
+
+
+def read_segments(path: Path, since: Optional[datetime] = None) -> Iterator[str]:
+    """Lines of every segment of `path` in write order, from `since` on.
+
+    Segments that end before `since` are skipped and the others are entered
+    at the indexed block, or bisected when uncompressed. A few earlier lines
+    of that block may still come out.
+    """
+
+    for segment in _readable_segments(path):
+        if segment.suffix in EXTENSIONS.values():
+            yield from _read_compressed(segment, since)
+        else:
+            yield from _read_plain(segment, since)
+
+
+def _readable_segments(path: Path) -> list[Path]:
+    """Every segment in write order, the active file last.
+
+    A segment still being compressed is read from its uncompressed copy.
+    """
+
+    segments: dict[str, Path] = {
+        segment.name.removesuffix(segment.suffix): segment
+        for segment in rotated_segments(path)
+    }
+    segments.update((segment.name, segment) for segment in pending_segments(path))
+
+    ordered: list[Path] = [segments[name] for name in sorted(segments)]
+
+    return ordered + [path] if path.exists() else ordered
+
+
+def _read_plain(segment: Path, since: Optional[datetime]) -> Iterator[str]:
+
+    with open(segment, "rb") as stream:
+        _seek_plain(stream, since)
+
+        for raw in stream:
+            yield raw.decode("utf-8", "replace")
+
+
+def _read_compressed(segment: Path, since: Optional[datetime]) -> Iterator[str]:
+
+    index: dict = {"codec": "gzip" if segment.suffix == ".gz" else "zstd"}
+    index_file: Path = index_path(segment)
+
+    if index_file.exists():
+        index = json.loads(index_file.read_text())
+
+    offset: int = 0
+    blocks: list[list] = index.get("blocks") or []
+
+    if since and blocks:
+        last: Optional[str] = index.get("last")
+
+        if last and parse_timestamp(last) < since:
+            return
+
+        starts: list[datetime] = [
+            (
+                parse_timestamp(first)
+                if first
+                else datetime.min.replace(tzinfo=timezone.utc)
+            )
+            for first, _ in blocks
+        ]
+
+        offset = blocks[max(bisect_right(starts, since) - 1, 0)][1]
+
+    with open(segment, "rb") as stream:
+        stream.seek(offset)
+
+        with io.TextIOWrapper(
+            _decompressing(stream, index["codec"]), encoding="utf-8", errors="replace"
+        ) as text:
+            yield from text
+
+
+def _seek_plain(stream: BinaryIO, since: Optional[datetime]) -> None:
+    """Binary search the uncompressed file for the first line at `since`."""
+
+    if since is None:
+        return
+
+    low: int = 0
+    high: int = stream.seek(0, io.SEEK_END)
+
+    while low < high:
+        middle: int = (low + high) // 2
+
+        stream.seek(middle)
+
+        if middle:
+            stream.readline()
+
+        start: int = stream.tell()
+        line: bytes = stream.readline()
+
+        if not line:
+            high = middle
+            continue
+
+        stamp: Optional[datetime] = line_timestamp(line.decode("utf-8", "replace"))
+
+        if stamp is not None and stamp < since:
+            low = start + len(line)
+        else:
+            high = middle
+
+    stream.seek(low)
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompressing(stream: BinaryIO, codec: str) -> BinaryIO:
+
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("Reading zstd log segments needs zstandard installed")
+
+        return zstandard.ZstdDecompressor().stream_reader(
+            stream, read_across_frames=True
+        )
+
+    return gzip.GzipFile(fileobj=stream)
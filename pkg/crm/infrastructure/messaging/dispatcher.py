@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from tortoise import timezone
+
+from pkg.crm.domain.entities.discount_event_entity import DiscountEventEntity
+from pkg.crm.infrastructure.messaging.sinks import EventSink
+from pkg.crm.infrastructure.persistence.repositories.discount_event_repository import (
+    DiscountEventRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class DispatcherSettings:
+    enabled: bool = True
+    batch_size: int = 100
+    poll_interval: float = 1.0
+    max_backoff: float = 60.0
+    max_attempts: int = 10
+    retention: float = 7 * 86400.0
+    prune_interval: float = 3600.0
+
+
+@dataclass(frozen=True, slots=True)
+class DispatcherStats:
+    dispatched: int
+    batches: int
+    failures: int
+    dead_lettered: int
+    lag: float
+
+
+class OutboxDispatcher:
+    """Publishes the outbox events to every sink from a background task.
+
+    The task wakes up when a write of this process commits, or every
+    `poll_interval` seconds for the writes of other processes, and publishes
+    the pending events in batches of `batch_size`, oldest first. A batch is
+    marked dispatched once every sink took it; when one raises the batch
+    stays pending and the task retries with an exponential backoff capped at
+    `max_backoff` seconds.
+
+    Which event of a failed batch a sink choked on is unknown, so its events
+    are then published one at a time, and only those failures count as
+    attempts. An event that failed `max_attempts` times is dead-lettered:
+    it stays in the outbox undispatched but is no longer claimed, so it
+    cannot hold back the events after it. Resetting its attempts to 0 puts
+    it back in line. A sink that is down for longer than those attempts take
+    dead-letters events too, one at a time.
+
+    Dispatched events are deleted after `retention` seconds, 0 keeps them.
+    """
+
+    repository: DiscountEventRepository
+    sinks: list[EventSink]
+    settings: DispatcherSettings
+
+    def __init__(
+        self,
+        repository: DiscountEventRepository,
+        sinks: list[EventSink],
+        settings: DispatcherSettings,
+    ):
+        self.repository = repository
+        self.sinks = sinks
+        self.settings = settings
+
+        self._task: Optional[asyncio.Task] = None
+        self._stopped: asyncio.Event = asyncio.Event()
+        self._pruned_at: float = 0.0
+
+        # Events left to publish one at a time after a batch failed.
+        self._one_by_one: int = 0
+
+        self.dispatched: int = 0
+        self.batches: int = 0
+        self.failures: int = 0
+        self.dead_lettered: int = 0
+        self.lag: float = 0.0
+
+    async def start(self) -> None:
+
+        if self._task is not None or not self.settings.enabled:
+            return
+
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run(), name="crm-outbox-dispatcher")
+
+    async def stop(self) -> None:
+        """Let the batch in progress finish, pending events wait for the next start."""
+
+        if self._task is None:
+            return
+
+        task, self._task = self._task, None
+
+        self._stopped.set()
+        self.repository.notify()
+
+        await task
+
+    async def dispatch_once(self) -> int:
+        """Publish one batch of pending events, returns how many."""
+
+        events: list[DiscountEventEntity] = []
+
+        try:
+            async with self.repository.claim(
+                1 if self._one_by_one else self.settings.batch_size,
+                self.settings.max_attempts,
+            ) as events:
+                for sink in self.sinks:
+                    await sink.publish(events)
+
+        except Exception:
+            if len(events) > 1:
+                self.failures += 1
+                self._one_by_one = len(events)
+
+            elif events:
+                self.failures += 1
+                await self._record_failure(events[0])
+
+            raise
+
+        if events:
+            self.dispatched += len(events)
+            self.batches += 1
+            self._one_by_one = max(self._one_by_one - len(events), 0)
+
+            if events[0].created_at:
+                self.lag = (timezone.now() - events[0].created_at).total_seconds()
+
+        return len(events)
+
+    def stats(self) -> DispatcherStats:
+        return DispatcherStats(
+            dispatched=self.dispatched,
+            batches=self.batches,
+            failures=self.failures,
+            dead_lettered=self.dead_lettered,
+            lag=self.lag,
+        )
+
+    async def _record_failure(self, event: DiscountEventEntity) -> None:
+
+        await self.repository.record_failure([event.id])
+
+        # 0 retries forever, the event is never dead-lettered.
+        if (
+            not self.settings.max_attempts
+            or event.attempts + 1 < self.settings.max_attempts
+        ):
+            return
+
+        self.dead_lettered += 1
+        self._one_by_one = max(self._one_by_one - 1, 0)
+
+        logger.error(
+            "Discount event %d failed %d times and is dead-lettered",
+            event.id,
+            event.attempts + 1,
+        )
+
+    async def _run(self) -> None:
+
+        backoff: float = self.settings.poll_interval
+
+        while not self._stopped.is_set():
+
+            # Cleared before reading, so a commit made meanwhile wakes us again.
+            self.repository.appended.clear()
+
+            try:
+                dispatched: int = await self.dispatch_once()
+                await self._prune()
+
+            except Exception:
+                logger.exception(
+                    "Dispatching the discount events failed, retrying in %.1fs",
+                    backoff,
+                )
+
+                await self._sleep(self._stopped, backoff)
+                backoff = min(backoff * 2, self.settings.max_backoff)
+                continue
+
+            backoff = self.settings.poll_interval
+
+            if dispatched < self.settings.batch_size:
+                await self._sleep(self.repository.appended, self.settings.poll_interval)
+
+    async def _prune(self) -> None:
+
+        if not self.settings.retention:
+            return
+
+        if time.monotonic() - self._pruned_at < self.settings.prune_interval:
+            return
+
+        self._pruned_at = time.monotonic()
+
+        await self.repository.prune(
+            timezone.now() - timedelta(seconds=self.settings.retention)
+        )
+
+    @staticmethod
+    async def _sleep(wake: asyncio.Event, timeout: float) -> None:
+
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(wake.wait(), timeout)
@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+
+from internal.settings import OUTBOX
+
+from pkg.crm.infrastructure.messaging.dispatcher import (
+    DispatcherSettings,
+    OutboxDispatcher,
+)
+from pkg.crm.infrastructure.messaging.sinks import (
+    EventSink,
+    FileSink,
+    InMemorySink,
+    LogSink,
+)
+from pkg.crm.infrastructure.persistence.repositories.main import Repository
+
+
+@dataclass(frozen=True, slots=True)
+class Messaging:
+    dispatcher: OutboxDispatcher
+    sinks: list[EventSink]
+
+
+class NewMessaging:
+
+    def __init__(
+        self,
+        repo: Repository,
+        sinks: list[str] = OUTBOX["sinks"],
+        file: str = OUTBOX["file"],
+        settings: DispatcherSettings = DispatcherSettings(**OUTBOX["dispatcher"]),
+    ):
+        available: dict = {
+            "log": LogSink,
+            "memory": InMemorySink,
+            "file": lambda: FileSink(file),
+        }
+
+        unknown: list[str] = [name for name in sinks if name not in available]
+
+        if unknown:
+            raise ValueError(f"Unknown outbox sinks: {', '.join(unknown)}")
+
+        created: list[EventSink] = [available[name]() for name in sinks]
+
+        self.messaging = Messaging(
+            dispatcher=OutboxDispatcher(
+                repository=repo.discountEventRepo, sinks=created, settings=settings
+            ),
+            sinks=created,
+        )
+
+    def init(self) -> Messaging:
+        return self.messaging
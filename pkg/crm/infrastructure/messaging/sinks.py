@@ -0,0 +1,87 @@
+import asyncio
+import json
+from pathlib import Path
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.entities.discount_event_entity import (
+    DiscountEventEntity,
+    DiscountEventType,
+)
+from pkg.crm.infrastructure.logger.discount_logger import DiscountLogger
+
+
+class EventSink:
+    """Port for a destination of the outbox events.
+
+    Delivery is at-least-once: an event may be published again when a batch
+    fails midway or the process stops before marking it dispatched, so sinks
+    should treat the event id as an idempotency key.
+    """
+
+    name: str = "sink"
+
+    async def publish(self, events: list[DiscountEventEntity]) -> None:
+        raise NotImplementedError("Subclasses must implement publish()")
+
+
+class InMemorySink(EventSink):
+    """Keeps the published events, for tests."""
+
+    name = "memory"
+
+    def __init__(self):
+        self.events: list[DiscountEventEntity] = []
+
+    async def publish(self, events: list[DiscountEventEntity]) -> None:
+        self.events.extend(events)
+
+
+class FileSink(EventSink):
+    """Appends the events to a file, one JSON object per line."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    async def publish(self, events: list[DiscountEventEntity]) -> None:
+        await asyncio.to_thread(self._write, events)
+
+    def _write(self, events: list[DiscountEventEntity]) -> None:
+
+        lines: str = "".join(
+            json.dumps(
+                {
+                    "id": event.id,
+                    "type": event.type.value,
+                    "discount_id": event.discount_id,
+                    "payload": event.payload,
+                    "created_at": (
+                        event.created_at.isoformat() if event.created_at else None
+                    ),
+                }
+            )
+            + "\n"
+            for event in events
+        )
+
+        with open(self.path, "a", encoding="utf-8") as stream:
+            stream.write(lines)
+
+
+class LogSink(EventSink):
+    """Writes the events to the crm log, as the use cases used to inline."""
+
+    name = "log"
+
+    async def publish(self, events: list[DiscountEventEntity]) -> None:
+
+        for event in events:
+            discount: DiscountEntity = DiscountEntity(**event.payload)
+
+            if event.type is DiscountEventType.CREATED:
+                DiscountLogger.log_creation(discount)
+            elif event.type is DiscountEventType.UPDATED:
+                DiscountLogger.log_update(discount)
+            else:
+                DiscountLogger.log_deletion(discount)
@@ -0,0 +1,370 @@
+import inspect
+import time
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from starlette.responses import Response
+
+from onbbu import HTTPMethod, Request
+
+from pkg.crm.infrastructure.adapters.response_cache import ResponseCache
+from pkg.crm.infrastructure.cache.discount_cache import CacheStats, DiscountCache
+from pkg.crm.infrastructure.cache.warmup import CacheWarmer, WarmupStats
+from pkg.crm.infrastructure.logger.pipeline import LogPipeline, LogPipelineStats
+from pkg.crm.infrastructure.messaging.dispatcher import (
+    DispatcherStats,
+    OutboxDispatcher,
+)
+from pkg.crm.infrastructure.metrics.registry import (
+    Counter,
+    Family,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+)
+from pkg.crm.infrastructure.persistence.batch_loader import (
+    BatchLoader,
+    BatchLoaderStats,
+)
+from pkg.crm.infrastructure.persistence.pool import PoolMonitor, PoolStats
+
+
+class HttpMetrics:
+    """Latency histogram and in-flight gauge of every wrapped route."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.duration: Family[Histogram] = registry.histogram(
+            "crm_http_request_duration_seconds",
+            "Time to produce the response of a crm route.",
+            ("route", "method"),
+        )
+        self.in_flight: Family[Gauge] = registry.gauge(
+            "crm_http_requests_in_flight",
+            "Requests a crm route is currently serving.",
+            ("route", "method"),
+        )
+
+    def wrap(self, endpoint: Any, route: str, method: HTTPMethod) -> Any:
+
+        duration: Histogram = self.duration.labels(route, method.value)
+        in_flight: Gauge = self.in_flight.labels(route, method.value)
+
+        @wraps(endpoint)
+        async def measured(request: Request) -> Response:
+
+            in_flight.inc()
+            start: float = time.perf_counter()
+
+            try:
+                return await endpoint(request)
+
+            finally:
+                duration.observe(time.perf_counter() - start)
+                in_flight.dec()
+
+        return measured
+
+
+def instrument_repository(
+    registry: MetricsRegistry, repository: Any, name: str
+) -> None:
+    """Time every public coroutine method of `repository`, per method.
+
+    Streaming methods are left alone, their duration is the client's pace.
+    """
+
+    duration: Family[Histogram] = registry.histogram(
+        "crm_db_query_duration_seconds",
+        "Time spent in a repository method, its queries included.",
+        ("repository", "method"),
+    )
+    errors: Family[Counter] = registry.counter(
+        "crm_db_query_errors_total",
+        "Repository method calls that raised.",
+        ("repository", "method"),
+    )
+
+    for method_name, method in inspect.getmembers(
+        repository, inspect.iscoroutinefunction
+    ):
+        if method_name.startswith("_"):
+            continue
+
+        setattr(
+            repository,
+            method_name,
+            _measured(
+                method,
+                duration.labels(name, method_name),
+                errors.labels(name, method_name),
+            ),
+        )
+
+
+def instrument_use_cases(registry: MetricsRegistry, service: Any) -> None:
+    """Count the calls and the errors of the use cases a service holds."""
+
+    calls: Family[Counter] = registry.counter(
+        "crm_usecase_calls_total", "Use case executions.", ("usecase",)
+    )
+    errors: Family[Counter] = registry.counter(
+        "crm_usecase_errors_total",
+        "Use case executions that raised, by exception type.",
+        ("usecase", "error"),
+    )
+
+    for use_case in vars(service).values():
+        execute: Optional[Callable[..., Any]] = getattr(use_case, "execute", None)
+
+        if not inspect.iscoroutinefunction(execute):
+            continue
+
+        name: str = type(use_case).__name__
+
+        use_case.execute = _counted(execute, calls.labels(name), errors, name)
+
+
+def collect_pool(registry: MetricsRegistry, pool: PoolMonitor) -> None:
+
+    connections: Family[Gauge] = registry.gauge(
+        "crm_db_pool_connections",
+        "Connections of the database pool, by state.",
+        ("state",),
+    )
+    max_size: Gauge = registry.gauge(
+        "crm_db_pool_max_size", "Connections the database pool may open."
+    ).labels()
+    acquired: Counter = registry.counter(
+        "crm_db_pool_acquired_total", "Connections checked out of the pool."
+    ).labels()
+    timeouts: Counter = registry.counter(
+        "crm_db_pool_acquire_timeouts_total",
+        "Checkouts that gave up waiting for a connection.",
+    ).labels()
+    wait: Counter = registry.counter(
+        "crm_db_pool_acquire_wait_seconds_total",
+        "Time spent waiting for a pooled connection.",
+    ).labels()
+
+    in_use: Gauge = connections.labels("in_use")
+    idle: Gauge = connections.labels("idle")
+
+    def collect() -> None:
+
+        stats: PoolStats = pool.stats()
+
+        in_use.set(stats.in_use)
+        idle.set(stats.idle)
+        max_size.set(stats.max_size)
+        acquired.set_total(stats.acquired)
+        timeouts.set_total(stats.acquire_timeouts)
+        wait.set_total(stats.acquire_wait_seconds)
+
+    registry.collector(collect)
+
+
+def collect_batching(
+    registry: MetricsRegistry, loaders: tuple[BatchLoader, ...]
+) -> None:
+
+    loads: Counter = registry.counter(
+        "crm_db_batched_lookups_total", "Lookups by id handed to a batch loader."
+    ).labels()
+    keys: Counter = registry.counter(
+        "crm_db_batched_keys_total", "Distinct ids the batched queries asked for."
+    ).labels()
+    batches: Counter = registry.counter(
+        "crm_db_lookup_batches_total", "Queries the batch loaders sent."
+    ).labels()
+
+    def collect() -> None:
+
+        stats: list[BatchLoaderStats] = [loader.stats() for loader in loaders]
+
+        loads.set_total(sum(s.loads for s in stats))
+        keys.set_total(sum(s.keys for s in stats))
+        batches.set_total(sum(s.batches for s in stats))
+
+    registry.collector(collect)
+
+
+def collect_caches(
+    registry: MetricsRegistry,
+    discount_cache: DiscountCache,
+    response_cache: Optional[ResponseCache] = None,
+) -> None:
+
+    hits: Family[Counter] = registry.counter(
+        "crm_cache_hits_total", "Lookups answered by a cache.", ("cache",)
+    )
+    misses: Family[Counter] = registry.counter(
+        "crm_cache_misses_total", "Lookups a cache could not answer.", ("cache",)
+    )
+    ratio: Family[Gauge] = registry.gauge(
+        "crm_cache_hit_ratio",
+        "Share of the lookups answered by a cache since start.",
+        ("cache",),
+    )
+    entries: Family[Gauge] = registry.gauge(
+        "crm_cache_entries", "Entries a cache holds.", ("cache",)
+    )
+    evictions: Counter = registry.counter(
+        "crm_cache_evictions_total",
+        "Entries dropped to make room, by cache.",
+        ("cache",),
+    ).labels("discounts")
+    expirations: Counter = registry.counter(
+        "crm_cache_expirations_total",
+        "Entries dropped once their ttl passed, by cache.",
+        ("cache",),
+    ).labels("discounts")
+
+    def mirror(cache: str, hit: int, miss: int, size: int) -> None:
+        hits.labels(cache).set_total(hit)
+        misses.labels(cache).set_total(miss)
+        ratio.labels(cache).set(hit / (hit + miss) if hit + miss else 0.0)
+        entries.labels(cache).set(size)
+
+    def collect() -> None:
+
+        stats: CacheStats = discount_cache.stats()
+
+        mirror("discounts", stats.hits, stats.misses, stats.size)
+        evictions.set_total(stats.evictions)
+        expirations.set_total(stats.expirations)
+
+        if response_cache is not None:
+            mirror(
+                "responses",
+                response_cache.hits,
+                response_cache.misses,
+                response_cache.size,
+            )
+
+    registry.collector(collect)
+
+
+def collect_warmup(registry: MetricsRegistry, warmer: CacheWarmer) -> None:
+
+    phases: Family[Gauge] = registry.gauge(
+        "crm_boot_phase_seconds",
+        "Time the startup warm-up spent in each phase.",
+        ("phase",),
+    )
+    preloaded: Family[Gauge] = registry.gauge(
+        "crm_boot_preloaded_discounts",
+        "Discounts put in the cache at startup, by source.",
+        ("source",),
+    )
+    snapshot_age: Gauge = registry.gauge(
+        "crm_boot_snapshot_age_seconds",
+        "Age of the catalog snapshot read at startup.",
+    ).labels()
+
+    def collect() -> None:
+
+        stats: WarmupStats = warmer.stats()
+
+        for phase, seconds in stats.phases.items():
+            phases.labels(phase).set(seconds)
+
+        for source, count in stats.preloaded.items():
+            preloaded.labels(source).set(count)
+
+        if stats.snapshot_age is not None:
+            snapshot_age.set(stats.snapshot_age)
+
+    registry.collector(collect)
+
+
+def collect_logs(registry: MetricsRegistry, logs: LogPipeline) -> None:
+
+    queued: Gauge = registry.gauge(
+        "crm_log_queue_depth", "Log records waiting for the writer thread."
+    ).labels()
+    written: Counter = registry.counter(
+        "crm_log_records_written_total", "Log records written to the file."
+    ).labels()
+    dropped: Counter = registry.counter(
+        "crm_log_records_dropped_total", "Log records dropped, the queue was full."
+    ).labels()
+
+    def collect() -> None:
+
+        stats: LogPipelineStats = logs.stats()
+
+        queued.set(stats.queued)
+        written.set_total(stats.written)
+        dropped.set_total(stats.dropped)
+
+    registry.collector(collect)
+
+
+def collect_outbox(registry: MetricsRegistry, dispatcher: OutboxDispatcher) -> None:
+
+    dispatched: Counter = registry.counter(
+        "crm_outbox_events_dispatched_total", "Outbox events published to the sinks."
+    ).labels()
+    failures: Counter = registry.counter(
+        "crm_outbox_dispatch_failures_total", "Outbox batches a sink failed to take."
+    ).labels()
+    dead_lettered: Counter = registry.counter(
+        "crm_outbox_events_dead_lettered_total",
+        "Outbox events given up on after failing max_attempts times.",
+    ).labels()
+    lag: Gauge = registry.gauge(
+        "crm_outbox_lag_seconds",
+        "Age of the oldest event of the last batch when it was dispatched.",
+    ).labels()
+
+    def collect() -> None:
+
+        stats: DispatcherStats = dispatcher.stats()
+
+        dispatched.set_total(stats.dispatched)
+        failures.set_total(stats.failures)
+        dead_lettered.set_total(stats.dead_lettered)
+        lag.set(stats.lag)
+
+    registry.collector(collect)
+
+
+def _measured(
+    method: Callable[..., Any], duration: Histogram, errors: Counter
+) -> Callable[..., Any]:
+
+    @wraps(method)
+    async def measured(*args: Any, **kwargs: Any) -> Any:
+
+        start: float = time.perf_counter()
+
+        try:
+            return await method(*args, **kwargs)
+
+        except Exception:
+            errors.inc()
+            raise
+
+        finally:
+            duration.observe(time.perf_counter() - start)
+
+    return measured
+
+
+def _counted(
+    execute: Callable[..., Any], calls: Counter, errors: Family[Counter], name: str
+) -> Callable[..., Any]:
+
+    @wraps(execute)
+    async def counted(*args: Any, **kwargs: Any) -> Any:
+
+        calls.inc()
+
+        try:
+            return await execute(*args, **kwargs)
+
+        except Exception as e:
+            errors.labels(name, type(e).__name__).inc()
+            raise
+
+    return counted
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from pkg.crm.domain.services.main import ServiceRegistry
+
+from pkg.crm.infrastructure.adapters.response_cache import ResponseCache
+from pkg.crm.infrastructure.cache.main import Cache
+from pkg.crm.infrastructure.logger.pipeline import LogPipeline
+from pkg.crm.infrastructure.messaging.main import Messaging
+from pkg.crm.infrastructure.metrics.instrumentation import (
+    HttpMetrics,
+    collect_batching,
+    collect_caches,
+    collect_logs,
+    collect_outbox,
+    collect_pool,
+    collect_warmup,
+    instrument_repository,
+    instrument_use_cases,
+)
+from pkg.crm.infrastructure.metrics.registry import MetricsRegistry
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+from pkg.crm.infrastructure.persistence.repositories.main import Repository
+
+
+@dataclass(frozen=True, slots=True)
+class Metrics:
+    registry: MetricsRegistry
+    http: HttpMetrics
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsContext:
+    Repo: Repository
+    Cache: Cache
+    Service: ServiceRegistry
+    ResponseCache: Optional[ResponseCache] = None
+    Logs: Optional[LogPipeline] = None
+    Messaging: Optional[Messaging] = None
+
+
+class NewMetrics:
+
+    def __init__(self, ctx: MetricsContext):
+
+        registry: MetricsRegistry = MetricsRegistry()
+
+        instrument_repository(registry, ctx.Repo.discountRepo, "discounts")
+        instrument_repository(registry, ctx.Repo.discountEventRepo, "discount_events")
+        instrument_use_cases(registry, ctx.Service.discountService)
+
+        collect_pool(registry, ctx.Repo.pool)
+
+        if (
+            isinstance(ctx.Repo.discountRepo, DiscountRepository)
+            and ctx.Repo.discountRepo.loaders
+        ):
+            collect_batching(registry, ctx.Repo.discountRepo.loaders)
+
+        collect_caches(registry, ctx.Cache.discountCache, ctx.ResponseCache)
+
+        if ctx.Cache.warmer.settings.enabled:
+            collect_warmup(registry, ctx.Cache.warmer)
+
+        if ctx.Logs:
+            collect_logs(registry, ctx.Logs)
+
+        if ctx.Messaging:
+            collect_outbox(registry, ctx.Messaging.dispatcher)
+
+        self.metrics = Metrics(registry=registry, http=HttpMetrics(registry))
+
+    def init(self) -> Metrics:
+        return self.metrics
@@ -0,0 +1,212 @@
+from bisect import bisect_left
+from typing import Callable, Generic, Iterator, TypeVar, Union
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Number = Union[int, float]
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value: Number = 0
+
+    def inc(self, amount: Number = 1) -> None:
+        self.value += amount
+
+    def set_total(self, value: Number) -> None:
+        """Mirror a total kept elsewhere, e.g. a cache's own hit count."""
+        self.value = value
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value: Number = 0
+
+    def inc(self, amount: Number = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: Number = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: Number) -> None:
+        self.value = value
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts: list[int] = [0] * (len(bounds) + 1)
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+Child = TypeVar("Child", Counter, Gauge, Histogram)
+
+
+class Family(Generic[Child]):
+    """One metric name and its children, one per set of label values.
+
+    Look children up once and keep them: `labels()` is for wiring, the hot
+    path only touches the child.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        label_names: tuple[str, ...],
+        factory: Callable[[], Child],
+    ):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.label_names = label_names
+        self.factory = factory
+
+        self.children: dict[tuple[str, ...], tuple[str, Child]] = {}
+
+    def labels(self, *values: object) -> Child:
+
+        key: tuple[str, ...] = tuple(map(str, values))
+
+        if len(key) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+
+        entry = self.children.get(key)
+
+        if entry is None:
+            entry = self.children[key] = (
+                _label_pairs(self.label_names, key),
+                self.factory(),
+            )
+
+        return entry[1]
+
+    def render(self) -> Iterator[str]:
+
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+
+        for pairs, child in self.children.values():
+
+            if not isinstance(child, Histogram):
+                yield f"{self.name}{_braces(pairs)} {child.value}"
+                continue
+
+            cumulative: int = 0
+
+            for bound, count in zip(child.bounds, child.counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_bucket(pairs, repr(bound))} {cumulative}"
+
+            cumulative += child.counts[-1]
+
+            yield f"{self.name}_bucket{_bucket(pairs, '+Inf')} {cumulative}"
+            yield f"{self.name}_sum{_braces(pairs)} {child.sum}"
+            yield f"{self.name}_count{_braces(pairs)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Metrics in the Prometheus text exposition format.
+
+    Children are plain attribute updates with no lock: they are only touched
+    from the event loop thread. Collectors refresh the metrics mirrored from
+    other components right before each scrape.
+    """
+
+    def __init__(self):
+        self.families: dict[str, Family] = {}
+        self.collectors: list[Callable[[], None]] = []
+
+    def counter(
+        self, name: str, help: str, labels: tuple[str, ...] = ()
+    ) -> Family[Counter]:
+        return self._family(name, help, "counter", labels, Counter)
+
+    def gauge(
+        self, name: str, help: str, labels: tuple[str, ...] = ()
+    ) -> Family[Gauge]:
+        return self._family(name, help, "gauge", labels, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Family[Histogram]:
+        bounds: tuple[float, ...] = tuple(sorted(buckets))
+
+        return self._family(name, help, "histogram", labels, lambda: Histogram(bounds))
+
+    def collector(self, collect: Callable[[], None]) -> None:
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+
+        for collect in self.collectors:
+            collect()
+
+        lines: list[str] = [
+            line for family in self.families.values() for line in family.render()
+        ]
+
+        return "\n".join(lines) + "\n"
+
+    def _family(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        labels: tuple[str, ...],
+        factory: Callable[[], Child],
+    ) -> Family[Child]:
+
+        family: Family = self.families.get(name) or Family(
+            name, help, type, labels, factory
+        )
+
+        if family.type != type or family.label_names != labels:
+            raise ValueError(f"Metric {name} is already registered differently")
+
+        self.families[name] = family
+
+        return family
+
+
+def _label_pairs(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _braces(pairs: str) -> str:
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _bucket(pairs: str, bound: str) -> str:
+    return _braces(f'{pairs},le="{bound}"' if pairs else f'le="{bound}"')
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,133 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass(frozen=True, slots=True)
+class BatchLoaderStats:
+    loads: int
+    keys: int
+    batches: int
+
+
+class BatchLoader(Generic[K, V]):
+    """Coalesces concurrent single-key lookups into one `load_many` call.
+
+    Keys asked for during the same event loop iteration, or within `window`
+    seconds of the first one when it is set, are fetched together once the
+    loop gets back to the batch. A key asked for twice in a batch is fetched
+    once. `load_many` returns what it found by key, missing keys load as None.
+    A batch is sent early once it holds `max_batch` keys. `stop` cancels the
+    batches in flight and the lookups still waiting for one.
+    """
+
+    load_many: Callable[[list[K]], Awaitable[dict[K, V]]]
+    window: float
+    max_batch: int
+
+    def __init__(
+        self,
+        load_many: Callable[[list[K]], Awaitable[dict[K, V]]],
+        window: float = 0.0,
+        max_batch: int = 500,
+    ):
+        self.load_many = load_many
+        self.window = window
+        self.max_batch = max_batch
+
+        self._pending: dict[K, asyncio.Future] = {}
+        self._handle: Optional[asyncio.Handle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+        self.loads: int = 0
+        self.keys: int = 0
+        self.batches: int = 0
+
+    async def load(self, key: K) -> Optional[V]:
+
+        self.loads += 1
+
+        future: Optional[asyncio.Future] = self._pending.get(key)
+
+        if future is None:
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+            future = loop.create_future()
+            self._pending[key] = future
+
+            if len(self._pending) >= self.max_batch:
+                self._dispatch()
+
+            elif self._handle is None:
+                self._handle = (
+                    loop.call_later(self.window, self._dispatch)
+                    if self.window
+                    else loop.call_soon(self._dispatch)
+                )
+
+        # A caller that gives up must not cancel the lookup of the others.
+        return await asyncio.shield(future)
+
+    async def stop(self) -> None:
+
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        batch, self._pending = self._pending, {}
+
+        for future in batch.values():
+            future.cancel()
+
+        tasks: list[asyncio.Task] = list(self._tasks)
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> BatchLoaderStats:
+        return BatchLoaderStats(loads=self.loads, keys=self.keys, batches=self.batches)
+
+    def _dispatch(self) -> None:
+
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        batch, self._pending = self._pending, {}
+
+        if batch:
+            # The loop only keeps a weak reference to its tasks.
+            task: asyncio.Task = asyncio.create_task(self._run(batch))
+
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future]) -> None:
+
+        self.keys += len(batch)
+        self.batches += 1
+
+        try:
+            found: dict[K, V] = await self.load_many(list(batch))
+
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+
+            raise
+
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(key))
@@ -0,0 +1,35 @@
+"""Adds the `version` and `updated_at` columns read by conditional requests."""
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from pkg.crm.infrastructure.persistence.migrations.schema import columns
+
+NAME: str = "0001_discount_versioning"
+
+TIMESTAMP: dict[str, str] = {
+    "postgres": "TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP",
+    "mysql": "DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)",
+    # SQLite only accepts constant defaults when adding a column.
+    "sqlite": "TIMESTAMP",
+}
+
+
+async def upgrade(db: BaseDBAsyncClient) -> None:
+
+    dialect: str = db.capabilities.dialect
+    existing: set[str] = await columns(db, "crm_discounts")
+
+    if "version" not in existing:
+        await db.execute_script(
+            "ALTER TABLE crm_discounts ADD COLUMN version INT NOT NULL DEFAULT 1"
+        )
+
+    if "updated_at" not in existing:
+        await db.execute_script(
+            f"ALTER TABLE crm_discounts ADD COLUMN updated_at {TIMESTAMP[dialect]}"
+        )
+
+        if dialect == "sqlite":
+            await db.execute_script(
+                "UPDATE crm_discounts SET updated_at = CURRENT_TIMESTAMP"
+            )
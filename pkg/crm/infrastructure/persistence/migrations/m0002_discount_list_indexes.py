@@ -0,0 +1,42 @@
+"""Indexes behind the filters, sorts and search of the discount list.
+
+`(is_visible, percentage, id)` serves the visibility filter with a percentage
+range and the percentage sort, id breaking ties. On PostgreSQL a trigram
+index serves `q`, which Tortoise renders as
+`UPPER(CAST(name AS VARCHAR)) LIKE UPPER('%q%')`; the index is built on that
+exact expression. MySQL and SQLite have no equivalent and keep scanning the
+name index for substring search.
+"""
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from pkg.crm.infrastructure.persistence.migrations.schema import indexes
+
+NAME: str = "0002_discount_list_indexes"
+
+# PostgreSQL builds these without locking writes, which cannot happen inside a
+# transaction.
+ATOMIC: bool = False
+
+
+async def upgrade(db: BaseDBAsyncClient) -> None:
+
+    dialect: str = db.capabilities.dialect
+
+    if dialect == "postgres":
+        await db.execute_script(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS crm_discounts_visible_pct_id_idx "
+            "ON crm_discounts (is_visible, percentage, id)"
+        )
+        await db.execute_script("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        await db.execute_script(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS crm_discounts_name_trgm_idx "
+            "ON crm_discounts USING gin (UPPER(CAST(name AS VARCHAR)) gin_trgm_ops)"
+        )
+        return
+
+    if "crm_discounts_visible_pct_id_idx" not in await indexes(db, "crm_discounts"):
+        await db.execute_script(
+            "CREATE INDEX crm_discounts_visible_pct_id_idx "
+            "ON crm_discounts (is_visible, percentage, id)"
+        )
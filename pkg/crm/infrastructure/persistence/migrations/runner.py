@@ -0,0 +1,69 @@
+import logging
+from types import ModuleType
+
+from pypika_tortoise import Table
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from pkg.crm.infrastructure.persistence.migrations import (
+    m0001_discount_versioning,
+    m0002_discount_list_indexes,
+)
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS: tuple[ModuleType, ...] = (
+    m0001_discount_versioning,
+    m0002_discount_list_indexes,
+)
+
+HISTORY: str = "crm_migrations"
+
+
+async def migrate(db: BaseDBAsyncClient) -> list[str]:
+    """Apply pending migrations in order and return the names applied.
+
+    Each migration module has a `NAME` and an `upgrade(db)` coroutine and is
+    recorded in `crm_migrations` once it succeeds. Migrations run in a
+    transaction unless they set `ATOMIC = False`, they are written to be safe
+    to run again if interrupted.
+    """
+
+    await db.execute_script(
+        f"CREATE TABLE IF NOT EXISTS {HISTORY} ("
+        "name VARCHAR(100) NOT NULL PRIMARY KEY, "
+        "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+
+    applied: set[str] = {
+        row["name"]
+        for row in await db.execute_query_dict(f"SELECT name FROM {HISTORY}")
+    }
+
+    done: list[str] = []
+
+    for migration in MIGRATIONS:
+
+        if migration.NAME in applied:
+            continue
+
+        logger.info("Applying migration %s", migration.NAME)
+
+        record: str = (
+            db.query_class.into(Table(HISTORY))
+            .columns("name")
+            .insert(migration.NAME)
+            .get_sql()
+        )
+
+        if getattr(migration, "ATOMIC", True):
+            async with in_transaction(db.connection_name) as connection:
+                await migration.upgrade(connection)
+                await connection.execute_script(record)
+        else:
+            await migration.upgrade(db)
+            await db.execute_script(record)
+
+        done.append(migration.NAME)
+
+    return done
@@ -0,0 +1,44 @@
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+
+async def columns(db: BaseDBAsyncClient, table: str) -> set[str]:
+
+    dialect: str = db.capabilities.dialect
+
+    if dialect == "sqlite":
+        rows: list[dict] = await db.execute_query_dict(f'PRAGMA table_info("{table}")')
+
+        return {row["name"] for row in rows}
+
+    schema: str = "DATABASE()" if dialect == "mysql" else "current_schema()"
+
+    rows = await db.execute_query_dict(
+        "SELECT column_name AS name FROM information_schema.columns "
+        f"WHERE table_schema = {schema} AND table_name = '{table}'"
+    )
+
+    return {row["name"] for row in rows}
+
+
+async def indexes(db: BaseDBAsyncClient, table: str) -> set[str]:
+
+    dialect: str = db.capabilities.dialect
+
+    if dialect == "sqlite":
+        rows: list[dict] = await db.execute_query_dict(f'PRAGMA index_list("{table}")')
+
+        return {row["name"] for row in rows}
+
+    if dialect == "mysql":
+        rows = await db.execute_query_dict(
+            "SELECT DISTINCT index_name AS name FROM information_schema.statistics "
+            f"WHERE table_schema = DATABASE() AND table_name = '{table}'"
+        )
+
+        return {row["name"] for row in rows}
+
+    rows = await db.execute_query_dict(
+        f"SELECT indexname AS name FROM pg_indexes WHERE tablename = '{table}'"
+    )
+
+    return {row["name"] for row in rows}
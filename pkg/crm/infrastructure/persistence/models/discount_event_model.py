@@ -0,0 +1,21 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class DiscountEventModel(Model):
+    """Outbox row, written in the transaction of the change it describes."""
+
+    id = fields.BigIntField(pk=True)
+    type = fields.CharField(max_length=32)
+    discount_id = fields.IntField()
+    payload = fields.JSONField()
+    created_at = fields.DatetimeField(auto_now_add=True)
+    dispatched_at = fields.DatetimeField(null=True)
+    attempts = fields.IntField(default=0)
+
+    class Meta:
+        table = "crm_discount_events"
+        indexes = (("dispatched_at", "id"),)
+
+    def __repr__(self):
+        return f"<DiscountEvent(id={self.id}, type={self.type}, discount_id={self.discount_id})>"
@@ -0,0 +1,15 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class DiscountEventWatermarkModel(Model):
+    """Highest outbox id a pass over the events went through, by pass name."""
+
+    name = fields.CharField(max_length=32, pk=True)
+    event_id = fields.BigIntField(default=0)
+
+    class Meta:
+        table = "crm_discount_event_watermarks"
+
+    def __repr__(self):
+        return f"<DiscountEventWatermark(name={self.name}, event_id={self.event_id})>"
@@ -7,9 +7,22 @@ class DiscountModel(Model):
     name = fields.CharField(max_length=45, unique=True)
     percentage = fields.DecimalField(max_digits=30, decimal_places=5)
     is_visible = fields.BooleanField(default=True)
+    version = fields.IntField(default=1)
+    updated_at = fields.DatetimeField(auto_now=True)
 
     class Meta:
         table = "crm_discounts"
+        indexes = (("percentage", "id"),)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "percentage": self.percentage,
+            "is_visible": self.is_visible,
+            "version": self.version,
+            "updated_at": self.updated_at,
+        }
 
     def __repr__(self):
         return f"<Discount(name={self.name}, percentage={self.percentage}%, is_visible={self.is_visible})>"
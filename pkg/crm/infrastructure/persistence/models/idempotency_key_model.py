@@ -0,0 +1,17 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class IdempotencyKeyModel(Model):
+    """Outcome of a create sent with an Idempotency-Key, replayed to retries."""
+
+    key = fields.CharField(max_length=255, pk=True)
+    fingerprint = fields.CharField(max_length=64)
+    discount = fields.JSONField(null=True)
+    created_at = fields.DatetimeField(index=True)
+
+    class Meta:
+        table = "crm_idempotency_keys"
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key={self.key})>"
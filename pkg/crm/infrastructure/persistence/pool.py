@@ -0,0 +1,147 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import DBConnectionError
+
+
+@dataclass(frozen=True, slots=True)
+class PoolSettings:
+    min_size: int = 1
+    max_size: int = 10
+    acquire_timeout: float = 10.0
+    max_queries: int = 50000
+    statement_timeout: float = 30.0
+
+
+@dataclass(frozen=True, slots=True)
+class PoolStats:
+    size: int
+    max_size: int
+    in_use: int
+    idle: int
+    acquired: int
+    acquire_timeouts: int
+    acquire_wait_seconds: float
+    acquire_wait_max_seconds: float
+
+
+class InstrumentedPool:
+    """Proxy over a driver pool that times and counts every acquire."""
+
+    def __init__(self, pool: Any, monitor: "PoolMonitor"):
+        self._pool = pool
+        self._monitor = monitor
+
+    async def acquire(self) -> Any:
+
+        monitor: PoolMonitor = self._monitor
+        start: float = time.perf_counter()
+
+        try:
+            connection = await asyncio.wait_for(
+                self._checkout(), monitor.settings.acquire_timeout
+            )
+
+        except asyncio.TimeoutError as e:
+            monitor.acquire_timeouts += 1
+
+            raise DBConnectionError(
+                f"Timed out after {monitor.settings.acquire_timeout}s "
+                f"waiting for a connection on '{monitor.alias}'"
+            ) from e
+
+        wait: float = time.perf_counter() - start
+
+        monitor.acquired += 1
+        monitor.in_use += 1
+        monitor.acquire_wait_seconds += wait
+        monitor.acquire_wait_max_seconds = max(monitor.acquire_wait_max_seconds, wait)
+
+        return connection
+
+    async def release(self, connection: Any) -> None:
+        self._monitor.in_use -= 1
+        await self._pool.release(connection)
+
+    async def _checkout(self) -> Any:
+        return await self._pool.acquire()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+
+class PoolMonitor:
+    """Sizes the pool behind a Tortoise connection and keeps its gauges.
+
+    `configure` must run once Tortoise is initialised and before the first
+    query, the pool itself is only created on first use. SQLite has no pool,
+    there the settings are ignored and the gauges stay at zero.
+    """
+
+    alias: str
+    settings: PoolSettings
+
+    def __init__(self, settings: PoolSettings, alias: str = "default"):
+        self.alias = alias
+        self.settings = settings
+
+        self._client: Optional[BaseDBAsyncClient] = None
+
+        self.in_use = 0
+        self.acquired = 0
+        self.acquire_timeouts = 0
+        self.acquire_wait_seconds = 0.0
+        self.acquire_wait_max_seconds = 0.0
+
+    async def configure(self) -> None:
+
+        client: BaseDBAsyncClient = connections.get(self.alias)
+
+        if not hasattr(client, "pool_maxsize"):
+            return
+
+        client.pool_minsize = self.settings.min_size
+        client.pool_maxsize = self.settings.max_size
+
+        timeout_ms: int = int(self.settings.statement_timeout * 1000)
+
+        client.extra["max_queries"] = self.settings.max_queries
+        client.server_settings["statement_timeout"] = str(timeout_ms)
+
+        create_connection = client.create_connection
+
+        async def instrumented_create_connection(with_db: bool) -> None:
+            await create_connection(with_db)
+            client._pool = InstrumentedPool(client._pool, self)
+
+        client.create_connection = instrumented_create_connection
+
+        self._client = client
+
+    def stats(self) -> PoolStats:
+
+        pool: Any = getattr(getattr(self._client, "_pool", None), "_pool", None)
+
+        size: int = 0
+        idle: int = 0
+
+        if hasattr(pool, "get_size"):
+            size, idle = pool.get_size(), pool.get_idle_size()
+
+        elif pool is not None:
+            size, idle = pool.size, pool.freesize
+
+        return PoolStats(
+            size=size,
+            max_size=self.settings.max_size if self._client else 0,
+            in_use=self.in_use,
+            idle=idle,
+            acquired=self.acquired,
+            acquire_timeouts=self.acquire_timeouts,
+            acquire_wait_seconds=self.acquire_wait_seconds,
+            acquire_wait_max_seconds=self.acquire_wait_max_seconds,
+        )
@@ -0,0 +1,44 @@
+import json
+from typing import Any
+
+
+def sequential_scans(plan: Any, dialect: str, table: str) -> list[str]:
+    """Nodes of an `explain()` result that read every row of `table`."""
+
+    if dialect == "sqlite":
+        return [
+            row["detail"]
+            for row in plan
+            if row["detail"].startswith(f"SCAN {table}")
+            and "INDEX" not in row["detail"]
+        ]
+
+    found: list[str] = []
+
+    def walk(node: Any) -> None:
+
+        if isinstance(node, list):
+            for item in node:
+                walk(item)
+
+        elif isinstance(node, dict):
+            if dialect == "postgres" and (
+                node.get("Node Type") == "Seq Scan"
+                and node.get("Relation Name") == table
+            ):
+                found.append(f"Seq Scan on {table}")
+
+            if dialect == "mysql" and (
+                node.get("table_name") == table and node.get("access_type") == "ALL"
+            ):
+                found.append(f"Full table scan on {table}")
+
+            for value in node.values():
+                walk(value)
+
+    # PostgreSQL and MySQL answer with one row holding the plan as JSON text.
+    for row in plan:
+        for value in dict(row).values():
+            walk(json.loads(value) if isinstance(value, str) else value)
+
+    return found
@@ -0,0 +1,256 @@
+import asyncio
+from contextlib import asynccontextmanager, nullcontext, suppress
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, Optional
+
+from pydantic_core import to_jsonable_python
+from tortoise import timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.entities.discount_event_entity import (
+    DiscountEventEntity,
+    DiscountEventType,
+)
+from pkg.crm.infrastructure.persistence.models.discount_event_model import (
+    DiscountEventModel,
+)
+from pkg.crm.infrastructure.persistence.models.discount_event_watermark_model import (
+    DiscountEventWatermarkModel,
+)
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
+
+
+FIELDS: tuple[str, ...] = (
+    "id",
+    "type",
+    "discount_id",
+    "payload",
+    "created_at",
+    "attempts",
+)
+
+# Watermark of the highest id `prune` deleted.
+PRUNED: str = "pruned"
+
+
+class DiscountEventRepository:
+    """Outbox of the discount changes, read back by the dispatcher.
+
+    Events are appended on the connection of the transaction that makes the
+    change, so they are committed or rolled back with it. `appended` is set
+    once such a transaction commits, to wake the dispatcher of this process.
+
+    Their ids only grow, and also serve as the sequence of the change feed.
+    """
+
+    router: DatabaseRouter
+    appended: asyncio.Event
+    _committed: asyncio.Event
+
+    def __init__(self, router: Optional[DatabaseRouter] = None):
+        self.router = router or DatabaseRouter()
+        self.appended = asyncio.Event()
+        self._committed = asyncio.Event()
+
+    @staticmethod
+    async def append(
+        db: BaseDBAsyncClient,
+        type: DiscountEventType,
+        discounts: Iterable[Optional[DiscountEntity]],
+    ) -> None:
+
+        events: list[DiscountEventModel] = [
+            DiscountEventModel(
+                type=type.value,
+                discount_id=discount.id,
+                payload=to_jsonable_python(discount),
+            )
+            for discount in discounts
+            if discount is not None
+        ]
+
+        if events:
+            await DiscountEventModel.bulk_create(events, using_db=db)
+
+    def notify(self) -> None:
+
+        self.appended.set()
+
+        # Wake every current waiter, later ones wait for the next commit.
+        self._committed.set()
+        self._committed = asyncio.Event()
+
+    async def wait_for_commit(self, timeout: float) -> None:
+        """Return after the next write of this process commits, or `timeout`."""
+
+        committed: asyncio.Event = self._committed
+
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(committed.wait(), timeout)
+
+    async def changes_after(
+        self, since: int, limit: int, settle: float = 0.0
+    ) -> list[DiscountEventEntity]:
+        """Up to `limit` events after `since`, in sequence order.
+
+        Ids are handed out when a transaction writes, not when it commits, so
+        a missing id may still show up. The list stops before a gap whose
+        next event is younger than `settle` seconds, older gaps are taken for
+        rolled back transactions and skipped for good: `settle` must outlast
+        the longest write transaction. SQLite runs one write transaction at a
+        time, so its ids commit in order and a gap there is always final.
+        """
+
+        if self.router.writer().capabilities.dialect == "sqlite":
+            settle = 0.0
+
+        rows: list[dict] = (
+            await DiscountEventModel.filter(id__gt=since)
+            .using_db(self.router.reader())
+            .order_by("id")
+            .limit(limit)
+            .values(*FIELDS)
+        )
+
+        settled: datetime = timezone.now() - timedelta(seconds=settle)
+        events: list[DiscountEventEntity] = []
+        expected: int = since + 1
+
+        for row in rows:
+            if row["id"] != expected and row["created_at"] > settled:
+                break
+
+            events.append(
+                DiscountEventEntity(**{**row, "type": DiscountEventType(row["type"])})
+            )
+            expected = row["id"] + 1
+
+        return events
+
+    async def pruned_through(self) -> int:
+        """The highest id `prune` deleted, 0 when it never deleted any.
+
+        Undispatched events are never pruned, so older ids may still be
+        there: changes after an id below this one are incomplete.
+        """
+
+        row: Optional[dict] = (
+            await DiscountEventWatermarkModel.filter(name=PRUNED)
+            .using_db(self.router.reader())
+            .first()
+            .values("event_id")
+        )
+
+        return row["event_id"] if row else 0
+
+    async def latest_id(self) -> Optional[int]:
+        return await self._edge_id("-id")
+
+    async def _edge_id(self, order: str) -> Optional[int]:
+
+        row: Optional[dict] = (
+            await DiscountEventModel.all()
+            .using_db(self.router.reader())
+            .order_by(order)
+            .first()
+            .values("id")
+        )
+
+        return row["id"] if row else None
+
+    @asynccontextmanager
+    async def claim(
+        self, limit: int, max_attempts: int = 0
+    ) -> AsyncIterator[list[DiscountEventEntity]]:
+        """The oldest undispatched events, marked dispatched if the block succeeds.
+
+        Events that failed `max_attempts` times are dead letters and are left
+        out, 0 claims them however often they failed.
+
+        Where the database can lock rows the events stay locked until then and
+        other processes skip them. SQLite cannot, and there the events are read
+        without holding a transaction, which would block every other query.
+        """
+
+        writer: BaseDBAsyncClient = self.router.writer()
+
+        locking: bool = writer.capabilities.support_for_update
+
+        pending: dict = {"dispatched_at": None}
+
+        if max_attempts:
+            pending["attempts__lt"] = max_attempts
+
+        async with (
+            in_transaction(self.router.primary) if locking else nullcontext(writer)
+        ) as db:
+
+            rows: list[dict] = (
+                await DiscountEventModel.filter(**pending)
+                .using_db(db)
+                .select_for_update(skip_locked=True)
+                .order_by("id")
+                .limit(limit)
+                .values(*FIELDS)
+            )
+
+            events: list[DiscountEventEntity] = [
+                DiscountEventEntity(**{**row, "type": DiscountEventType(row["type"])})
+                for row in rows
+            ]
+
+            yield events
+
+            if events:
+                await (
+                    DiscountEventModel.filter(id__in=[event.id for event in events])
+                    .using_db(db)
+                    .update(dispatched_at=timezone.now())
+                )
+
+    async def record_failure(self, ids: list[int]) -> None:
+
+        await (
+            DiscountEventModel.filter(id__in=ids)
+            .using_db(self.router.writer())
+            .update(attempts=F("attempts") + 1)
+        )
+
+    async def prune(self, before: datetime) -> int:
+        """Delete the events dispatched before `before`, returns how many.
+
+        The highest id deleted is recorded as the `pruned_through` watermark
+        in the same transaction. The latest event is kept, so the feed still
+        knows the current sequence.
+        """
+
+        latest: Optional[int] = await self.latest_id()
+
+        if latest is None:
+            return 0
+
+        async with in_transaction(self.router.primary) as db:
+
+            pruned = DiscountEventModel.filter(
+                dispatched_at__lt=before, id__lt=latest
+            ).using_db(db)
+
+            last: Optional[dict] = await pruned.order_by("-id").first().values("id")
+
+            if last is None:
+                return 0
+
+            deleted: int = await pruned.delete()
+
+            await DiscountEventWatermarkModel.get_or_create(name=PRUNED, using_db=db)
+            # Concurrent prunes only ever move the watermark forward.
+            await (
+                DiscountEventWatermarkModel.filter(name=PRUNED, event_id__lt=last["id"])
+                .using_db(db)
+                .update(event_id=last["id"])
+            )
+
+        return deleted
@@ -1,89 +1,708 @@
-from typing import Optional
+import time
+from itertools import groupby
+from typing import Any, AsyncIterator, Optional
 from dataclasses import asdict
 
+from pypika_tortoise import Table
+from pypika_tortoise.queries import QueryBuilder
+from pypika_tortoise.terms import Term, Tuple, ValueWrapper
+from tortoise import timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+
 from onbbu.paginate import PaginateDTO
 
 from pkg.crm.domain.entities.discount_entity import DiscountEntity
-from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.domain.entities.discount_event_entity import DiscountEventType
+from pkg.crm.application.dtos.batch_discount_dto import BatchOperation
+from pkg.crm.application.dtos.create_discount_dto import (
+    ConflictMode,
+    CreateDiscountDTO,
+    IdempotencyKeyTakenError,
+)
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
 from pkg.crm.application.dtos.update_discount_dto import UpdateDiscountDTO
+from pkg.crm.application.dtos.cursor_paginate_dto import (
+    CursorPaginateDTO,
+    DiscountCursor,
+)
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+from pkg.crm.application.dtos.paginate_count_dto import CountStrategy, UNKNOWN_TOTAL
 
+from pkg.crm.infrastructure.persistence.batch_loader import BatchLoader
 from pkg.crm.infrastructure.persistence.models.discount_model import (
     DiscountModel,
 )
+from pkg.crm.infrastructure.persistence.repositories.discount_event_repository import (
+    DiscountEventRepository,
+)
+from pkg.crm.infrastructure.persistence.repositories.idempotency_key_repository import (
+    IdempotencyKeyRepository,
+)
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
 
 
-class DiscountRepository:
-    async def get_all(self, dto: PaginateDTO) -> tuple[list[DiscountEntity], int]:
+FIELDS: tuple[str, ...] = (
+    "id",
+    "name",
+    "percentage",
+    "is_visible",
+    "version",
+    "updated_at",
+)
+
+RETURNING: str = ", ".join(f'"{field}"' for field in FIELDS)
 
-        total: int = await DiscountModel.all().count()
-        
-        print(total)
+# Appended to the INSERT of a create, `name` being the unique column.
+ON_CONFLICT: dict[ConflictMode, str] = {
+    ConflictMode.FAIL: "",
+    ConflictMode.IGNORE: ' ON CONFLICT ("name") DO NOTHING',
+    ConflictMode.UPDATE: (
+        ' ON CONFLICT ("name") DO UPDATE SET '
+        '"percentage" = EXCLUDED."percentage", '
+        '"is_visible" = EXCLUDED."is_visible", '
+        '"updated_at" = EXCLUDED."updated_at", '
+        '"version" = "crm_discounts"."version" + 1'
+    ),
+}
+
+
+class DiscountRepository:
+    router: DatabaseRouter
+    events: DiscountEventRepository
+    keys: IdempotencyKeyRepository
+    count_ttl: float
+    loaders: Optional[tuple[BatchLoader, BatchLoader]]
+    _cached_counts: dict[tuple, tuple[int, float]]
+
+    MAX_CACHED_COUNTS: int = 256
+
+    def __init__(
+        self,
+        router: Optional[DatabaseRouter] = None,
+        events: Optional[DiscountEventRepository] = None,
+        keys: Optional[IdempotencyKeyRepository] = None,
+        count_ttl: float = 30.0,
+        batch_window: Optional[float] = 0.0,
+        max_batch: int = 500,
+    ):
+        self.router = router or DatabaseRouter()
+        self.events = events or DiscountEventRepository(router=self.router)
+        self.keys = keys or IdempotencyKeyRepository(router=self.router)
+        self.count_ttl = count_ttl
+        self._cached_counts = {}
+
+        # Lookups by id of concurrent requests share one query, None turns
+        # that off. Clients pinned to the primary batch apart from the others.
+        self.loaders = (
+            (
+                BatchLoader(
+                    lambda ids: self._get_many_by_id(ids, self.router.writer()),
+                    window=batch_window,
+                    max_batch=max_batch,
+                ),
+                BatchLoader(
+                    lambda ids: self._get_many_by_id(ids, self.router.reader()),
+                    window=batch_window,
+                    max_batch=max_batch,
+                ),
+            )
+            if batch_window is not None
+            else None
+        )
+
+    async def get_all(
+        self,
+        dto: PaginateDTO,
+        count: CountStrategy = CountStrategy.EXACT,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> tuple[list[DiscountEntity], int]:
+
+        filters = filters or DiscountFilterDTO()
+
+        total: int = await self.get_total_count(count, filters)
 
         queryset: list[DiscountEntity] = [
-            DiscountEntity(**instance.to_dict())
-            for instance in await DiscountModel.filter(id__gt=dto.page * dto.limit)
-            .order_by("id")
+            DiscountEntity(**row)
+            for row in await self._list_query(filters)
+            .offset((dto.page - 1) * dto.limit)
             .limit(dto.limit)
-            .all()
+            .values(*FIELDS)
         ]
 
-
         return queryset, total
 
-    async def get_total_count(self) -> int:
-        return await DiscountModel.all().count()
+    async def get_all_after(
+        self, dto: CursorPaginateDTO, filters: Optional[DiscountFilterDTO] = None
+    ) -> tuple[list[DiscountEntity], Optional[str]]:
+
+        field: str = dto.sort.lstrip("-")
+
+        query: QuerySet = self._after_query(dto, filters or DiscountFilterDTO())
+
+        rows: list[dict] = await query.limit(dto.limit + 1).values(*FIELDS)
+
+        queryset: list[DiscountEntity] = [
+            DiscountEntity(**row) for row in rows[: dto.limit]
+        ]
+
+        if len(rows) <= dto.limit:
+            return queryset, None
+
+        last: DiscountEntity = queryset[-1]
+
+        next_cursor: str = DiscountCursor(
+            sort=dto.sort, key=getattr(last, field), id=last.id
+        ).encode()
+
+        return queryset, next_cursor
+
+    async def iter_all(
+        self, chunk_size: int = 1000
+    ) -> AsyncIterator[list[DiscountEntity]]:
+        """Walk the table in id order, one keyset chunk per query."""
+
+        last_id: int = 0
+
+        while True:
+            rows: list[dict] = (
+                await DiscountModel.filter(id__gt=last_id)
+                .using_db(self.router.reader())
+                .order_by("id")
+                .limit(chunk_size)
+                .values(*FIELDS)
+            )
+
+            if not rows:
+                return
+
+            yield [DiscountEntity(**row) for row in rows]
+
+            if len(rows) < chunk_size:
+                return
+
+            last_id = rows[-1]["id"]
+
+    async def get_total_count(
+        self,
+        count: CountStrategy = CountStrategy.EXACT,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> int:
+        """Rows matching `filters`.
+
+        Planner estimates only cover the whole table, a filtered ESTIMATE falls
+        back to a cached count.
+        """
+
+        filters = filters or DiscountFilterDTO()
+        key: tuple = filters.key()
+
+        if count is CountStrategy.NONE:
+            return UNKNOWN_TOTAL
+
+        if count is CountStrategy.ESTIMATE and all(value is None for value in key):
+            return await self._estimate_count()
+
+        if count is not CountStrategy.EXACT:
+            cached: Optional[tuple[int, float]] = self._cached_counts.get(key)
+
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+
+        total: int = await self._filter(
+            DiscountModel.all(using_db=self.router.reader()), filters
+        ).count()
+
+        if len(self._cached_counts) >= self.MAX_CACHED_COUNTS:
+            self._cached_counts.pop(next(iter(self._cached_counts)))
+
+        self._cached_counts[key] = (total, time.monotonic() + self.count_ttl)
+
+        return total
+
+    def invalidate_total_count(self) -> None:
+        self._cached_counts.clear()
+
+    async def explain_all(
+        self,
+        filters: DiscountFilterDTO,
+        limit: int = 100,
+        db: Optional[BaseDBAsyncClient] = None,
+    ) -> Any:
+        """Execution plan of the list query `get_all` runs for `filters`."""
+
+        return await self._list_query(filters, db).limit(limit).explain()
+
+    def _list_query(
+        self, filters: DiscountFilterDTO, db: Optional[BaseDBAsyncClient] = None
+    ) -> QuerySet:
+        return self._filter(
+            DiscountModel.all(using_db=db or self.router.reader()), filters
+        ).order_by(*self._order(filters.sort))
+
+    async def explain_all_after(
+        self,
+        dto: CursorPaginateDTO,
+        filters: DiscountFilterDTO,
+        db: Optional[BaseDBAsyncClient] = None,
+    ) -> Any:
+        """Execution plan of the page query `get_all_after` runs for `dto`."""
+
+        db = db or self.router.reader()
+
+        # Only FIELDS, a selected row value is an error on SQLite.
+        sql: str = (
+            self._after_query(dto, filters, db)
+            .limit(dto.limit + 1)
+            .values(*FIELDS)
+            .sql(params_inline=True)
+        )
+
+        return await db.executor_class(model=DiscountModel, db=db).execute_explain(sql)
+
+    def _after_query(
+        self,
+        dto: CursorPaginateDTO,
+        filters: DiscountFilterDTO,
+        db: Optional[BaseDBAsyncClient] = None,
+    ) -> QuerySet:
+
+        query: QuerySet = self._filter(
+            DiscountModel.all(using_db=db or self.router.reader()), filters
+        )
+
+        if dto.after:
+            cursor: DiscountCursor = DiscountCursor.decode(dto.after)
+
+            if cursor.sort != dto.sort:
+                raise ValueError("The cursor does not match the requested sort.")
+
+            field: str = dto.sort.lstrip("-")
+            lookup: str = "lt" if dto.sort.startswith("-") else "gt"
+            table: Table = DiscountModel._meta.basetable
+
+            if field == "id":
+                query = query.filter(**{f"id__{lookup}": cursor.id})
+            else:
+                key: Term = table[field]
+
+                if field == "percentage":
+                    key = self._percentage_cast() or key
+
+                # `(key, id) > (x, y)` seeks the (key, id) index to the cursor,
+                # `key > x OR (key = x AND id > y)` filters every row before it.
+                query = query.annotate(keyset=Tuple(key, table.id)).filter(
+                    **{
+                        f"keyset__{lookup}": Tuple(
+                            ValueWrapper(cursor.key), ValueWrapper(cursor.id)
+                        )
+                    }
+                )
+
+        return query.order_by(*self._order(dto.sort))
+
+    @classmethod
+    def _filter(cls, query: QuerySet, filters: DiscountFilterDTO) -> QuerySet:
+
+        if filters.visible is not None:
+            query = query.filter(is_visible=filters.visible)
+
+        if filters.min_pct is not None or filters.max_pct is not None:
+            query, key = cls._percentage_key(query)
+
+            if filters.min_pct is not None:
+                query = query.filter(**{f"{key}__gte": filters.min_pct})
+
+            if filters.max_pct is not None:
+                query = query.filter(**{f"{key}__lte": filters.max_pct})
+
+        if filters.q:
+            query = query.filter(name__icontains=filters.q)
+
+        return query
+
+    @staticmethod
+    def _percentage_key(query: QuerySet) -> tuple[QuerySet, str]:
+        """`query` and the name to filter `percentage` by as a number.
+
+        SQLite keeps decimals in a VARCHAR column, Tortoise casts it back to a
+        number to sort but not to filter, where "100" would come before "9.5".
+        """
+
+        key: Optional[Term] = DiscountRepository._percentage_cast()
+
+        if key is None:
+            return query, "percentage"
+
+        return query.annotate(percentage_key=key), "percentage_key"
+
+    @staticmethod
+    def _percentage_cast() -> Optional[Term]:
+        """`percentage` cast back to a number, None where it is one already."""
+
+        field = DiscountModel._meta.fields_map["percentage"]
+
+        cast = field.get_for_dialect(
+            DiscountModel._meta.db.capabilities.dialect, "function_cast"
+        )
+
+        if cast is None:
+            return None
+
+        return cast(field, DiscountModel._meta.basetable.percentage)
+
+    @staticmethod
+    def _order(sort: str) -> list[str]:
+        """`sort` with id as tie-breaker, so pages never overlap."""
+
+        field: str = sort.lstrip("-")
+
+        return [sort] if field == "id" else [sort, sort.replace(field, "id")]
+
+    async def _estimate_count(self) -> int:
+        """Row estimate from planner statistics, exact count when unavailable."""
+
+        db: BaseDBAsyncClient = self.router.reader()
+        table: str = DiscountModel._meta.db_table
+
+        rows: list = []
+
+        # SQLite keeps no row estimate.
+        if db.capabilities.dialect == "postgres":
+            _, rows = await db.execute_query(
+                "SELECT reltuples::bigint AS estimate FROM pg_class "
+                "WHERE oid = $1::regclass",
+                [table],
+            )
+
+        estimate: Optional[int] = rows[0]["estimate"] if rows else None
+
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+
+        return await self.get_total_count(CountStrategy.CACHED)
 
     async def exist_by_id(self, id: int) -> bool:
-        return await DiscountModel.filter(id=id).exists()
+        return await DiscountModel.exists(id=id, using_db=self.router.writer())
 
     async def exist_by_name(self, name: str) -> bool:
-        return await DiscountModel.filter(name=name).exists()
+        return await DiscountModel.exists(name=name, using_db=self.router.writer())
 
     async def get_by_id(self, id: int) -> Optional[DiscountEntity]:
 
-        if not await self.exist_by_id(id):
-            return None
+        if self.loaders:
+            primary, replicas = self.loaders
 
-        instance: DiscountModel = await DiscountModel.get(id=id)
+            loader: BatchLoader = primary if self.router.reads_primary() else replicas
 
-        return DiscountEntity(**instance.to_dict())
+            return await loader.load(id)
 
-    async def get_by_name(self, name: str) -> Optional[DiscountEntity]:
+        row: Optional[dict] = await DiscountModel.get_or_none(
+            id=id, using_db=self.router.reader()
+        ).values(*FIELDS)
 
-        if not await self.exist_by_name(name):
-            return None
+        return DiscountEntity(**row) if row else None
 
-        instance: DiscountModel = await DiscountModel.get(name=name)
+    async def get_latest(self, id: int) -> Optional[DiscountEntity]:
+        """`get_by_id` on the primary, never behind a write."""
 
-        return DiscountEntity(**instance.to_dict())
+        row: Optional[dict] = await DiscountModel.get_or_none(
+            id=id, using_db=self.router.writer()
+        ).values(*FIELDS)
 
-    async def create(self, dto: CreateDiscountDTO) -> DiscountEntity:
+        return DiscountEntity(**row) if row else None
 
-        instance: DiscountModel = await DiscountModel.create(**asdict(dto))
+    @staticmethod
+    async def _get_many_by_id(
+        ids: list[int], db: BaseDBAsyncClient
+    ) -> dict[int, DiscountEntity]:
 
-        return DiscountEntity(**instance.to_dict())
+        return {
+            row["id"]: DiscountEntity(**row)
+            for row in await DiscountModel.filter(id__in=ids)
+            .using_db(db)
+            .values(*FIELDS)
+        }
 
-    async def update_by_id(self, dto: UpdateDiscountDTO) -> Optional[DiscountEntity]:
+    async def get_visible(self, limit: int) -> list[DiscountEntity]:
 
-        if not await self.exist_by_id(id):
-            return None
+        return [
+            DiscountEntity(**row)
+            for row in await DiscountModel.filter(is_visible=True)
+            .using_db(self.router.reader())
+            .order_by("id")
+            .limit(limit)
+            .values(*FIELDS)
+        ]
+
+    async def warm_up(self) -> None:
+        """Open the connections and run the lookups by id and name once on each.
 
-        instance: DiscountModel = await DiscountModel.get(id=dto.id)
+        Drivers that prepare statements, as asyncpg does, keep them for the
+        connection that ran them.
+        """
 
-        for field, value in asdict(dto).items():
-            setattr(instance, field, value)
+        for db in self.router.clients():
+            await DiscountModel.get_or_none(id=0, using_db=db).values(*FIELDS)
+            await DiscountModel.get_or_none(name="", using_db=db).values(*FIELDS)
 
-        await instance.save()
+    async def get_by_name(self, name: str) -> Optional[DiscountEntity]:
 
-        return DiscountEntity(**instance.to_dict())
+        row: Optional[dict] = await DiscountModel.get_or_none(
+            name=name, using_db=self.router.reader()
+        ).values(*FIELDS)
+
+        return DiscountEntity(**row) if row else None
+
+    async def create(
+        self,
+        dto: CreateDiscountDTO,
+        on_conflict: ConflictMode = ConflictMode.FAIL,
+        idempotency_key: Optional[str] = None,
+        fingerprint: str = "",
+    ) -> DiscountEntity:
+        """Insert a discount in one statement, the unique name deciding conflicts.
+
+        FAIL raises IntegrityError on a taken name, IGNORE returns the existing
+        discount untouched and UPDATE overwrites it. With an
+        `idempotency_key` the key is stored along with the result, or
+        IdempotencyKeyTakenError raised if another request holds it.
+        """
+
+        async with in_transaction(self.router.primary) as db:
+
+            if idempotency_key is not None and not await self.keys.reserve(
+                db, idempotency_key, fingerprint
+            ):
+                raise IdempotencyKeyTakenError(
+                    "The Idempotency-Key is used by another request."
+                )
+
+            rows: list[DiscountEntity] = await self._execute_returning(
+                self._insert_query(db, [dto]), db, ON_CONFLICT[on_conflict]
+            )
+
+            if rows:
+                discount: DiscountEntity = rows[0]
+
+                # Inserted rows start at version 1, overwritten ones move past it.
+                await self.events.append(
+                    db,
+                    (
+                        DiscountEventType.CREATED
+                        if discount.version == 1
+                        else DiscountEventType.UPDATED
+                    ),
+                    rows,
+                )
+
+            else:
+                discount = DiscountEntity(
+                    **await DiscountModel.get(name=dto.name, using_db=db).values(
+                        *FIELDS
+                    )
+                )
+
+            if idempotency_key is not None:
+                await self.keys.complete(db, idempotency_key, discount)
+
+        self.events.notify()
+        self.router.record_write()
+        self.invalidate_total_count()
+
+        return discount
+
+    async def update_by_id(
+        self, dto: UpdateDiscountDTO | PatchDiscountDTO
+    ) -> Optional[DiscountEntity]:
+        """Write the fields `dto` changes, None when no row matched.
+
+        With a `dto.version` the row only matches at that version, so a write
+        based on an outdated read changes nothing instead of clobbering.
+        """
+
+        async with in_transaction(self.router.primary) as db:
+            rows: list[DiscountEntity] = await self._execute_returning(
+                self._update_query(db, dto), db
+            )
+
+            await self.events.append(db, DiscountEventType.UPDATED, rows)
+
+        self.events.notify()
+        self.router.record_write()
+
+        # Counts are cached by filter, which the new values may leave or enter.
+        if rows:
+            self.invalidate_total_count()
+
+        return rows[0] if rows else None
 
     async def delete_by_id(self, id: int) -> Optional[DiscountEntity]:
 
-        if not await self.exist_by_id(id):
-            return None
+        async with in_transaction(self.router.primary) as db:
+            rows: list[DiscountEntity] = await self._execute_returning(
+                self._delete_query(db, [id]), db
+            )
 
-        instance: DiscountModel = await DiscountModel.get(id=id)
+            await self.events.append(db, DiscountEventType.DELETED, rows)
 
-        await instance.delete()
+        self.events.notify()
+        self.router.record_write()
 
-        return instance
+        if rows:
+            self.invalidate_total_count()
+
+        return rows[0] if rows else None
+
+    async def write_batch(
+        self, operations: list[tuple[BatchOperation, Any]]
+    ) -> list[Optional[DiscountEntity]]:
+        """Apply (operation, dto or id) pairs in one transaction, in order.
+
+        Consecutive creates become one multi-row INSERT and consecutive deletes
+        one DELETE ... WHERE id IN, updates run one statement each. Results are
+        aligned with `operations`, None where the row did not exist. The
+        events of the batch are appended in the same transaction.
+        """
+
+        results: list[Optional[DiscountEntity]] = []
+
+        async with in_transaction(self.router.primary) as db:
+
+            for op, group in groupby(operations, key=lambda operation: operation[0]):
+                values: list = [value for _, value in group]
+
+                if op is BatchOperation.CREATE:
+                    created: dict[str, DiscountEntity] = {
+                        discount.name: discount
+                        for discount in await self._execute_returning(
+                            self._insert_query(db, values), db
+                        )
+                    }
+
+                    results.extend(created.get(dto.name) for dto in values)
+
+                    await self.events.append(
+                        db, DiscountEventType.CREATED, created.values()
+                    )
+
+                elif op is BatchOperation.DELETE:
+                    deleted: dict[int, DiscountEntity] = {
+                        discount.id: discount
+                        for discount in await self._execute_returning(
+                            self._delete_query(db, values), db
+                        )
+                    }
+
+                    results.extend(deleted.get(id) for id in values)
+
+                    await self.events.append(
+                        db, DiscountEventType.DELETED, deleted.values()
+                    )
+
+                else:
+                    for dto in values:
+                        rows: list[DiscountEntity] = await self._execute_returning(
+                            self._update_query(db, dto), db
+                        )
+
+                        results.append(rows[0] if rows else None)
+
+                        await self.events.append(db, DiscountEventType.UPDATED, rows)
+
+        self.events.notify()
+        self.router.record_write()
+        self.invalidate_total_count()
+
+        return results
+
+    @staticmethod
+    def _insert_query(
+        db: BaseDBAsyncClient, dtos: list[CreateDiscountDTO]
+    ) -> QueryBuilder:
+
+        columns: list[str] = [field for field in FIELDS if field != "id"]
+
+        query: QueryBuilder = db.query_class.into(
+            DiscountModel._meta.basetable
+        ).columns(*columns)
+
+        now = timezone.now()
+
+        for dto in dtos:
+            row: dict = {**asdict(dto), "version": 1, "updated_at": now}
+
+            query = query.insert(
+                *[
+                    DiscountModel._meta.fields_map[field].to_db_value(row[field], None)
+                    for field in columns
+                ]
+            )
+
+        return query
+
+    @staticmethod
+    def _update_query(
+        db: BaseDBAsyncClient, dto: UpdateDiscountDTO | PatchDiscountDTO
+    ) -> QueryBuilder:
+
+        table: Table = DiscountModel._meta.basetable
+
+        query: QueryBuilder = (
+            db.query_class.update(table)
+            .where(table.id == dto.id)
+            .set(table.version, table.version + 1)
+            .set(
+                "updated_at",
+                DiscountModel._meta.fields_map["updated_at"].to_db_value(
+                    timezone.now(), None
+                ),
+            )
+        )
+
+        if dto.version is not None:
+            query = query.where(table.version == dto.version)
+
+        for field, value in dto.changes().items():
+            query = query.set(
+                field, DiscountModel._meta.fields_map[field].to_db_value(value, None)
+            )
+
+        return query
+
+    @staticmethod
+    def _delete_query(db: BaseDBAsyncClient, ids: list[int]) -> QueryBuilder:
+
+        table: Table = DiscountModel._meta.basetable
+
+        return db.query_class.from_(table).where(table.id.isin(ids)).delete()
+
+    @staticmethod
+    async def _execute_returning(
+        query: QueryBuilder, db: BaseDBAsyncClient, clause: str = ""
+    ) -> list[DiscountEntity]:
+        """Run a write and read the affected rows back in the same statement.
+
+        `clause` is appended to the statement as is, before RETURNING. The
+        asyncpg client drops the rows of an UPDATE or DELETE run through
+        `execute_query`, `execute_query_dict` keeps them.
+        """
+
+        sql, values = query.get_parameterized_sql()
+
+        rows: list[dict] = await db.execute_query_dict(
+            f"{sql}{clause} RETURNING {RETURNING}", values
+        )
+
+        return [
+            DiscountEntity(
+                **{
+                    field: DiscountModel._meta.fields_map[field].to_python_value(
+                        row[field]
+                    )
+                    for field in FIELDS
+                }
+            )
+            for row in rows
+        ]
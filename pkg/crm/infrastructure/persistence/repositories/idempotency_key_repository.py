@@ -0,0 +1,113 @@
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pydantic_core import to_jsonable_python
+from pypika_tortoise.queries import QueryBuilder
+from tortoise import timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.entities.idempotency_key_entity import IdempotencyKeyEntity
+from pkg.crm.infrastructure.persistence.models.idempotency_key_model import (
+    IdempotencyKeyModel,
+)
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
+
+
+FIELDS: tuple[str, ...] = ("key", "fingerprint", "discount", "created_at")
+
+
+class IdempotencyKeyRepository:
+    """Idempotency keys of the creates, each with the discount it answered.
+
+    A key is reserved and completed in the transaction of the create, so it
+    is only ever seen together with the write it stands for. Keys are valid
+    for `ttl` seconds, after which the same key starts a new request.
+    """
+
+    router: DatabaseRouter
+    ttl: float
+    prune_interval: float
+    _pruned_at: float
+
+    def __init__(
+        self,
+        router: Optional[DatabaseRouter] = None,
+        ttl: float = 86400.0,
+        prune_interval: float = 3600.0,
+    ):
+        self.router = router or DatabaseRouter()
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self._pruned_at = time.monotonic()
+
+    async def get(self, key: str) -> Optional[IdempotencyKeyEntity]:
+
+        # The primary, a retry must not miss a key on a lagging replica.
+        row: Optional[dict] = await IdempotencyKeyModel.get_or_none(
+            key=key,
+            created_at__gte=self._expired_before(),
+            using_db=self.router.writer(),
+        ).values(*FIELDS)
+
+        return IdempotencyKeyEntity(**row) if row else None
+
+    async def reserve(self, db: BaseDBAsyncClient, key: str, fingerprint: str) -> bool:
+        """Claim `key` inside the transaction `db`, False if it is taken.
+
+        A concurrent transaction holding the key makes this wait for it to
+        finish on PostgreSQL, then fail to claim.
+        """
+
+        await self.prune(db)
+
+        await IdempotencyKeyModel.filter(
+            key=key, created_at__lt=self._expired_before()
+        ).using_db(db).delete()
+
+        meta = IdempotencyKeyModel._meta
+
+        query: QueryBuilder = (
+            db.query_class.into(meta.basetable)
+            .columns("key", "fingerprint", "created_at")
+            .insert(
+                key,
+                fingerprint,
+                meta.fields_map["created_at"].to_db_value(timezone.now(), None),
+            )
+            .on_conflict("key")
+            .do_nothing()
+        )
+
+        sql, values = query.get_parameterized_sql()
+
+        _, rows = await db.execute_query(f'{sql} RETURNING "key"', values)
+
+        return bool(rows)
+
+    @staticmethod
+    async def complete(
+        db: BaseDBAsyncClient, key: str, discount: DiscountEntity
+    ) -> None:
+
+        await IdempotencyKeyModel.filter(key=key).using_db(db).update(
+            discount=to_jsonable_python(discount)
+        )
+
+    async def prune(self, db: Optional[BaseDBAsyncClient] = None) -> int:
+        """Delete the expired keys, at most once per `prune_interval`."""
+
+        if time.monotonic() - self._pruned_at < self.prune_interval:
+            return 0
+
+        self._pruned_at = time.monotonic()
+
+        return await (
+            IdempotencyKeyModel.filter(created_at__lt=self._expired_before())
+            .using_db(db or self.router.writer())
+            .delete()
+        )
+
+    def _expired_before(self) -> datetime:
+        return timezone.now() - timedelta(seconds=self.ttl)
@@ -0,0 +1,667 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import replace
+from datetime import datetime
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from pydantic_core import to_jsonable_python
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError
+
+from onbbu.paginate import PaginateDTO
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.domain.entities.discount_event_entity import (
+    DiscountEventEntity,
+    DiscountEventType,
+)
+from pkg.crm.domain.entities.idempotency_key_entity import IdempotencyKeyEntity
+from pkg.crm.application.dtos.batch_discount_dto import BatchOperation
+from pkg.crm.application.dtos.create_discount_dto import (
+    ConflictMode,
+    CreateDiscountDTO,
+    IdempotencyKeyTakenError,
+)
+from pkg.crm.application.dtos.cursor_paginate_dto import (
+    SORT_KEYS,
+    CursorPaginateDTO,
+    DiscountCursor,
+)
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+from pkg.crm.application.dtos.paginate_count_dto import CountStrategy, UNKNOWN_TOTAL
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
+from pkg.crm.application.dtos.update_discount_dto import UpdateDiscountDTO
+
+from pkg.crm.infrastructure.persistence.models.discount_model import DiscountModel
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+from pkg.crm.infrastructure.persistence.repositories.idempotency_key_repository import (
+    IdempotencyKeyRepository,
+)
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryIdempotencyKeys:
+    """Idempotency keys of the creates, for a repository without a database."""
+
+    ttl: float
+
+    def __init__(self, ttl: float = 86400.0):
+        self.ttl = ttl
+
+        self._keys: OrderedDict[str, tuple[IdempotencyKeyEntity, float]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[IdempotencyKeyEntity]:
+
+        self._prune()
+
+        entry = self._keys.get(key)
+
+        return entry[0] if entry else None
+
+    def complete(self, key: str, fingerprint: str, discount: DiscountEntity) -> None:
+
+        self._keys[key] = (
+            IdempotencyKeyEntity(
+                key=key,
+                fingerprint=fingerprint,
+                discount=to_jsonable_python(discount),
+                created_at=timezone.now(),
+            ),
+            time.monotonic() + self.ttl,
+        )
+
+    def _prune(self) -> None:
+
+        # Keys are kept in the order they were added, which is expiry order.
+        while self._keys:
+            key, (_, expires_at) = next(iter(self._keys.items()))
+
+            if expires_at > time.monotonic():
+                return
+
+            del self._keys[key]
+
+
+class InMemoryDiscountRepository:
+    """`DiscountRepository` served from a dict of the discounts by id.
+
+    A name index answers lookups by name and enforces unique names, and
+    one sorted index per sort key serves the keyset pages. Reads never wait
+    on a database, so every read sees the same latency as a dict lookup.
+
+    With a `store` the discounts are loaded from it by `start`, and writes
+    go through to it first, so ids, versions, the outbox and the
+    idempotency keys are the database's. The writes of other workers are
+    then followed through the outbox, polling every `follow_interval`
+    seconds, and every id they touch is passed to the `listeners`. Without
+    a `store` the discounts live only in this process and
+    are published nowhere, which is what tests want.
+
+    Names sort by code point, not by the database collation, and `q`
+    matches without regard to case.
+    """
+
+    store: Optional[DiscountRepository]
+    router: DatabaseRouter
+    keys: IdempotencyKeyRepository | InMemoryIdempotencyKeys
+    listeners: list[Callable[[int], None]]
+    follow_interval: float
+    settle: float
+
+    FOLLOW_BATCH: int = 500
+
+    def __init__(
+        self,
+        store: Optional[DiscountRepository] = None,
+        keys: Optional[InMemoryIdempotencyKeys] = None,
+        follow_interval: float = 1.0,
+        settle: float = 60.0,
+    ):
+        self.store = store
+        self.router = store.router if store else DatabaseRouter()
+        self.keys = store.keys if store else keys or InMemoryIdempotencyKeys()
+        self.listeners = []
+        self.follow_interval = follow_interval
+        self.settle = settle
+
+        self._by_id: dict[int, DiscountEntity] = {}
+        self._ids: dict[str, int] = {}
+        self._indexes: dict[str, list[tuple[Any, int]]] = {
+            field: [] for field in SORT_KEYS
+        }
+
+        # Ids are never reused, a deleted one must not come back from an
+        # older change applied after the delete.
+        self._deleted: set[int] = set()
+
+        self._next_id: int = 1
+        self._seq: int = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+
+        if self.store is None or self._task is not None:
+            return
+
+        await self.load()
+
+        self._task = asyncio.create_task(self._follow(), name="crm-discount-follower")
+
+    async def stop(self) -> None:
+
+        if self._task is None:
+            return
+
+        task, self._task = self._task, None
+
+        task.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await task
+
+    async def load(self) -> None:
+        """Replace every discount with the rows of the `store`."""
+
+        # Read first: a change committed while the rows load is replayed.
+        seq: int = await self.store.events.latest_id() or 0
+
+        discounts: list[DiscountEntity] = [
+            discount async for chunk in self.store.iter_all() for discount in chunk
+        ]
+
+        self._by_id.clear()
+        self._ids.clear()
+
+        for index in self._indexes.values():
+            index.clear()
+
+        for discount in discounts:
+            self._put(discount)
+
+        self._seq = seq
+
+    async def get_all(
+        self,
+        dto: PaginateDTO,
+        count: CountStrategy = CountStrategy.EXACT,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> tuple[list[DiscountEntity], int]:
+
+        filters = filters or DiscountFilterDTO()
+
+        offset: int = (dto.page - 1) * dto.limit
+
+        queryset: list[DiscountEntity] = list(
+            islice(self._scan(filters.sort, filters), offset, offset + dto.limit)
+        )
+
+        return queryset, await self.get_total_count(count, filters)
+
+    async def get_all_after(
+        self, dto: CursorPaginateDTO, filters: Optional[DiscountFilterDTO] = None
+    ) -> tuple[list[DiscountEntity], Optional[str]]:
+
+        field: str = dto.sort.lstrip("-")
+        after: Optional[tuple[Any, int]] = None
+
+        if dto.after:
+            cursor: DiscountCursor = DiscountCursor.decode(dto.after)
+
+            if cursor.sort != dto.sort:
+                raise ValueError("The cursor does not match the requested sort.")
+
+            after = (cursor.id if field == "id" else cursor.key, cursor.id)
+
+        rows: list[DiscountEntity] = list(
+            islice(
+                self._scan(dto.sort, filters or DiscountFilterDTO(), after),
+                dto.limit + 1,
+            )
+        )
+
+        queryset: list[DiscountEntity] = rows[: dto.limit]
+
+        if len(rows) <= dto.limit:
+            return queryset, None
+
+        last: DiscountEntity = queryset[-1]
+
+        next_cursor: str = DiscountCursor(
+            sort=dto.sort, key=getattr(last, field), id=last.id
+        ).encode()
+
+        return queryset, next_cursor
+
+    async def iter_all(
+        self, chunk_size: int = 1000
+    ) -> AsyncIterator[list[DiscountEntity]]:
+
+        ids: list[tuple[Any, int]] = self._indexes["id"]
+        last: tuple[Any, int] = (0, 0)
+
+        while True:
+            start: int = bisect_right(ids, last)
+
+            chunk: list[DiscountEntity] = [
+                self._by_id[id] for _, id in ids[start : start + chunk_size]
+            ]
+
+            if not chunk:
+                return
+
+            yield chunk
+
+            if len(chunk) < chunk_size:
+                return
+
+            last = (chunk[-1].id, chunk[-1].id)
+
+    async def get_total_count(
+        self,
+        count: CountStrategy = CountStrategy.EXACT,
+        filters: Optional[DiscountFilterDTO] = None,
+    ) -> int:
+        """Discounts matching `filters`, always exact but for NONE."""
+
+        if count is CountStrategy.NONE:
+            return UNKNOWN_TOTAL
+
+        filters = filters or DiscountFilterDTO()
+
+        if all(value is None for value in filters.key()):
+            return len(self._by_id)
+
+        return sum(
+            1 for discount in self._by_id.values() if self._matches(discount, filters)
+        )
+
+    def invalidate_total_count(self) -> None:
+        pass
+
+    async def explain_all(
+        self,
+        filters: DiscountFilterDTO,
+        limit: int = 100,
+        db: Any = None,
+    ) -> Any:
+        """The plan of the `store`, empty without one: no query is run."""
+
+        if self.store is None:
+            return []
+
+        return await self.store.explain_all(filters, limit, db)
+
+    async def explain_all_after(
+        self, dto: CursorPaginateDTO, filters: DiscountFilterDTO, db: Any = None
+    ) -> Any:
+        """The plan of the `store`, empty without one: no query is run."""
+
+        if self.store is None:
+            return []
+
+        return await self.store.explain_all_after(dto, filters, db)
+
+    async def exist_by_id(self, id: int) -> bool:
+        return id in self._by_id
+
+    async def exist_by_name(self, name: str) -> bool:
+        return name in self._ids
+
+    async def get_by_id(self, id: int) -> Optional[DiscountEntity]:
+        return self._by_id.get(id)
+
+    async def get_latest(self, id: int) -> Optional[DiscountEntity]:
+        """The `store`'s row, which writes of other workers reach first."""
+
+        if self.store is None:
+            return self._by_id.get(id)
+
+        return await self.store.get_latest(id)
+
+    async def get_by_name(self, name: str) -> Optional[DiscountEntity]:
+
+        id: Optional[int] = self._ids.get(name)
+
+        return self._by_id.get(id) if id is not None else None
+
+    async def get_visible(self, limit: int) -> list[DiscountEntity]:
+        return list(islice(self._scan("id", DiscountFilterDTO(visible=True)), limit))
+
+    async def warm_up(self) -> None:
+
+        if self.store is not None:
+            await self.store.warm_up()
+
+    async def create(
+        self,
+        dto: CreateDiscountDTO,
+        on_conflict: ConflictMode = ConflictMode.FAIL,
+        idempotency_key: Optional[str] = None,
+        fingerprint: str = "",
+    ) -> DiscountEntity:
+
+        if self.store is not None:
+            discount: DiscountEntity = await self.store.create(
+                dto, on_conflict, idempotency_key, fingerprint
+            )
+
+            self._merge(discount)
+
+            return discount
+
+        if idempotency_key is not None and await self.keys.get(idempotency_key):
+            raise IdempotencyKeyTakenError(
+                "The Idempotency-Key is used by another request."
+            )
+
+        existing: Optional[DiscountEntity] = await self.get_by_name(dto.name)
+
+        if existing is None or on_conflict is ConflictMode.FAIL:
+            discount = self._insert(dto)
+
+        elif on_conflict is ConflictMode.IGNORE:
+            discount = existing
+
+        else:
+            discount = self._update(
+                existing, {"percentage": dto.percentage, "is_visible": dto.is_visible}
+            )
+
+        if idempotency_key is not None:
+            self.keys.complete(idempotency_key, fingerprint, discount)
+
+        return discount
+
+    async def update_by_id(
+        self, dto: UpdateDiscountDTO | PatchDiscountDTO
+    ) -> Optional[DiscountEntity]:
+        """Write the fields `dto` changes, None when no discount matched."""
+
+        if self.store is not None:
+            discount: Optional[DiscountEntity] = await self.store.update_by_id(dto)
+
+            if discount:
+                self._merge(discount)
+
+            return discount
+
+        current: Optional[DiscountEntity] = self._by_id.get(dto.id)
+
+        if current is None or dto.version not in (None, current.version):
+            return None
+
+        return self._update(current, dto.changes())
+
+    async def delete_by_id(self, id: int) -> Optional[DiscountEntity]:
+
+        if self.store is not None:
+            discount: Optional[DiscountEntity] = await self.store.delete_by_id(id)
+
+            if discount:
+                self._delete(id)
+
+            return discount
+
+        return self._delete(id)
+
+    async def write_batch(
+        self, operations: list[tuple[BatchOperation, Any]]
+    ) -> list[Optional[DiscountEntity]]:
+        """Apply (operation, dto or id) pairs in order, all or none of them."""
+
+        if self.store is not None:
+            results: list[Optional[DiscountEntity]] = await self.store.write_batch(
+                operations
+            )
+
+            for (op, _), discount in zip(operations, results):
+                if discount is None:
+                    continue
+
+                if op is BatchOperation.DELETE:
+                    self._delete(discount.id)
+                else:
+                    self._merge(discount)
+
+            return results
+
+        results = []
+
+        # What each id was before the batch, to put back if it fails.
+        journal: list[tuple[int, Optional[DiscountEntity]]] = []
+
+        try:
+            for op, value in operations:
+                discount: Optional[DiscountEntity] = None
+
+                if op is BatchOperation.CREATE:
+                    discount = self._insert(value)
+                    journal.append((discount.id, None))
+
+                elif op is BatchOperation.DELETE:
+                    discount = self._delete(value)
+
+                    if discount:
+                        journal.append((discount.id, discount))
+
+                else:
+                    current: Optional[DiscountEntity] = self._by_id.get(value.id)
+
+                    if current and value.version in (None, current.version):
+                        discount = self._update(current, value.changes())
+                        journal.append((current.id, current))
+
+                results.append(discount)
+
+        except IntegrityError:
+            for id, previous in reversed(journal):
+                self._restore(id, previous)
+
+            raise
+
+        return results
+
+    def _scan(
+        self,
+        sort: str,
+        filters: DiscountFilterDTO,
+        after: Optional[tuple[Any, int]] = None,
+    ) -> Iterator[DiscountEntity]:
+        """Discounts matching `filters` in `sort` order, after `after`.
+
+        `after` is a (key, id) position in the index of the sort field.
+        """
+
+        index: list[tuple[Any, int]] = self._indexes[sort.lstrip("-")]
+
+        if sort.startswith("-"):
+            end: int = bisect_left(index, after) if after else len(index)
+            positions: range = range(end - 1, -1, -1)
+        else:
+            positions = range(bisect_right(index, after) if after else 0, len(index))
+
+        for position in positions:
+            discount: DiscountEntity = self._by_id[index[position][1]]
+
+            if self._matches(discount, filters):
+                yield discount
+
+    @staticmethod
+    def _matches(discount: DiscountEntity, filters: DiscountFilterDTO) -> bool:
+        return (
+            (filters.visible is None or discount.is_visible == filters.visible)
+            and (filters.min_pct is None or discount.percentage >= filters.min_pct)
+            and (filters.max_pct is None or discount.percentage <= filters.max_pct)
+            and (not filters.q or filters.q.lower() in discount.name.lower())
+        )
+
+    def _insert(self, dto: CreateDiscountDTO) -> DiscountEntity:
+
+        if dto.name in self._ids:
+            raise IntegrityError(f"The name {dto.name!r} is taken.")
+
+        discount: DiscountEntity = DiscountEntity(
+            id=self._next_id,
+            name=dto.name,
+            percentage=_percentage(dto.percentage),
+            is_visible=dto.is_visible,
+            version=1,
+            updated_at=timezone.now(),
+        )
+
+        self._next_id += 1
+        self._put(discount)
+
+        return discount
+
+    def _update(self, current: DiscountEntity, changes: dict) -> DiscountEntity:
+
+        name: str = changes.get("name", current.name)
+
+        if self._ids.get(name, current.id) != current.id:
+            raise IntegrityError(f"The name {name!r} is taken.")
+
+        if "percentage" in changes:
+            changes = {**changes, "percentage": _percentage(changes["percentage"])}
+
+        discount: DiscountEntity = replace(
+            current,
+            **changes,
+            version=current.version + 1,
+            updated_at=timezone.now(),
+        )
+
+        self._put(discount)
+
+        return discount
+
+    def _delete(self, id: int) -> Optional[DiscountEntity]:
+
+        discount: Optional[DiscountEntity] = self._by_id.get(id)
+
+        self._deleted.add(id)
+
+        if discount:
+            self._remove(discount)
+
+        return discount
+
+    def _restore(self, id: int, previous: Optional[DiscountEntity]) -> None:
+
+        current: Optional[DiscountEntity] = self._by_id.get(id)
+
+        if current:
+            self._remove(current)
+
+        if previous:
+            self._deleted.discard(id)
+            self._put(previous)
+
+    def _merge(self, discount: DiscountEntity) -> None:
+        """Keep `discount` unless its deletion or a later version is known."""
+
+        current: Optional[DiscountEntity] = self._by_id.get(discount.id)
+
+        if discount.id in self._deleted or (
+            current and current.version >= discount.version
+        ):
+            return
+
+        self._put(discount)
+
+    def _put(self, discount: DiscountEntity) -> None:
+
+        current: Optional[DiscountEntity] = self._by_id.get(discount.id)
+
+        if current:
+            self._remove(current)
+
+        self._by_id[discount.id] = discount
+        self._ids[discount.name] = discount.id
+        self._next_id = max(self._next_id, discount.id + 1)
+
+        for field, index in self._indexes.items():
+            insort(index, (getattr(discount, field), discount.id))
+
+    def _remove(self, discount: DiscountEntity) -> None:
+
+        del self._by_id[discount.id]
+
+        if self._ids.get(discount.name) == discount.id:
+            del self._ids[discount.name]
+
+        for field, index in self._indexes.items():
+            del index[bisect_left(index, (getattr(discount, field), discount.id))]
+
+    async def _follow(self) -> None:
+
+        while True:
+            await self.store.events.wait_for_commit(self.follow_interval)
+
+            try:
+                await self._catch_up()
+
+            except Exception as e:
+                logger.warning("Following the discount changes failed: %s", e)
+                await asyncio.sleep(self.follow_interval)
+
+    async def _catch_up(self) -> None:
+
+        while True:
+            events: list[DiscountEventEntity] = await self.store.events.changes_after(
+                self._seq, self.FOLLOW_BATCH, self.settle
+            )
+
+            if not events:
+                return
+
+            # Pruned past what was seen, the gap cannot be replayed.
+            if events[0].id != self._seq + 1 and (
+                self._seq < await self.store.events.pruned_through()
+            ):
+                await self.load()
+                return
+
+            for event in events:
+                if event.type is DiscountEventType.DELETED:
+                    self._delete(event.discount_id)
+                else:
+                    self._merge(_from_dict(event.payload))
+
+                for listener in self.listeners:
+                    listener(event.discount_id)
+
+            self._seq = events[-1].id
+
+            if len(events) < self.FOLLOW_BATCH:
+                return
+
+
+def _percentage(value: Any) -> Any:
+    """`value` as the database gives it back."""
+
+    return DiscountModel._meta.fields_map["percentage"].to_python_value(value)
+
+
+def _from_dict(data: dict) -> DiscountEntity:
+    return DiscountEntity(
+        id=data["id"],
+        name=data["name"],
+        percentage=_percentage(data["percentage"]),
+        is_visible=data["is_visible"],
+        version=data.get("version", 1),
+        updated_at=(
+            datetime.fromisoformat(data["updated_at"])
+            if data.get("updated_at")
+            else None
+        ),
+    )
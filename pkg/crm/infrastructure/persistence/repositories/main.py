@@ -1,25 +1,98 @@
 from dataclasses import dataclass
 
+from internal.settings import (
+    CHANGE_FEED,
+    DATABASE_POOLS,
+    DATABASE_REPLICAS,
+    DISCOUNT_STORE,
+    IDEMPOTENCY_KEY_TTL,
+    READ_BATCHING,
+    READ_YOUR_WRITES_WINDOW,
+)
+
+from pkg.crm.infrastructure.persistence.migrations.runner import migrate
+from pkg.crm.infrastructure.persistence.pool import PoolMonitor, PoolSettings
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter
+from pkg.crm.infrastructure.persistence.repositories.discount_event_repository import (
+    DiscountEventRepository,
+)
 from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
     DiscountRepository,
 )
+from pkg.crm.infrastructure.persistence.repositories.idempotency_key_repository import (
+    IdempotencyKeyRepository,
+)
+from pkg.crm.infrastructure.persistence.repositories.in_memory_discount_repository import (
+    InMemoryDiscountRepository,
+    InMemoryIdempotencyKeys,
+)
 
 
 @dataclass(frozen=True, slots=True)
 class Repository:
-    discountRepo: DiscountRepository
+    discountRepo: DiscountRepository | InMemoryDiscountRepository
+    discountEventRepo: DiscountEventRepository
+    idempotencyKeyRepo: IdempotencyKeyRepository | InMemoryIdempotencyKeys
+    pool: PoolMonitor
+    router: DatabaseRouter
 
 
 class NewRepository:
 
-    def __init__(self):
-        self.repos = Repository(discountRepo=DiscountRepository())
+    def __init__(
+        self,
+        pool: PoolSettings = PoolSettings(**DATABASE_POOLS["crm"]),
+        replica_urls: list[str] = DATABASE_REPLICAS["crm"],
+        sticky_window: float = READ_YOUR_WRITES_WINDOW,
+        idempotency_ttl: float = IDEMPOTENCY_KEY_TTL,
+        read_batching: dict = READ_BATCHING,
+        discount_store: dict = DISCOUNT_STORE,
+    ):
+        router: DatabaseRouter = DatabaseRouter(
+            replica_urls=replica_urls, sticky_window=sticky_window
+        )
+
+        events: DiscountEventRepository = DiscountEventRepository(router=router)
+        keys: IdempotencyKeyRepository = IdempotencyKeyRepository(
+            router=router, ttl=idempotency_ttl
+        )
+
+        discountRepo: DiscountRepository | InMemoryDiscountRepository = (
+            DiscountRepository(
+                router=router,
+                events=events,
+                keys=keys,
+                batch_window=(
+                    read_batching["window"] if read_batching["enabled"] else None
+                ),
+                max_batch=read_batching["max_batch"],
+            )
+        )
+
+        if discount_store["engine"] == "memory":
+            discountRepo = InMemoryDiscountRepository(
+                store=discountRepo if discount_store["write_through"] else None,
+                keys=InMemoryIdempotencyKeys(ttl=idempotency_ttl),
+                follow_interval=discount_store["follow_interval"],
+                settle=CHANGE_FEED["settle"],
+            )
+
+        elif discount_store["engine"] != "sql":
+            raise ValueError(f"Unknown discount engine: {discount_store['engine']}")
+
+        self.repos = Repository(
+            discountRepo=discountRepo,
+            discountEventRepo=events,
+            idempotencyKeyRepo=discountRepo.keys,
+            pool=PoolMonitor(settings=pool),
+            router=router,
+        )
 
     def init(self) -> Repository:
         return self.repos
 
-    def migrate(self):
-        pass
+    async def migrate(self) -> list[str]:
+        return await migrate(self.repos.router.writer())
 
     def drop(self):
         pass
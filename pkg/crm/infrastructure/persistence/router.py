@@ -0,0 +1,111 @@
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from itertools import cycle
+from typing import Iterator, Optional
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+
+@dataclass(slots=True)
+class ReadSession:
+    """Read-your-writes state of the client behind the current request."""
+
+    primary_until: float = 0.0
+    wrote: bool = False
+
+    def pinned(self) -> bool:
+        return self.primary_until > time.time()
+
+
+# Writes read their rows back with RETURNING and creates settle name
+# conflicts with ON CONFLICT, MySQL has neither.
+DIALECTS: tuple[str, ...] = ("postgres", "sqlite")
+
+_session: ContextVar[Optional[ReadSession]] = ContextVar(
+    "crm_read_session", default=None
+)
+
+
+class DatabaseRouter:
+    """Sends reads to the replicas in turn and writes to the primary.
+
+    A client that just wrote keeps reading from the primary for
+    `sticky_window` seconds so it never sees a replica that lags behind its
+    own write. Without replicas everything goes to the primary.
+    """
+
+    primary: str
+    replica_urls: list[str]
+    replicas: list[str]
+    sticky_window: float
+
+    def __init__(
+        self,
+        primary: str = "default",
+        replica_urls: Optional[list[str]] = None,
+        sticky_window: float = 2.0,
+    ):
+        self.primary = primary
+        self.replica_urls = list(replica_urls or [])
+        self.replicas = [
+            f"{primary}_replica_{index}" for index in range(len(self.replica_urls))
+        ]
+        self.sticky_window = sticky_window
+
+        self._next_replica: Iterator[str] = cycle(self.replicas)
+
+    async def configure(self) -> None:
+        """Register the replica connections once Tortoise is initialised.
+
+        Raises RuntimeError when a database is not one of `DIALECTS`.
+        """
+
+        for alias, url in zip(self.replicas, self.replica_urls):
+            connections.db_config[alias] = url
+
+        for db in self.clients():
+            if db.capabilities.dialect not in DIALECTS:
+                raise RuntimeError(
+                    f"The crm module runs on {' or '.join(DIALECTS)}, "
+                    f"not {db.capabilities.dialect} ({db.connection_name})."
+                )
+
+    def reader(self) -> BaseDBAsyncClient:
+
+        if self.reads_primary():
+            return self.writer()
+
+        return connections.get(next(self._next_replica))
+
+    def reads_primary(self) -> bool:
+        """Whether the current client's reads go to the primary."""
+
+        session: Optional[ReadSession] = _session.get()
+
+        return not self.replicas or bool(session and session.pinned())
+
+    def writer(self) -> BaseDBAsyncClient:
+        return connections.get(self.primary)
+
+    def clients(self) -> list[BaseDBAsyncClient]:
+        """The primary, then every replica."""
+
+        return [self.writer(), *(connections.get(alias) for alias in self.replicas)]
+
+    def record_write(self) -> None:
+
+        session: Optional[ReadSession] = _session.get()
+
+        if session:
+            session.primary_until = time.time() + self.sticky_window
+            session.wrote = True
+
+    @staticmethod
+    def begin(session: ReadSession) -> Token:
+        return _session.set(session)
+
+    @staticmethod
+    def end(token: Token) -> None:
+        _session.reset(token)
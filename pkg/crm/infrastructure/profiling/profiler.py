@@ -0,0 +1,139 @@
+import cProfile
+import random
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any
+
+from starlette.responses import Response
+
+from onbbu import HTTPMethod, Request
+
+from pkg.crm.infrastructure.profiling import timings
+from pkg.crm.infrastructure.profiling.queries import instrument_queries
+from pkg.crm.infrastructure.profiling.timings import RequestTimings
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+
+@dataclass(frozen=True, slots=True)
+class ProfilerSettings:
+    enabled: bool = False
+    sample_rate: float = 0.0
+    slow_ms: float = 500.0
+    directory: str = "profiles"
+
+
+class Profiler:
+    """Opt-in timing of the crm routes, with sampled profiles of slow requests.
+
+    Every wrapped request answers with a Server-Timing header. A sampled
+    request also runs under pyinstrument, or cProfile without it, and the
+    profile is written to `settings.directory` when it took at least
+    `settings.slow_ms`. Only one request is sampled at a time: the
+    interpreter allows a single active profiler.
+    """
+
+    settings: ProfilerSettings
+
+    def __init__(self, settings: ProfilerSettings):
+        self.settings = settings
+
+        self._sampling: bool = False
+
+    async def configure(self) -> None:
+        """Start timing queries once Tortoise has loaded its backends."""
+
+        if self.settings.enabled:
+            instrument_queries()
+
+    def wrap(self, endpoint: Any, route: str, method: HTTPMethod) -> Any:
+
+        if not self.settings.enabled:
+            return endpoint
+
+        @wraps(endpoint)
+        async def profiled(request: Request) -> Response:
+
+            request_timings, token = timings.begin()
+
+            try:
+                if self._sampled():
+                    response = await self._sample(
+                        endpoint, request, request_timings, route
+                    )
+                else:
+                    response = await endpoint(request)
+
+            finally:
+                timings.end(token)
+
+            response.headers["Server-Timing"] = request_timings.server_timing()
+
+            return response
+
+        return profiled
+
+    def _sampled(self) -> bool:
+        return (
+            not self._sampling
+            and self.settings.sample_rate > 0
+            and random.random() < self.settings.sample_rate
+        )
+
+    async def _sample(
+        self,
+        endpoint: Any,
+        request: Request,
+        request_timings: RequestTimings,
+        route: str,
+    ) -> Response:
+
+        self._sampling = True
+
+        profiler: Any = (
+            pyinstrument.Profiler(async_mode="enabled")
+            if pyinstrument
+            else cProfile.Profile()
+        )
+
+        if pyinstrument:
+            profiler.start()
+        else:
+            profiler.enable()
+
+        try:
+            return await endpoint(request)
+
+        finally:
+            if pyinstrument:
+                profiler.stop()
+            else:
+                profiler.disable()
+
+            self._sampling = False
+
+            elapsed_ms: float = request_timings.elapsed() * 1000
+
+            if elapsed_ms >= self.settings.slow_ms:
+                self._dump(profiler, request.method, route, elapsed_ms)
+
+    def _dump(self, profiler: Any, method: str, route: str, elapsed_ms: float) -> None:
+
+        directory: Path = Path(self.settings.directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        slug: str = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-")
+        stem: str = (
+            f"{datetime.now():%Y%m%d-%H%M%S-%f}-{method}-{slug}" f"-{elapsed_ms:.0f}ms"
+        )
+
+        if pyinstrument:
+            (directory / f"{stem}.html").write_text(profiler.output_html())
+        else:
+            profiler.dump_stats(directory / f"{stem}.prof")
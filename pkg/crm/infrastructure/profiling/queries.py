@@ -0,0 +1,56 @@
+from functools import wraps
+from typing import Any, Callable, Iterator
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from pkg.crm.infrastructure.profiling import timings
+
+
+QUERY_METHODS: tuple[str, ...] = (
+    "execute_insert",
+    "execute_query",
+    "execute_query_dict",
+    "execute_many",
+    "execute_script",
+)
+
+
+def instrument_queries() -> None:
+    """Time every query of the loaded Tortoise clients in the request's `db`.
+
+    Transactions run on wrapper classes of their own, so the methods are
+    wrapped on every client class rather than on the connection instances.
+    Call it once the backends are imported, i.e. after Tortoise init; it is
+    safe to call again.
+
+    The wrapping is process-wide and stays for good: every connection of
+    every app in the process, profiled request or not, goes through it.
+    Outside a profiled request it only reads one context variable and
+    calls the original method. There is no way to undo it.
+    """
+
+    for cls in _client_classes(BaseDBAsyncClient):
+        for name in QUERY_METHODS:
+            method = cls.__dict__.get(name)
+
+            if method is not None and not hasattr(method, "__crm_timed__"):
+                setattr(cls, name, _timed(method))
+
+
+def _client_classes(cls: type) -> Iterator[type]:
+
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _client_classes(subclass)
+
+
+def _timed(method: Callable[..., Any]) -> Callable[..., Any]:
+
+    @wraps(method)
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        with timings.query():
+            return await method(*args, **kwargs)
+
+    timed.__crm_timed__ = True
+
+    return timed
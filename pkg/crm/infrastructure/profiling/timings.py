@@ -0,0 +1,140 @@
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, Token
+from typing import AsyncIterator, ContextManager, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class RequestTimings:
+    """Wall-clock time a request spends in each phase, in seconds.
+
+    Phases recorded more than once add up, e.g. two service calls. Database
+    queries run inside the service phase, so `db` overlaps it.
+    """
+
+    __slots__ = ("start", "phases", "queries")
+
+    def __init__(self):
+        self.start: float = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.queries: int = 0
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """Render the phases as a Server-Timing header value, in milliseconds."""
+
+        metrics: list[str] = []
+
+        for name, seconds in self.phases.items():
+            metric: str = f"{name};dur={seconds * 1000:.2f}"
+
+            if name == "db":
+                noun: str = "query" if self.queries == 1 else "queries"
+                metric += f';desc="{self.queries} {noun}"'
+
+            metrics.append(metric)
+
+        metrics.append(f"total;dur={self.elapsed() * 1000:.2f}")
+
+        return ", ".join(metrics)
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "crm_request_timings", default=None
+)
+
+_in_query: ContextVar[bool] = ContextVar("crm_in_query", default=False)
+
+_untimed: ContextManager[None] = nullcontext()
+
+
+def current() -> Optional[RequestTimings]:
+    return _timings.get()
+
+
+def begin() -> tuple[RequestTimings, Token]:
+
+    timings: RequestTimings = RequestTimings()
+
+    return timings, _timings.set(timings)
+
+
+def end(token: Token) -> None:
+    _timings.reset(token)
+
+
+def phase(name: str) -> ContextManager[None]:
+    """Time the block as `name` when the current request is profiled."""
+
+    timings: Optional[RequestTimings] = _timings.get()
+
+    if timings is None:
+        return _untimed
+
+    return _timed(timings, name)
+
+
+async def timed_items(items: AsyncIterator[T], name: str) -> AsyncIterator[T]:
+    """Yield `items`, timing how long each takes to arrive as `name`.
+
+    The time the consumer spends between items is left to its own phases.
+    """
+
+    iterator: AsyncIterator[T] = aiter(items)
+
+    while True:
+        with phase(name):
+            try:
+                item: T = await anext(iterator)
+            except StopAsyncIteration:
+                return
+
+        yield item
+
+
+@contextmanager
+def _timed(timings: RequestTimings, name: str) -> Iterator[None]:
+
+    start: float = time.perf_counter()
+
+    try:
+        yield
+
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def query() -> ContextManager[None]:
+    """Time one database query when the current request is profiled.
+
+    Calls a query makes to another instrumented method are not counted again.
+    """
+
+    timings: Optional[RequestTimings] = _timings.get()
+
+    if timings is None or _in_query.get():
+        return _untimed
+
+    return _timed_query(timings)
+
+
+@contextmanager
+def _timed_query(timings: RequestTimings) -> Iterator[None]:
+
+    token: Token = _in_query.set(True)
+    start: float = time.perf_counter()
+
+    try:
+        yield
+
+    finally:
+        _in_query.reset(token)
+
+        timings.queries += 1
+        timings.add("db", time.perf_counter() - start)
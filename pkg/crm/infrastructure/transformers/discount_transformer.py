@@ -4,10 +4,15 @@ from pkg.crm.domain.entities.discount_entity import DiscountEntity
 
 
 class DiscountTransformer:
+    trusted: bool
+
+    def __init__(self, trusted: bool = False):
+        self.trusted = trusted
+
     @staticmethod
     def transform_discount_to_output(item: DiscountEntity) -> DiscountOutputDTO:
         return DiscountOutputDTO(
-            id_discount=item.id,
+            id=item.id,
             name=item.name,
             percentage=float(item.percentage),
             is_visible=item.is_visible,
@@ -21,3 +26,27 @@ class DiscountTransformer:
             DiscountTransformer.transform_discount_to_output(discount)
             for discount in items
         ]
+
+    @staticmethod
+    def transform_discount_to_trusted_output(item: DiscountEntity) -> dict:
+        """Same shape as `DiscountOutputDTO`, without re-validating a stored row."""
+        return {
+            "id": item.id,
+            "name": item.name,
+            "percentage": float(item.percentage),
+            "is_visible": item.is_visible,
+        }
+
+    def transform(self, item: DiscountEntity) -> DiscountOutputDTO | dict:
+        if self.trusted:
+            return self.transform_discount_to_trusted_output(item)
+
+        return self.transform_discount_to_output(item)
+
+    def transform_many(
+        self, items: List[DiscountEntity]
+    ) -> List[DiscountOutputDTO] | List[dict]:
+        if self.trusted:
+            return [self.transform_discount_to_trusted_output(item) for item in items]
+
+        return self.transform_discounts_to_outputs(items)
@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from onbbu import ServerHttp
+
+from internal.settings import (
+    CHANGE_FEED,
+    CREATE_ON_CONFLICT,
+    LOGGING,
+    METRICS_ENABLED,
+    PROFILING,
+    TRUSTED_OUTPUT,
+)
+
+from pkg.crm.application.dtos.create_discount_dto import ConflictMode
+from pkg.crm.application.dtos.discount_changes_dto import ChangeFeedSettings
+
+from pkg.crm.domain.services.main import ServiceRegistry, NewService, ServicesContext
+
+from pkg.crm.infrastructure.adapters.lifespan import add_lifespan_hooks
+from pkg.crm.infrastructure.adapters.read_your_writes import (
+    ReadYourWritesMiddleware,
+)
+from pkg.crm.infrastructure.adapters.main import (
+    ConfigHttpAdapter,
+    ConfigMetricsHttpAdapter,
+    NewHttpAdapter,
+    NewMetricsHttpAdapter,
+)
+from pkg.crm.infrastructure.adapters.response_cache import ResponseCache
+
+from pkg.crm.infrastructure.cache.main import Cache, NewCache
+
+from pkg.crm.infrastructure.logger.pipeline import LogPipeline, LogPipelineSettings
+
+from pkg.crm.infrastructure.messaging.main import Messaging, NewMessaging
+
+from pkg.crm.infrastructure.metrics.main import Metrics, MetricsContext, NewMetrics
+
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+from pkg.crm.infrastructure.persistence.repositories.in_memory_discount_repository import (
+    InMemoryDiscountRepository,
+)
+from pkg.crm.infrastructure.persistence.repositories.main import (
+    NewRepository,
+    Repository,
+)
+
+from pkg.crm.infrastructure.profiling.profiler import Profiler, ProfilerSettings
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigInit:
+    http: ServerHttp
+
+
+class Module:
+    config: ConfigInit
+
+    def __init__(self, config: ConfigInit):
+
+        self.config = config
+
+    def init(self) -> ServiceRegistry:
+
+        logs: LogPipeline = LogPipeline(LogPipelineSettings(**LOGGING))
+
+        add_lifespan_hooks(self.config.http, startup=logs.start, shutdown=logs.stop)
+
+        repo: Repository = NewRepository().init()
+
+        add_lifespan_hooks(self.config.http, startup=repo.pool.configure)
+        add_lifespan_hooks(self.config.http, startup=repo.router.configure)
+
+        if isinstance(repo.discountRepo, InMemoryDiscountRepository):
+            add_lifespan_hooks(
+                self.config.http,
+                startup=repo.discountRepo.start,
+                shutdown=repo.discountRepo.stop,
+            )
+
+        if isinstance(repo.discountRepo, DiscountRepository):
+            for loader in repo.discountRepo.loaders or ():
+                add_lifespan_hooks(self.config.http, shutdown=loader.stop)
+
+        if repo.router.replicas:
+            self.config.http.server.add_middleware(
+                ReadYourWritesMiddleware, router=repo.router
+            )
+
+        messaging: Messaging = NewMessaging(repo).init()
+
+        add_lifespan_hooks(
+            self.config.http,
+            startup=messaging.dispatcher.start,
+            shutdown=messaging.dispatcher.stop,
+        )
+
+        profiler: Profiler = Profiler(ProfilerSettings(**PROFILING))
+
+        add_lifespan_hooks(self.config.http, startup=profiler.configure)
+
+        cache: Cache = NewCache(repo).init()
+
+        if isinstance(repo.discountRepo, InMemoryDiscountRepository):
+            repo.discountRepo.listeners.append(cache.discountCache.forget)
+
+        add_lifespan_hooks(
+            self.config.http,
+            startup=cache.warmer.start,
+            shutdown=cache.warmer.stop,
+        )
+
+        service: ServiceRegistry = NewService(
+            ctx=ServicesContext(
+                Repo=repo,
+                Cache=cache,
+                TrustedOutput=TRUSTED_OUTPUT,
+                ChangeFeed=ChangeFeedSettings(**CHANGE_FEED),
+                CreateOnConflict=ConflictMode(CREATE_ON_CONFLICT),
+            )
+        ).init()
+
+        responseCache: ResponseCache = ResponseCache()
+
+        metrics: Optional[Metrics] = None
+
+        if METRICS_ENABLED:
+            metrics = NewMetrics(
+                MetricsContext(
+                    Repo=repo,
+                    Cache=cache,
+                    Service=service,
+                    ResponseCache=responseCache,
+                    Logs=logs,
+                    Messaging=messaging,
+                )
+            ).init()
+
+            NewMetricsHttpAdapter(
+                ConfigMetricsHttpAdapter(
+                    Http=self.config.http, registry=metrics.registry
+                )
+            )
+
+        NewHttpAdapter(
+            ConfigHttpAdapter(
+                Http=self.config.http,
+                discountService=service.discountService,
+                pool=repo.pool,
+                responseCache=responseCache,
+                router=repo.router,
+                profiler=profiler,
+                metrics=metrics.http if metrics else None,
+            )
+        )
+
+        return service
@@ -0,0 +1,125 @@
+"""Fixtures shared by the test suite.
+
+Importing onbbu imports `internal/main.py` from the working directory, which
+builds the app and reads `internal/settings.py`. The suite therefore runs
+from the repository root, with the files the settings point at moved to a
+scratch directory before anything imports them. The `onbbu.log` onbbu opens
+there on import is swapped for one in the scratch directory too.
+"""
+
+import logging
+import os
+import pkgutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Callable, ContextManager, Iterator
+
+ROOT: Path = Path(__file__).resolve().parent.parent
+SCRATCH: Path = Path(tempfile.mkdtemp(prefix="crm-tests-"))
+
+os.chdir(ROOT)
+
+os.environ.setdefault("DATABASE_URL", f"sqlite://{SCRATCH}/db.sqlite3")
+os.environ.setdefault("CRM_LOG_FILE", str(SCRATCH / "crm.log"))
+os.environ.setdefault("CRM_OUTBOX_FILE", str(SCRATCH / "crm-events.jsonl"))
+os.environ.setdefault("PROFILE_DIR", str(SCRATCH / "profiles"))
+
+import onbbu  # noqa: E402
+from onbbu import ServerHttp, create_app  # noqa: E402
+import pytest  # noqa: E402
+from starlette.testclient import TestClient  # noqa: E402
+from tortoise import Tortoise, connections  # noqa: E402
+
+from pkg.crm import Module as CRM  # noqa: E402
+from pkg.crm.infrastructure.persistence import models  # noqa: E402
+from pkg.crm.infrastructure.persistence.migrations.runner import migrate  # noqa: E402
+from pkg.crm.infrastructure.profiling import timings  # noqa: E402
+from pkg.crm.infrastructure.profiling.queries import instrument_queries  # noqa: E402
+from pkg.crm.infrastructure.profiling.timings import RequestTimings  # noqa: E402
+
+
+def move_onbbu_log() -> None:
+
+    app_logger: logging.Logger = logging.getLogger("app_logger")
+
+    for handler in list(app_logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            scratch: logging.FileHandler = logging.FileHandler(SCRATCH / "onbbu.log")
+            scratch.setFormatter(handler.formatter)
+
+            app_logger.removeHandler(handler)
+            app_logger.addHandler(scratch)
+            handler.close()
+
+
+move_onbbu_log()
+
+MODELS: list[str] = [
+    f"{models.__name__}.{module.name}"
+    for module in pkgutil.iter_modules(models.__path__)
+]
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def database(tmp_path: Path) -> AsyncIterator[str]:
+    """A migrated SQLite database as the `default` connection, its URL."""
+
+    url: str = f"sqlite://{tmp_path}/db.sqlite3"
+
+    await Tortoise.init(db_url=url, modules={"models": MODELS})
+    await Tortoise.generate_schemas()
+    await migrate(connections.get("default"))
+
+    yield url
+
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+def queries(database: str) -> Callable[[], ContextManager[RequestTimings]]:
+    """Counts the statements run inside `with queries() as counted:`.
+
+    Statements a query method runs through another one count once, and
+    BEGIN/COMMIT are not counted.
+    """
+
+    instrument_queries()
+
+    @contextmanager
+    def counting() -> Iterator[RequestTimings]:
+
+        counted, token = timings.begin()
+
+        try:
+            yield counted
+
+        finally:
+            timings.end(token)
+
+    return counting
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    """A fresh app over an empty database of its own, its file `db.sqlite3`.
+
+    The app of `internal/main.py` is built once and bound to the event loop
+    of its first startup, so every test gets a new one wired the same way.
+    """
+
+    monkeypatch.setattr(
+        onbbu.database, "database_url", f"sqlite://{tmp_path}/db.sqlite3"
+    )
+    monkeypatch.setattr(onbbu.database, "model_modules", [])
+
+    server: ServerHttp = create_app()
+    CRM(server.config).init()
+
+    with TestClient(server.server) as client:
+        yield client
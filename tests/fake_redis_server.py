@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Optional
+
+from pkg.crm.infrastructure.cache.resp import RespError, encode_reply, read_reply
+
+
+class FakeRedisServer:
+    """In-memory server speaking enough of the Redis protocol for the tests.
+
+    Supports PING, AUTH, SELECT, GET, SET (EX/PX), DEL, FLUSHDB, PUBLISH and
+    SUBSCRIBE. Start it on port 0 and hand `url` to `RedisCacheBackend`.
+    """
+
+    host: str
+    port: int
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+
+        self._data: dict[bytes, tuple[bytes, Optional[float]]] = {}
+        self._channels: defaultdict[bytes, set[asyncio.StreamWriter]] = defaultdict(set)
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    async def start(self) -> "FakeRedisServer":
+
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        return self
+
+    async def stop(self) -> None:
+
+        if self._server:
+            self._server.close()
+
+            for writer in self._clients:
+                writer.close()
+
+            await self._server.wait_closed()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+
+        self._clients.add(writer)
+
+        try:
+            while True:
+                command = await read_reply(reader)
+
+                if not isinstance(command, list) or not command:
+                    writer.write(encode_reply(RespError("ERR protocol error")))
+                    continue
+
+                name: str = command[0].decode().upper()
+                args: list[bytes] = command[1:]
+
+                if name == "SUBSCRIBE":
+                    for count, channel in enumerate(args, start=1):
+                        self._channels[channel].add(writer)
+                        writer.write(encode_reply([b"subscribe", channel, count]))
+                else:
+                    writer.write(encode_reply(self._execute(name, args)))
+
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            self._clients.discard(writer)
+
+            for writers in self._channels.values():
+                writers.discard(writer)
+
+            writer.close()
+
+    def _execute(self, name: str, args: list[bytes]):
+
+        if name == "PING":
+            return "PONG"
+
+        if name in ("AUTH", "SELECT"):
+            return "OK"
+
+        if name == "GET":
+            entry = self._data.get(args[0])
+
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[args[0]]
+                return None
+
+            return value
+
+        if name == "SET":
+            expires_at: Optional[float] = None
+            options: list[bytes] = [arg.upper() for arg in args[2:]]
+
+            if b"EX" in options:
+                expires_at = time.monotonic() + int(args[3 + options.index(b"EX")])
+
+            if b"PX" in options:
+                expires_at = (
+                    time.monotonic() + int(args[3 + options.index(b"PX")]) / 1000
+                )
+
+            self._data[args[0]] = (args[1], expires_at)
+
+            return "OK"
+
+        if name == "DEL":
+            return sum(self._data.pop(key, None) is not None for key in args)
+
+        if name == "FLUSHDB":
+            self._data.clear()
+            return "OK"
+
+        if name == "PUBLISH":
+            subscribers: set[asyncio.StreamWriter] = self._channels.get(args[0], set())
+
+            for subscriber in subscribers:
+                subscriber.write(encode_reply([b"message", args[0], args[1]]))
+
+            return len(subscribers)
+
+        return RespError(f"ERR unknown command '{name.lower()}'")
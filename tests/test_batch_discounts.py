@@ -0,0 +1,79 @@
+import pytest
+
+from pkg.crm.application.dtos.batch_discount_dto import MalformedBatchError
+from pkg.crm.application.use_cases.batch_discounts_usecases import BatchDiscounts
+from pkg.crm.infrastructure.cache.discount_cache import DiscountCache
+from pkg.crm.infrastructure.persistence.repositories.in_memory_discount_repository import (
+    InMemoryDiscountRepository,
+)
+
+
+async def items_then_garbage(*items):
+
+    for item in items:
+        yield item
+
+    raise MalformedBatchError("Malformed body: Expecting value")
+
+
+@pytest.mark.anyio
+async def test_malformed_body_keeps_the_chunks_already_written():
+
+    repository: InMemoryDiscountRepository = InMemoryDiscountRepository()
+    batch: BatchDiscounts = BatchDiscounts(
+        repository, DiscountCache(repository), chunk_size=1
+    )
+
+    results = await batch.execute(
+        items_then_garbage(
+            {"name": "summer", "percentage": 10},
+            {"name": "winter", "percentage": 20},
+        )
+    )
+
+    assert [(result.index, result.status) for result in results] == [
+        (0, "created"),
+        (1, "created"),
+        (2, "error"),
+    ]
+    assert results[2].error == "Malformed body: Expecting value"
+    assert await repository.exist_by_name("winter")
+
+
+def test_malformed_line_is_reported_after_the_written_items(client):
+
+    response = client.post(
+        "/crm/discounts:batch",
+        headers={"content-type": "application/x-ndjson"},
+        content=(
+            b'{"name": "ndjson 1", "percentage": 10}\n'
+            b'{"name": "ndjson 2", "percentage": 20}\n'
+            b'{"name": "ndjson 3", \n'
+            b'{"name": "ndjson 4", "percentage": 30}\n'
+        ),
+    )
+
+    assert response.status_code == 200
+    assert [(item["index"], item["status"]) for item in response.json()] == [
+        (0, "created"),
+        (1, "created"),
+        (2, "error"),
+    ]
+
+    names = [d["name"] for d in client.get("/crm/discounts?q=ndjson").json()["data"]]
+
+    assert names == ["ndjson 1", "ndjson 2"]
+
+
+def test_truncated_array_is_reported_after_the_written_items(client):
+
+    response = client.post(
+        "/crm/discounts:batch",
+        content=b'[{"name": "array 1", "percentage": 10}, {"name": "arr',
+    )
+
+    assert response.status_code == 200
+    assert [(item["index"], item["status"]) for item in response.json()] == [
+        (0, "created"),
+        (1, "error"),
+    ]
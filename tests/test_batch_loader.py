@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from pkg.crm.infrastructure.persistence.batch_loader import BatchLoader
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_lookups_share_one_batch():
+
+    batches: list[list[int]] = []
+
+    async def load_many(keys: list[int]) -> dict[int, str]:
+        batches.append(keys)
+        return {key: str(key) for key in keys if key != 404}
+
+    loader: BatchLoader[int, str] = BatchLoader(load_many)
+
+    found = await asyncio.gather(*(loader.load(key) for key in (1, 2, 1, 404)))
+
+    assert found == ["1", "2", "1", None]
+    assert batches == [[1, 2, 404]]
+    assert not loader._tasks
+
+
+async def test_stop_cancels_the_batches_in_flight():
+
+    started: asyncio.Event = asyncio.Event()
+
+    async def load_many(keys: list[int]) -> dict[int, str]:
+        started.set()
+        await asyncio.Event().wait()
+        return {}
+
+    loader: BatchLoader[int, str] = BatchLoader(load_many)
+    waiting: asyncio.Task = asyncio.create_task(loader.load(1))
+
+    await started.wait()
+
+    assert len(loader._tasks) == 1
+
+    await loader.stop()
+
+    assert not loader._tasks
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
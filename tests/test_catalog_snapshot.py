@@ -0,0 +1,46 @@
+import pickle
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from pkg.crm.domain.entities.discount_entity import DiscountEntity
+from pkg.crm.infrastructure.cache.snapshot import CatalogSnapshot
+
+
+def test_discounts_round_trip(tmp_path):
+
+    snapshot: CatalogSnapshot = CatalogSnapshot(str(tmp_path / "catalog.json"))
+    discounts: list[DiscountEntity] = [
+        DiscountEntity(
+            id=1,
+            name="summer",
+            percentage=Decimal("12.50"),
+            is_visible=True,
+            version=3,
+            updated_at=datetime(2026, 7, 1, 12, 30, tzinfo=timezone.utc),
+        ),
+        DiscountEntity(id=2, name="winter", percentage=Decimal(5), is_visible=False),
+    ]
+
+    snapshot.save(discounts)
+
+    loaded = snapshot.load(max_age=60)
+
+    assert loaded is not None
+    assert loaded.discounts == discounts
+    assert snapshot.load(max_age=-1) is None
+
+
+def test_files_of_another_format_are_ignored(tmp_path):
+
+    path = tmp_path / "catalog.json"
+    snapshot: CatalogSnapshot = CatalogSnapshot(str(path))
+
+    assert snapshot.load(max_age=60) is None
+
+    path.write_bytes(pickle.dumps({"format": 1, "rows": []}))
+
+    assert snapshot.load(max_age=60) is None
+
+    path.write_text('{"format": 2, "fields": ["id"], "created_at": 0, "rows": []}')
+
+    assert snapshot.load(max_age=60) is None
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import pytest
+from tortoise import timezone
+
+from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.application.dtos.discount_changes_dto import (
+    ChangesExpiredError,
+    DiscountChangesDTO,
+)
+from pkg.crm.application.use_cases.get_discount_changes_usecases import (
+    GetDiscountChanges,
+)
+from pkg.crm.infrastructure.persistence.models.discount_event_model import (
+    DiscountEventModel,
+)
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+
+
+@pytest.mark.anyio
+async def test_gaps_are_final_on_sqlite(database):
+
+    repository: DiscountRepository = DiscountRepository()
+
+    await repository.create(CreateDiscountDTO(name="summer", percentage=10))
+
+    # The id a rolled back transaction took.
+    await DiscountEventModel.create(
+        id=3, type="discount.created", discount_id=2, payload={}
+    )
+
+    events = await repository.events.changes_after(0, 10, settle=60)
+
+    assert [event.id for event in events] == [1, 3]
+
+
+@pytest.mark.anyio
+async def test_sequences_in_a_pruned_range_have_expired(database):
+
+    repository: DiscountRepository = DiscountRepository()
+    changes: GetDiscountChanges = GetDiscountChanges(repository.events)
+
+    for name in ("poison", "summer", "winter", "latest"):
+        await repository.create(CreateDiscountDTO(name=name, percentage=10))
+
+    # The first event is dead-lettered, the next two were dispatched.
+    await DiscountEventModel.filter(id=1).update(attempts=10)
+    await DiscountEventModel.filter(id__in=[2, 3]).update(
+        dispatched_at=timezone.now() - timedelta(days=30)
+    )
+
+    assert await repository.events.prune(timezone.now() - timedelta(days=7)) == 2
+    assert await repository.events.pruned_through() == 3
+
+    with pytest.raises(ChangesExpiredError):
+        await changes.execute(DiscountChangesDTO(since=1))
+
+    page = await changes.execute(DiscountChangesDTO(since=3))
+
+    assert [change.seq for change in page.changes] == [4]
+
+
+@pytest.mark.parametrize("query", ["limit=abc", "wait=abc"])
+def test_malformed_numbers_answer_400(client, query):
+
+    response = client.get(f"/crm/discounts/changes?since=0&{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.json()
@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+import pytest
+from tortoise import connections
+
+from pkg.crm.application.commands.explain_discounts import (
+    EXPECTED_SCANS,
+    SCENARIOS,
+    Command,
+)
+from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.application.dtos.cursor_paginate_dto import CursorPaginateDTO
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+from pkg.crm.infrastructure.persistence.models.discount_model import DiscountModel
+from pkg.crm.infrastructure.persistence.query_plan import sequential_scans
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("page", ["first", "next"])
+@pytest.mark.parametrize("label", SCENARIOS)
+async def test_list_query_uses_an_index(database, label, page):
+
+    db = connections.get("default")
+    table: str = DiscountModel._meta.db_table
+    repository: DiscountRepository = DiscountRepository()
+    filters: DiscountFilterDTO = DiscountFilterDTO(**SCENARIOS[label])
+
+    await Command.seed(db, 2000)
+    await db.execute_query(f"ANALYZE {table}")
+
+    plan = (
+        await repository.explain_all(filters, 100, db)
+        if page == "first"
+        else await repository.explain_all_after(
+            Command.next_page(filters, 100), filters, db
+        )
+    )
+
+    dialect: str = db.capabilities.dialect
+
+    if label in EXPECTED_SCANS.get(dialect, {}):
+        pytest.skip(EXPECTED_SCANS[dialect][label])
+
+    assert sequential_scans(plan, dialect, table) == []
+
+
+async def test_percentage_range_compares_numbers(database):
+
+    repository: DiscountRepository = DiscountRepository()
+
+    for name, percentage in [
+        ("five", 5),
+        ("nine and a half", Decimal("9.5")),
+        ("twenty", 20),
+        ("hundred", 100),
+    ]:
+        await repository.create(CreateDiscountDTO(name=name, percentage=percentage))
+
+    discounts, _ = await repository.get_all_after(
+        CursorPaginateDTO(limit=10, sort="percentage"),
+        DiscountFilterDTO(min_pct=Decimal("9"), max_pct=Decimal("100")),
+    )
+
+    assert [discount.name for discount in discounts] == [
+        "nine and a half",
+        "twenty",
+        "hundred",
+    ]
+
+
+@pytest.mark.parametrize("sort", ["name", "-name", "percentage", "-percentage"])
+async def test_cursor_pages_walk_ties_in_order(database, sort):
+
+    repository: DiscountRepository = DiscountRepository()
+
+    for index in range(9):
+        await repository.create(
+            CreateDiscountDTO(name=f"discount {index}", percentage=index // 3 * 10)
+        )
+
+    seen: list[int] = []
+    after = None
+
+    while True:
+        discounts, after = await repository.get_all_after(
+            CursorPaginateDTO(limit=2, after=after, sort=sort)
+        )
+        seen += [discount.id for discount in discounts]
+
+        if after is None:
+            break
+
+    everything, _ = await repository.get_all_after(
+        CursorPaginateDTO(limit=100, sort=sort)
+    )
+
+    assert seen == [discount.id for discount in everything]
+    assert len(seen) == 9
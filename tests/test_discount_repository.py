@@ -0,0 +1,87 @@
+import pytest
+
+from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+from pkg.crm.application.dtos.paginate_count_dto import CountStrategy
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+# A write that changes a row also appends its outbox event, in the same
+# transaction, which is the only other statement it may run.
+async def test_reads_run_one_statement(queries):
+
+    repository: DiscountRepository = DiscountRepository()
+
+    await repository.create(CreateDiscountDTO(name="summer", percentage=10))
+
+    for lookup in (
+        lambda: repository.get_by_id(1),
+        lambda: repository.get_by_id(404),
+        lambda: repository.get_by_name("summer"),
+        lambda: repository.get_by_name("missing"),
+        lambda: repository.exist_by_id(1),
+        lambda: repository.exist_by_name("summer"),
+    ):
+        with queries() as counted:
+            await lookup()
+
+        assert counted.queries == 1
+
+
+async def test_writes_run_one_statement_and_their_event(queries):
+
+    repository: DiscountRepository = DiscountRepository()
+
+    with queries() as counted:
+        created = await repository.create(
+            CreateDiscountDTO(name="summer", percentage=10)
+        )
+
+    assert counted.queries == 2
+
+    with queries() as counted:
+        updated = await repository.update_by_id(
+            PatchDiscountDTO(id=created.id, percentage=15)
+        )
+
+    assert counted.queries == 2
+    assert (updated.percentage, updated.version) == (15, 2)
+
+    with queries() as counted:
+        deleted = await repository.delete_by_id(created.id)
+
+    assert counted.queries == 2
+    assert deleted.id == created.id
+
+
+async def test_writes_to_missing_discounts_run_one_statement(queries):
+
+    repository: DiscountRepository = DiscountRepository()
+
+    with queries() as counted:
+        assert (
+            await repository.update_by_id(PatchDiscountDTO(id=404, percentage=1))
+            is None
+        )
+        assert await repository.delete_by_id(404) is None
+
+    assert counted.queries == 2
+
+
+async def test_updates_refresh_the_cached_filtered_counts(database):
+
+    repository: DiscountRepository = DiscountRepository(count_ttl=60)
+    visible: DiscountFilterDTO = DiscountFilterDTO(visible=True)
+
+    created = await repository.create(CreateDiscountDTO(name="summer", percentage=10))
+
+    assert await repository.get_total_count(CountStrategy.CACHED, visible) == 1
+
+    await repository.update_by_id(PatchDiscountDTO(id=created.id, is_visible=False))
+
+    assert await repository.get_total_count(CountStrategy.CACHED, visible) == 0
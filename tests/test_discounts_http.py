@@ -0,0 +1,144 @@
+import sqlite3
+
+from pkg.crm.infrastructure.adapters.conditional import versioned_etag
+
+
+def test_list_etag_is_weak_and_shared_by_every_coding(client):
+
+    client.post(
+        "/crm/discounts:batch",
+        json=[{"name": f"etag {index}", "percentage": 10} for index in range(40)],
+    )
+
+    gzip = client.get("/crm/discounts?q=etag", headers={"accept-encoding": "gzip"})
+    identity = client.get(
+        "/crm/discounts?q=etag", headers={"accept-encoding": "identity"}
+    )
+
+    assert gzip.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert gzip.headers["etag"].startswith('W/"')
+    assert gzip.headers["etag"] == identity.headers["etag"]
+
+    revalidated = client.get(
+        "/crm/discounts?q=etag", headers={"if-none-match": gzip.headers["etag"]}
+    )
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzip.headers["etag"]
+
+
+def test_renaming_to_a_taken_name_answers_409(client):
+
+    first = client.post("/crm/discounts", json={"name": "taken", "percentage": 5})
+    second = client.post("/crm/discounts", json={"name": "free", "percentage": 5})
+
+    put = client.put(
+        f"/crm/discounts/{second.json()['id']}",
+        json={"name": "taken", "percentage": 5, "is_visible": True},
+    )
+    patch = client.patch(
+        f"/crm/discounts/{second.json()['id']}", json={"name": "taken"}
+    )
+
+    assert first.status_code == second.status_code == 200
+    assert (put.status_code, patch.status_code) == (409, 409)
+
+
+def test_if_match_is_checked_against_the_primary(client, tmp_path):
+
+    created = client.post("/crm/discounts", json={"name": "stale", "percentage": 5})
+    id: int = created.json()["id"]
+
+    # Cached by this worker at version 1, then written by another one.
+    assert client.get(f"/crm/discounts/{id}").status_code == 200
+
+    with sqlite3.connect(tmp_path / "db.sqlite3") as db:
+        db.execute("UPDATE crm_discounts SET version = 2 WHERE id = ?", (id,))
+
+    response = client.patch(
+        f"/crm/discounts/{id}",
+        json={"percentage": 6},
+        headers={"if-match": versioned_etag(2, "discount", id)},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["percentage"] == 6
+    assert response.headers["etag"] == versioned_etag(3, "discount", id)
+
+
+def test_if_match_pins_the_write_to_its_version(client):
+
+    created = client.post("/crm/discounts", json={"name": "pinned", "percentage": 5})
+    id: int = created.json()["id"]
+    etag: str = client.get(f"/crm/discounts/{id}").headers["etag"]
+
+    first = client.patch(
+        f"/crm/discounts/{id}", json={"percentage": 6}, headers={"if-match": etag}
+    )
+    stale = client.patch(
+        f"/crm/discounts/{id}", json={"percentage": 7}, headers={"if-match": etag}
+    )
+    listed = client.patch(
+        f"/crm/discounts/{id}",
+        json={"percentage": 8},
+        headers={"if-match": f"{etag}, {first.headers['etag']}"},
+    )
+    weak = client.patch(
+        f"/crm/discounts/{id}",
+        json={"percentage": 9},
+        headers={"if-match": f"W/{listed.headers['etag']}"},
+    )
+
+    assert first.status_code == 200
+    assert first.headers["etag"] == versioned_etag(2, "discount", id)
+    assert (stale.status_code, listed.status_code, weak.status_code) == (
+        412,
+        200,
+        412,
+    )
+    assert client.get(f"/crm/discounts/{id}").json()["percentage"] == 8
+
+
+def test_updating_a_missing_discount(client):
+
+    plain = client.patch("/crm/discounts/404", json={"percentage": 6})
+    matched = client.patch(
+        "/crm/discounts/404", json={"percentage": 6}, headers={"if-match": "*"}
+    )
+
+    assert (plain.status_code, matched.status_code) == (404, 412)
+
+
+def test_retried_creates_replay_their_first_answer(client):
+
+    headers: dict[str, str] = {"idempotency-key": "retry-1"}
+
+    first = client.post(
+        "/crm/discounts", json={"name": "once", "percentage": 5}, headers=headers
+    )
+    retried = client.post(
+        "/crm/discounts", json={"name": "once", "percentage": 5}, headers=headers
+    )
+    reused = client.post(
+        "/crm/discounts", json={"name": "other", "percentage": 5}, headers=headers
+    )
+
+    assert first.status_code == retried.status_code == 200
+    assert retried.json() == first.json()
+    assert reused.status_code == 422
+
+
+def test_bad_create_parameters_answer_400(client):
+
+    conflict = client.post(
+        "/crm/discounts?on_conflict=bogus", json={"name": "first", "percentage": 5}
+    )
+    key = client.post(
+        "/crm/discounts",
+        json={"name": "second", "percentage": 5},
+        headers={"idempotency-key": "k" * 256},
+    )
+
+    assert (conflict.status_code, key.status_code) == (400, 400)
+    assert "error" in conflict.json() and "error" in key.json()
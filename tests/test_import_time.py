@@ -0,0 +1,21 @@
+import pytest
+
+from pkg.crm.application.commands.check_import_time import (
+    COMMAND_BUDGET,
+    SERVER_BUDGET,
+    Command,
+    budgets,
+)
+
+REPEAT: int = 3
+
+
+# The same measurement as `check_import_time`, the fastest of a few runs.
+@pytest.mark.parametrize(
+    "module, budget", budgets(SERVER_BUDGET, COMMAND_BUDGET).items()
+)
+def test_module_imports_within_its_budget(module, budget):
+
+    took: float = min(Command.measure(module) for _ in range(REPEAT))
+
+    assert took <= budget, f"{module} took {took:.1f} ms (budget {budget:.0f} ms)"
@@ -0,0 +1,166 @@
+import inspect
+
+import pytest
+from onbbu.paginate import PaginateDTO
+from tortoise.exceptions import IntegrityError
+
+from pkg.crm.application.dtos.create_discount_dto import (
+    ConflictMode,
+    CreateDiscountDTO,
+    IdempotencyKeyTakenError,
+)
+from pkg.crm.application.dtos.cursor_paginate_dto import CursorPaginateDTO
+from pkg.crm.application.dtos.discount_filter_dto import DiscountFilterDTO
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
+from pkg.crm.domain.repositories.discount_repository_port import DiscountRepositoryPort
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+from pkg.crm.infrastructure.persistence.repositories.in_memory_discount_repository import (
+    InMemoryDiscountRepository,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("cls", [DiscountRepository, InMemoryDiscountRepository])
+async def test_repositories_implement_the_port(cls):
+
+    assert isinstance(cls(), DiscountRepositoryPort)
+
+    for name, method in inspect.getmembers(DiscountRepositoryPort, inspect.isfunction):
+        if name.startswith("_"):
+            continue
+
+        assert list(inspect.signature(getattr(cls, name)).parameters) == list(
+            inspect.signature(method).parameters
+        ), name
+
+
+# Without a store the repository is the only copy of the discounts.
+async def test_writes_are_read_back():
+
+    repository: InMemoryDiscountRepository = InMemoryDiscountRepository()
+
+    created = await repository.create(CreateDiscountDTO(name="summer", percentage=10))
+
+    assert await repository.get_by_id(created.id) == created
+    assert await repository.get_by_name("summer") == created
+    assert await repository.exist_by_name("summer")
+
+    updated = await repository.update_by_id(
+        PatchDiscountDTO(id=created.id, name="autumn", percentage=15)
+    )
+
+    assert (updated.name, updated.percentage, updated.version) == ("autumn", 15, 2)
+    assert await repository.get_by_name("summer") is None
+    assert await repository.get_by_name("autumn") == updated
+
+    assert await repository.delete_by_id(created.id) == updated
+    assert await repository.get_by_id(created.id) is None
+    assert await repository.delete_by_id(created.id) is None
+
+
+async def test_stale_and_missing_updates_change_nothing():
+
+    repository: InMemoryDiscountRepository = InMemoryDiscountRepository()
+
+    created = await repository.create(CreateDiscountDTO(name="summer", percentage=10))
+
+    assert (
+        await repository.update_by_id(
+            PatchDiscountDTO(id=created.id, percentage=20, version=2)
+        )
+        is None
+    )
+    assert (
+        await repository.update_by_id(PatchDiscountDTO(id=404, percentage=20)) is None
+    )
+    assert await repository.get_by_id(created.id) == created
+
+
+async def test_names_stay_unique():
+
+    repository: InMemoryDiscountRepository = InMemoryDiscountRepository()
+
+    first = await repository.create(CreateDiscountDTO(name="summer", percentage=10))
+    second = await repository.create(CreateDiscountDTO(name="winter", percentage=10))
+
+    with pytest.raises(IntegrityError):
+        await repository.create(CreateDiscountDTO(name="summer", percentage=20))
+
+    with pytest.raises(IntegrityError):
+        await repository.update_by_id(PatchDiscountDTO(id=second.id, name="summer"))
+
+    ignored = await repository.create(
+        CreateDiscountDTO(name="summer", percentage=20), ConflictMode.IGNORE
+    )
+    updated = await repository.create(
+        CreateDiscountDTO(name="summer", percentage=30), ConflictMode.UPDATE
+    )
+
+    assert ignored == first
+    assert (updated.id, updated.percentage) == (first.id, 30)
+    assert await repository.get_by_name("winter") == second
+
+
+async def test_idempotency_keys_are_kept():
+
+    repository: InMemoryDiscountRepository = InMemoryDiscountRepository()
+
+    created = await repository.create(
+        CreateDiscountDTO(name="summer", percentage=10),
+        idempotency_key="retry-1",
+        fingerprint="first",
+    )
+
+    stored = await repository.keys.get("retry-1")
+
+    assert (stored.fingerprint, stored.discount["id"]) == ("first", created.id)
+
+    with pytest.raises(IdempotencyKeyTakenError):
+        await repository.create(
+            CreateDiscountDTO(name="winter", percentage=10), idempotency_key="retry-1"
+        )
+
+
+async def test_pages_and_cursors_walk_the_filtered_set():
+
+    repository: InMemoryDiscountRepository = InMemoryDiscountRepository()
+
+    for index in range(7):
+        await repository.create(
+            CreateDiscountDTO(
+                name=f"discount {index}", percentage=index * 10, is_visible=index % 2
+            )
+        )
+
+    visible: DiscountFilterDTO = DiscountFilterDTO(visible=True, sort="-percentage")
+
+    page, total = await repository.get_all(
+        PaginateDTO(page=2, limit=2), filters=visible
+    )
+
+    assert total == 3
+    assert [discount.name for discount in page] == ["discount 1"]
+
+    names: list[str] = []
+    after = None
+
+    while True:
+        rows, after = await repository.get_all_after(
+            CursorPaginateDTO(limit=3, after=after, sort="-percentage")
+        )
+        names += [discount.name for discount in rows]
+
+        if after is None:
+            break
+
+    assert names == [f"discount {index}" for index in reversed(range(7))]
+
+
+async def test_query_plans_are_empty():
+
+    repository: InMemoryDiscountRepository = InMemoryDiscountRepository()
+
+    assert await repository.explain_all(DiscountFilterDTO()) == []
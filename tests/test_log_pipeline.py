@@ -0,0 +1,62 @@
+import json
+import logging
+
+import pytest
+
+from pkg.crm.infrastructure.logger.pipeline import LogPipeline, LogPipelineSettings
+from pkg.crm.infrastructure.logger.segments import (
+    RotatingSegmentWriter,
+    RotationSettings,
+    rotated_segments,
+)
+
+
+@pytest.mark.anyio
+async def test_adopted_loggers_write_through_the_queue(tmp_path):
+
+    app_logger: logging.Logger = logging.getLogger("app_logger")
+    handlers: list[logging.Handler] = list(app_logger.handlers)
+
+    pipeline: LogPipeline = LogPipeline(
+        LogPipelineSettings(file=str(tmp_path / "crm.log"))
+    )
+
+    await pipeline.start()
+
+    try:
+        assert app_logger.handlers == [pipeline._handler]
+
+        logging.getLogger("pkg.crm.test").info("from %s", "crm")
+        app_logger.info("from onbbu", extra={"extra_data": {"model": "discount"}})
+
+    finally:
+        await pipeline.stop()
+
+    lines: list[dict] = [
+        json.loads(line) for line in (tmp_path / "crm.log").read_text().splitlines()
+    ]
+
+    assert [(line["logger"], line["message"]) for line in lines] == [
+        ("pkg.crm.test", "from crm"),
+        ("app_logger", "from onbbu"),
+    ]
+    assert lines[1]["extra"] == {"model": "discount"}
+    assert app_logger.handlers == handlers
+
+
+@pytest.mark.parametrize("backup_count, kept", [(0, 3), (2, 2)])
+def test_rotation_keeps_backup_count_segments(tmp_path, backup_count, kept):
+
+    writer: RotatingSegmentWriter = RotatingSegmentWriter(
+        str(tmp_path / "crm.log"),
+        RotationSettings(backup_count=backup_count, compression="gzip"),
+    )
+
+    # Archive on this thread, so the segments are settled once rotate returns.
+    writer._archive = writer._compress_pending
+
+    for n in range(3):
+        writer.write(f"line {n}\n")
+        writer.rotate()
+
+    assert len(rotated_segments(tmp_path / "crm.log")) == kept
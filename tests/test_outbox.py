@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.domain.entities.discount_event_entity import (
+    DiscountEventEntity,
+    DiscountEventType,
+)
+from pkg.crm.infrastructure.messaging.dispatcher import (
+    DispatcherSettings,
+    OutboxDispatcher,
+)
+from pkg.crm.infrastructure.messaging.sinks import EventSink, FileSink, InMemorySink
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class RejectingSink(EventSink):
+    """Fails every batch holding an event of the discount named `name`."""
+
+    name = "rejecting"
+
+    def __init__(self, name: str):
+        self.rejected = name
+
+    async def publish(self, events: list[DiscountEventEntity]) -> None:
+
+        if any(event.payload["name"] == self.rejected for event in events):
+            raise RuntimeError(f"Cannot take {self.rejected}")
+
+
+async def test_event_a_sink_keeps_failing_is_dead_lettered(database):
+
+    repository: DiscountRepository = DiscountRepository()
+    memory: InMemorySink = InMemorySink()
+    dispatcher: OutboxDispatcher = OutboxDispatcher(
+        repository.events,
+        [RejectingSink("poison"), memory],
+        DispatcherSettings(batch_size=10, max_attempts=3),
+    )
+
+    for name in ("before", "poison", "after"):
+        await repository.create(CreateDiscountDTO(name=name, percentage=10))
+
+    failures: int = 0
+
+    for _ in range(10):
+        try:
+            if not await dispatcher.dispatch_once():
+                break
+        except RuntimeError:
+            failures += 1
+
+    assert [event.payload["name"] for event in memory.events] == ["before", "after"]
+    assert failures == 4
+    assert dispatcher.stats().dead_lettered == 1
+
+    await repository.create(CreateDiscountDTO(name="later", percentage=10))
+
+    assert await dispatcher.dispatch_once() == 1
+    assert memory.events[-1].payload["name"] == "later"
+
+
+async def test_without_max_attempts_a_failing_event_is_retried(database, caplog):
+
+    repository: DiscountRepository = DiscountRepository()
+    rejecting: RejectingSink = RejectingSink("poison")
+    memory: InMemorySink = InMemorySink()
+    dispatcher: OutboxDispatcher = OutboxDispatcher(
+        repository.events,
+        [rejecting, memory],
+        DispatcherSettings(batch_size=10, max_attempts=0),
+    )
+
+    for name in ("before", "poison", "after"):
+        await repository.create(CreateDiscountDTO(name=name, percentage=10))
+
+    failures: int = 0
+
+    for _ in range(20):
+        try:
+            await dispatcher.dispatch_once()
+        except RuntimeError:
+            failures += 1
+
+    assert failures == 19
+    assert [event.payload["name"] for event in memory.events] == ["before"]
+    assert dispatcher.stats().dead_lettered == 0
+    assert "dead-lettered" not in caplog.text
+
+    rejecting.rejected = "nothing"
+
+    assert await dispatcher.dispatch_once() == 1
+    assert await dispatcher.dispatch_once() == 1
+    assert [event.payload["name"] for event in memory.events] == [
+        "before",
+        "poison",
+        "after",
+    ]
+
+
+async def test_memory_sink_keeps_every_batch():
+
+    sink: InMemorySink = InMemorySink()
+
+    await sink.publish([event(1)])
+    await sink.publish([event(2), event(3)])
+
+    assert [published.id for published in sink.events] == [1, 2, 3]
+
+
+async def test_file_sink_appends_json_lines(tmp_path):
+
+    sink: FileSink = FileSink(str(tmp_path / "events.jsonl"))
+
+    await sink.publish([event(1), event(2)])
+    await sink.publish([event(3)])
+
+    lines: list[dict] = [
+        json.loads(line)
+        for line in (tmp_path / "events.jsonl").read_text().splitlines()
+    ]
+
+    assert [line["id"] for line in lines] == [1, 2, 3]
+    assert lines[0] == {
+        "id": 1,
+        "type": "discount.created",
+        "discount_id": 10,
+        "payload": {"name": "discount 1"},
+        "created_at": None,
+    }
+
+
+def event(id: int) -> DiscountEventEntity:
+    return DiscountEventEntity(
+        id=id,
+        type=DiscountEventType.CREATED,
+        discount_id=id * 10,
+        payload={"name": f"discount {id}"},
+    )
@@ -0,0 +1,96 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.infrastructure.adapters.read_your_writes import (
+    COOKIE,
+    ReadYourWritesMiddleware,
+)
+from pkg.crm.infrastructure.persistence.repositories.discount_repository import (
+    DiscountRepository,
+)
+from pkg.crm.infrastructure.persistence.router import DatabaseRouter, ReadSession
+
+
+def copy_database(url: str, path) -> str:
+    """Copy the SQLite database at `url` to `path`, return the copy's URL."""
+
+    source = sqlite3.connect(url.removeprefix("sqlite://"))
+    target = sqlite3.connect(path)
+
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+    return f"sqlite://{path}"
+
+
+# The replica is a copy taken before the write and never catches up, the
+# most a replica can lag behind.
+@pytest.mark.anyio
+async def test_client_reads_its_own_write_until_the_window_closes(database, tmp_path):
+
+    router: DatabaseRouter = DatabaseRouter(
+        replica_urls=[copy_database(database, tmp_path / "replica.sqlite3")],
+        sticky_window=0.2,
+    )
+    await router.configure()
+
+    repository: DiscountRepository = DiscountRepository(router=router)
+    writer: ReadSession = ReadSession()
+
+    token = router.begin(writer)
+
+    try:
+        created = await repository.create(
+            CreateDiscountDTO(name="summer", percentage=10)
+        )
+
+        assert writer.wrote and writer.pinned()
+        assert (await repository.get_by_id(created.id)).name == "summer"
+        assert (await repository.get_by_name("summer")).id == created.id
+
+    finally:
+        router.end(token)
+
+    token = router.begin(ReadSession())
+
+    try:
+        assert await repository.get_by_id(created.id) is None
+
+    finally:
+        router.end(token)
+
+    await asyncio.sleep(0.25)
+
+    token = router.begin(writer)
+
+    try:
+        assert not writer.pinned()
+        assert await repository.get_by_id(created.id) is None
+
+    finally:
+        router.end(token)
+
+
+def test_cookie_cannot_pin_past_the_sticky_window():
+
+    middleware: ReadYourWritesMiddleware = ReadYourWritesMiddleware(
+        app=None, router=DatabaseRouter(sticky_window=2.0)
+    )
+
+    def deadline(value: str) -> float:
+        return middleware._deadline(
+            {"headers": [(b"cookie", f"{COOKIE}={value}".encode())]}
+        )
+
+    assert deadline("99999999999") <= time.time() + 2.0
+    assert deadline("inf") <= time.time() + 2.0
+    assert deadline("nan") == 0.0
+    assert deadline("soon") == 0.0
+    assert deadline(f"{time.time() + 1:.3f}") < time.time() + 1.01
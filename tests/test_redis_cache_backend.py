@@ -0,0 +1,128 @@
+import asyncio
+from typing import AsyncIterator, Callable
+
+import pytest
+
+from pkg.crm.application.dtos.create_discount_dto import CreateDiscountDTO
+from pkg.crm.application.dtos.patch_discount_dto import PatchDiscountDTO
+from pkg.crm.infrastructure.cache.discount_cache import (
+    INVALIDATION_CHANNEL,
+    DiscountCache,
+)
+from pkg.crm.infrastructure.cache.redis_cache_backend import RedisCacheBackend
+from pkg.crm.infrastructure.persistence.repositories.in_memory_discount_repository import (
+    InMemoryDiscountRepository,
+)
+from tests.fake_redis_server import FakeRedisServer
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[FakeRedisServer]:
+
+    server: FakeRedisServer = await FakeRedisServer().start()
+
+    yield server
+
+    await server.stop()
+
+
+async def eventually(condition: Callable[[], bool], timeout: float = 2.0) -> None:
+
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def test_values_round_trip_and_expire(server):
+
+    backend: RedisCacheBackend = RedisCacheBackend(server.url)
+
+    try:
+        await backend.set("kept", b"\x00binary\r\n", 60)
+        await backend.set("short", b"gone soon", 0.05)
+
+        assert await backend.get("kept") == b"\x00binary\r\n"
+        assert await backend.get("short") == b"gone soon"
+        assert await backend.get("missing") is None
+
+        await asyncio.sleep(0.1)
+
+        assert await backend.get("short") is None
+
+        await backend.delete("kept", "missing")
+
+        assert await backend.get("kept") is None
+
+    finally:
+        await backend.close()
+
+
+async def test_messages_reach_subscribers(server):
+
+    publisher: RedisCacheBackend = RedisCacheBackend(server.url)
+    subscriber: RedisCacheBackend = RedisCacheBackend(server.url)
+    received: list[bytes] = []
+
+    async def handle(message: bytes) -> None:
+        received.append(message)
+
+    listener: asyncio.Task = asyncio.ensure_future(
+        subscriber.subscribe("crm:test", handle)
+    )
+
+    try:
+        await eventually(lambda: server._channels[b"crm:test"])
+
+        await publisher.publish("crm:test", b"first")
+        await publisher.publish("crm:other", b"ignored")
+        await publisher.publish("crm:test", b"second")
+
+        await eventually(lambda: len(received) == 2)
+
+        assert received == [b"first", b"second"]
+
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        await publisher.close()
+        await subscriber.close()
+
+
+async def test_writes_drop_the_discount_on_other_workers(server):
+
+    repository: InMemoryDiscountRepository = InMemoryDiscountRepository()
+    writer: DiscountCache = DiscountCache(
+        repository, backend=RedisCacheBackend(server.url)
+    )
+    reader: DiscountCache = DiscountCache(
+        repository, backend=RedisCacheBackend(server.url)
+    )
+
+    try:
+        created = await repository.create(
+            CreateDiscountDTO(name="summer", percentage=10)
+        )
+
+        assert (await reader.get_by_id(created.id)).percentage == 10
+
+        await eventually(lambda: server._channels[INVALIDATION_CHANNEL.encode()])
+
+        updated = await repository.update_by_id(
+            PatchDiscountDTO(id=created.id, percentage=20)
+        )
+        await writer.invalidate(updated)
+
+        await eventually(lambda: created.id not in reader._entries)
+
+        assert (await reader.get_by_id(created.id)).percentage == 20
+        assert (await reader.get_by_name("summer")).percentage == 20
+
+    finally:
+        for cache in (writer, reader):
+            if cache._listener:
+                cache._listener.cancel()
+                await asyncio.gather(cache._listener, return_exceptions=True)
+
+            await cache.backend.close()